@@ -0,0 +1,4 @@
+from app.utils.startup import startup_report
+
+# Before any other module of the package is imported, so all are timed
+startup_report.track_imports(__name__)
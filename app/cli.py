@@ -0,0 +1,198 @@
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from app.config import settings
+from app.migrations import LATEST_VERSION, MIGRATIONS, current_version, databases, migrate
+from app.models import user, task, shard, idempotency  # noqa: F401  (register all tables)
+from app.server import serve
+from app.services.task_archive_service import TaskArchiveService
+from app.services.task_collection_service import TaskCollectionService
+from app.services.task_service import TaskService
+from app.services.task_shard_service import TaskShardService
+from app.sharding import shard_router
+
+
+def serve_api(args):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(process)d] %(levelname)s %(name)s: %(message)s")
+    sys.exit(serve(args.host, args.port, args.workers, args.forwarded_allow_ips))
+
+
+async def migrate_schema(args):
+    if args.status:
+        for name, target, _ in databases():
+            version = await current_version(target)
+            print(f"{name}: schema version {version} of {LATEST_VERSION}")
+            for pending in MIGRATIONS[version:]:
+                print(f"  pending {pending.version}: {pending.description}")
+        return
+    started = time.perf_counter()
+    for result in await migrate():
+        if result["created"]:
+            print(f"{result['database']}: created at schema version {result['to_version']}")
+        elif result["applied"]:
+            print(f"{result['database']}: version {result['from_version']} -> {result['to_version']}")
+            for applied in result["applied"]:
+                print(f"  applied {applied}")
+        else:
+            print(f"{result['database']}: up to date at schema version {result['from_version']}")
+    print(f"Migrated in {time.perf_counter() - started:.2f}s")
+
+
+async def reconcile_stats(args):
+    users = 0
+    for task_shard in shard_router.shards:
+        async with task_shard.sessionmaker() as db:
+            users += await TaskCollectionService.reconcile(db, user_id=args.user_id)
+    print(f"Reconciled task statistics for {users} user(s)")
+
+
+async def compact_tombstones(args):
+    older_than = datetime.now(timezone.utc) - timedelta(days=args.older_than_days)
+    purged = 0
+    for task_shard in shard_router.shards:
+        async with task_shard.sessionmaker() as db:
+            purged += await TaskService.compact_tombstones(
+                db, older_than, user_id=args.user_id, batch_size=args.batch_size
+            )
+    print(f"Purged {purged} tombstone(s) of tasks deleted before {older_than:%Y-%m-%d %H:%M} UTC")
+
+
+async def archive_tasks(args):
+    older_than = datetime.now(timezone.utc) - timedelta(days=args.older_than_days)
+    started = time.perf_counter()
+    archived = 0
+    for task_shard in shard_router.shards:
+        async with task_shard.sessionmaker() as db:
+            archived += await TaskArchiveService.archive(
+                db, older_than, batch_size=args.batch_size, user_id=args.user_id
+            )
+    seconds = time.perf_counter() - started
+    print(
+        f"Archived {archived} completed task(s) last written before {older_than:%Y-%m-%d %H:%M} UTC"
+        f" in {seconds:.1f}s ({archived / seconds:.0f}/s)"
+    )
+    for task_shard in shard_router.shards:
+        async with task_shard.sessionmaker() as db:
+            sizes = await TaskArchiveService.table_sizes(db)
+        print(
+            f"shard {task_shard.index}: {sizes['tasks']} task(s), {sizes['tombstones']} tombstone(s),"
+            f" {sizes['archived']} archived"
+        )
+
+
+async def shard_pin(args):
+    placed = await TaskShardService.pin_users(args.shard)
+    print(f"Placed {placed} user(s) on shard {args.shard}")
+
+
+async def shard_rebalance(args):
+    if args.user_id is not None:
+        moves = [(args.user_id, None, args.to if args.to is not None else shard_router.target(args.user_id))]
+    else:
+        moves = await TaskShardService.misplaced_users()
+    for user_id, current, target in moves:
+        print(f"user {user_id}: shard {current if current is not None else '?'} -> {target}")
+    if args.dry_run or not moves:
+        print(f"{len(moves)} user(s) to move")
+        return
+    limit = asyncio.Semaphore(args.parallel)
+
+    async def move(user_id, target):
+        async with limit:
+            return await TaskShardService.move_user(user_id, target)
+
+    copied = await asyncio.gather(*(move(user_id, target) for user_id, _, target in moves))
+    print(f"Moved {len(moves)} user(s), {sum(copied)} row(s) copied")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m app", description="Tasky maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_command = commands.add_parser(
+        "serve", help="Serve the API on pre-forked uvicorn workers; SIGHUP restarts them one at a time"
+    )
+    serve_command.add_argument("--host", default=settings.SERVE_HOST, help="Address to bind (default: SERVE_HOST)")
+    serve_command.add_argument("--port", type=int, default=settings.SERVE_PORT, help="Port to bind (default: SERVE_PORT)")
+    serve_command.add_argument(
+        "--workers",
+        type=int,
+        default=settings.SERVE_WORKERS,
+        help="Worker processes; 0 for one per available CPU (default: SERVE_WORKERS)",
+    )
+    serve_command.add_argument(
+        "--forwarded-allow-ips",
+        default=settings.SERVE_FORWARDED_ALLOW_IPS,
+        help="Comma-separated proxy addresses trusted for X-Forwarded-For, or * (default: SERVE_FORWARDED_ALLOW_IPS)",
+    )
+    serve_command.set_defaults(handler=serve_api)
+
+    migrate_command = commands.add_parser(
+        "migrate", help="Create the tables or upgrade them to this release's schema"
+    )
+    migrate_command.add_argument(
+        "--status", action="store_true", help="Only show each database's version and pending migrations"
+    )
+    migrate_command.set_defaults(handler=migrate_schema)
+
+    reconcile = commands.add_parser(
+        "reconcile-stats", help="Recompute task counters from the tasks table"
+    )
+    reconcile.add_argument("--user-id", type=int, help="Only reconcile this user")
+    reconcile.set_defaults(handler=reconcile_stats)
+
+    compact = commands.add_parser(
+        "compact-tombstones", help="Purge tombstones of tasks deleted longer ago than the retention"
+    )
+    compact.add_argument(
+        "--older-than-days",
+        type=float,
+        default=settings.TASK_TOMBSTONE_RETENTION_DAYS,
+        help="Retention in days (default: TASK_TOMBSTONE_RETENTION_DAYS)",
+    )
+    compact.add_argument("--user-id", type=int, help="Only compact this user's tombstones")
+    compact.add_argument("--batch-size", type=int, default=1000, help="Tombstones purged per transaction")
+    compact.set_defaults(handler=compact_tombstones)
+
+    archive = commands.add_parser(
+        "archive-tasks", help="Move completed tasks not written for a while into the archive"
+    )
+    archive.add_argument(
+        "--older-than-days",
+        type=float,
+        default=settings.TASK_ARCHIVE_AFTER_DAYS,
+        help="Age of the last write in days (default: TASK_ARCHIVE_AFTER_DAYS)",
+    )
+    archive.add_argument("--user-id", type=int, help="Only archive this user's tasks")
+    archive.add_argument(
+        "--batch-size", type=int, default=settings.TASK_ARCHIVE_BATCH_SIZE, help="Tasks moved per transaction"
+    )
+    archive.set_defaults(handler=archive_tasks)
+
+    pin = commands.add_parser(
+        "shard-pin", help="Place every user without a shard placement on one shard"
+    )
+    pin.add_argument("--shard", type=int, default=0, help="Index in TASK_SHARD_URLS (default: 0)")
+    pin.set_defaults(handler=shard_pin)
+
+    rebalance = commands.add_parser(
+        "shard-rebalance", help="Move users whose tasks are not on their hash ring shard, online"
+    )
+    rebalance.add_argument("--user-id", type=int, help="Only move this user")
+    rebalance.add_argument("--to", type=int, help="With --user-id, move to this shard instead of the ring's")
+    rebalance.add_argument("--parallel", type=int, default=4, help="Users moved at the same time")
+    rebalance.add_argument("--dry-run", action="store_true", help="Only list the moves")
+    rebalance.set_defaults(handler=shard_rebalance)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if asyncio.iscoroutinefunction(args.handler):
+        asyncio.run(args.handler(args))
+    else:
+        args.handler(args)
@@ -1,12 +1,87 @@
+from typing import Literal
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
 
     DATABASE_URL: str = "sqlite+aiosqlite:///./tasks.db"
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_POOL_PREWARM: int = 0
+    DB_MIGRATE_ON_STARTUP: bool = False
+    DATABASE_REPLICA_URLS: list[str] = []
+    DB_REPLICA_STRATEGY: Literal["round_robin", "least_connections"] = "round_robin"
+    DB_REPLICA_HEALTH_CHECK_SECONDS: float = 5
+    DB_READ_YOUR_WRITES_SECONDS: float = 5
+    TASK_SHARD_URLS: list[str] = []
+    TASK_SHARD_VIRTUAL_NODES: int = 64
+    TASK_SHARD_PLACEMENT_CACHE_SECONDS: float = 10
+    TASK_ID_BLOCK_SIZE: int = 1000
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 120
+    AUTH_CACHE_TTL_SECONDS: float = 60
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_STATELESS: bool = False
+    AUTH_REVOCATION_REFRESH_SECONDS: float = 30
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+    TASK_BATCH_MAX_SIZE: int = 1000
+    TASK_EXPORT_CHUNK_SIZE: int = 1000
+    TASK_TOMBSTONE_RETENTION_DAYS: int = 30
+    TASK_ARCHIVE_ENABLED: bool = False
+    TASK_ARCHIVE_AFTER_DAYS: float = 30
+    TASK_ARCHIVE_INTERVAL_SECONDS: float = 600
+    TASK_ARCHIVE_BATCH_SIZE: int = 1000
+    TASK_CACHE_ENABLED: bool = False
+    TASK_CACHE_BACKEND: Literal["memory", "local_kv"] = "memory"
+    TASK_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    TASK_CACHE_TTL_SECONDS: float = 300
+    TASK_CREATE_BATCHING: bool = False
+    TASK_CREATE_BATCH_WINDOW_MS: float = 5
+    TASK_CREATE_BATCH_MAX_SIZE: int = 100
+    TASK_CREATE_QUEUE_MAX_SIZE: int = 10000
+    TASK_EVENTS_BUFFER_SIZE: int = 100
+    TASK_EVENTS_HISTORY_SIZE: int = 256
+    TASK_EVENTS_HISTORY_USERS: int = 10000
+    TASK_EVENTS_KEEPALIVE_SECONDS: float = 15
+    IDEMPOTENCY_ENABLED: bool = True
+    IDEMPOTENCY_BACKEND: Literal["memory", "database"] = "database"
+    IDEMPOTENCY_TTL_SECONDS: float = 24 * 60 * 60
+    IDEMPOTENCY_MAX_BYTES: int = 64 * 1024 * 1024
+    IDEMPOTENCY_WAIT_SECONDS: float = 10
+    IDEMPOTENCY_SWEEP_INTERVAL_SECONDS: float = 300
+    RATE_LIMIT_ENABLED: bool = False
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    RATE_LIMIT_API_KEY_RATE: float = 20
+    RATE_LIMIT_API_KEY_BURST: int = 40
+    RATE_LIMIT_IP_RATE: float = 10
+    RATE_LIMIT_IP_BURST: int = 20
+    RATE_LIMIT_AUTH_RATE: float = 0.2
+    RATE_LIMIT_AUTH_BURST: int = 5
+    LOAD_SHED_MAX_IN_FLIGHT: int = 200
+    LOAD_SHED_POOL_WAIT_SECONDS: float = 1.0
+    METRICS_ENABLED: bool = True
+    OPS_TOKEN: str | None = None
+    SLOW_QUERY_THRESHOLD_MS: float = 200
+    SERVE_HOST: str = "127.0.0.1"
+    SERVE_PORT: int = 8000
+    SERVE_WORKERS: int = 0
+    SERVE_BACKLOG: int = 2048
+    SERVE_KEEP_ALIVE_SECONDS: int = 65
+    SERVE_GRACEFUL_TIMEOUT_SECONDS: float = 30
+    SERVE_READY_TIMEOUT_SECONDS: float = 60
+    SERVE_ACCESS_LOG: bool = False
+    SERVE_FORWARDED_ALLOW_IPS: str = "127.0.0.1"
+    HEALTH_CHECK_TIMEOUT_SECONDS: float = 2
 
     class Config:
         env_file = ".env"
@@ -1,17 +1,310 @@
+import asyncio
+import itertools
+import logging
+import time
+from contextlib import AsyncExitStack
+from fastapi import Request
+from jose import JWTError, jwt
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.config import settings
+from app.utils.cache import TTLCache
+from app.utils.metrics import db_pool_wait, db_query_duration, db_slow_queries, request_timings
 
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
+slow_query_logger = logging.getLogger("app.db.slow_query")
+replica_logger = logging.getLogger("app.db.replicas")
+RECENT_WAIT_HALF_LIFE_SECONDS = 5.0
 
-engine = create_async_engine(SQLALCHEMY_DATABASE_URL, echo=False, future=True)
-AsyncSessionLocal = sessionmaker(
-    bind=engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autoflush=False,
-    autocommit=False,
+
+class PoolMonitor:
+    """Tracks how long requests wait to check a connection out of the pool."""
+
+    def __init__(self):
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+        self._recent_wait = 0.0
+        self._recent_at = time.monotonic()
+
+    def record_wait(self, seconds: float):
+        self.waits += 1
+        self.wait_seconds += seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+        # Exponentially weighted so load shedding can react to current pressure
+        self._recent_wait = self.recent_wait_seconds + 0.2 * (seconds - self.recent_wait_seconds)
+        self._recent_at = time.monotonic()
+
+    @property
+    def recent_wait_seconds(self) -> float:
+        # Halves every few seconds without checkouts, so shedding that stops
+        # traffic to the pool also lets the signal recover.
+        idle = time.monotonic() - self._recent_at
+        return self._recent_wait * 0.5 ** (idle / RECENT_WAIT_HALF_LIFE_SECONDS)
+
+    def stats(self, pool):
+        stats = {
+            "pool": type(pool).__name__,
+            "waits": self.waits,
+            "timeouts": self.timeouts,
+            "avg_wait_seconds": self.wait_seconds / self.waits if self.waits else 0.0,
+            "max_wait_seconds": self.max_wait_seconds,
+            "recent_wait_seconds": self.recent_wait_seconds,
+        }
+        if isinstance(pool, AsyncAdaptedQueuePool):
+            stats.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                overflow=max(pool.overflow(), 0),
+                max_overflow=pool._max_overflow,
+            )
+        return stats
+
+
+pool_monitor = PoolMonitor()
+
+
+class MonitoredQueuePool(AsyncAdaptedQueuePool):
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            pool_monitor.timeouts += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            pool_monitor.record_wait(elapsed)
+            db_pool_wait.observe(elapsed)
+            timings = request_timings.get()
+            if timings is not None:
+                timings.pool_wait_seconds += elapsed
+
+
+def engine_options(database_url: str) -> dict:
+    """Build create_async_engine keyword arguments from Settings."""
+    url = make_url(database_url)
+    options = {"echo": False, "future": True, "pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        # In-memory SQLite uses a single static connection; there is no pool to size
+        return options
+    options.update(
+        poolclass=MonitoredQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    if url.get_driver_name() == "asyncpg":
+        options["connect_args"] = {
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE
+        }
+    return options
+
+
+def configure_sqlite(sync_engine):
+    """Apply journal, sync and busy-timeout pragmas to every new SQLite connection."""
+
+    @event.listens_for(sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.close()
+
+
+def instrument_queries(sync_engine):
+    """Time every statement for metrics, Server-Timing and the slow-query log."""
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        db_query_duration.observe(elapsed)
+        timings = request_timings.get()
+        if timings is not None:
+            timings.db_queries += 1
+            timings.db_seconds += elapsed
+        threshold_ms = settings.SLOW_QUERY_THRESHOLD_MS
+        if threshold_ms > 0 and elapsed * 1000 >= threshold_ms:
+            db_slow_queries.inc()
+            # Parameters are left out; they can carry password hashes and API keys
+            slow_query_logger.warning(
+                "slow query (%.1f ms, executemany=%s): %s",
+                elapsed * 1000,
+                executemany,
+                " ".join(statement.split()),
+            )
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _discard_query_timer(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_start"):
+            connection.info["query_start"].pop()
+
+
+def build_engine(database_url: str):
+    """Create an instrumented async engine for a primary or replica URL."""
+    new_engine = create_async_engine(database_url, **engine_options(database_url))
+    if new_engine.dialect.name == "sqlite":
+        configure_sqlite(new_engine.sync_engine)
+    instrument_queries(new_engine.sync_engine)
+    return new_engine
+
+
+def build_sessionmaker(bind):
+    return sessionmaker(
+        bind=bind,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autoflush=False,
+        autocommit=False,
+    )
+
+
+async def prewarm_pool(target, connections: int) -> int:
+    """Open up to pool_size connections to target up front; returns how many."""
+    if not isinstance(target.pool, AsyncAdaptedQueuePool):
+        return 0
+    connections = min(connections, target.pool.size())
+    # Held together so each checkout opens a new connection; closing returns them to the pool
+    async with AsyncExitStack() as stack:
+        for _ in range(connections):
+            await stack.enter_async_context(target.connect())
+    return connections
+
+
+engine = build_engine(SQLALCHEMY_DATABASE_URL)
+AsyncSessionLocal = build_sessionmaker(engine)
+
+
+class Replica:
+    def __init__(self, index: int, database_url: str):
+        self.index = index
+        self.engine = build_engine(database_url)
+        self.sessionmaker = build_sessionmaker(self.engine)
+        self.healthy = True
+        self.in_use = 0
+        self.reads = 0
+        self.failures = 0
+
+
+class ReplicaRouter:
+    """Routes read-only sessions to healthy replicas.
+
+    Replicas are picked round-robin or by fewest sessions in use. A replica
+    is taken out of rotation when its health check or a read on it fails
+    with a connection error, and put back by the next passing check. Users
+    who wrote within ``sticky_seconds`` read from the primary so they always
+    see their own writes; with no healthy replica every read goes to the
+    primary.
+    """
+
+    def __init__(self, urls, strategy: str, sticky_seconds: float, check_seconds: float):
+        self.replicas = [Replica(index, url) for index, url in enumerate(urls)]
+        self.strategy = strategy
+        self.check_seconds = check_seconds
+        # Reads served by the primary, including sticky ones and fallbacks
+        self.primary_reads = 0
+        self.sticky_reads = 0
+        self._round_robin = itertools.count()
+        self._recent_writers = TTLCache(max_entries=100_000, ttl_seconds=sticky_seconds)
+        self._health_task = None
+
+    def mark_write(self, user_id: int):
+        """Pin the user's reads to the primary for the stickiness window."""
+        if self.replicas:
+            self._recent_writers.set(user_id, True)
+
+    def choose(self, user_id: int | None) -> Replica | None:
+        """Replica to read from, or None for the primary."""
+        if not self.replicas:
+            return None
+        if user_id is not None and self._recent_writers.get(user_id):
+            self.sticky_reads += 1
+            return None
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        if self.strategy == "least_connections":
+            return min(healthy, key=lambda replica: replica.in_use)
+        return healthy[next(self._round_robin) % len(healthy)]
+
+    def mark_failed(self, replica: Replica, exc: Exception):
+        replica.failures += 1
+        if replica.healthy:
+            replica_logger.warning("replica %d marked unhealthy: %s", replica.index, exc)
+        replica.healthy = False
+
+    async def check_health(self):
+        for replica in self.replicas:
+            try:
+                async with replica.engine.connect() as conn:
+                    await asyncio.wait_for(conn.execute(text("SELECT 1")), self.check_seconds)
+            except Exception as exc:
+                self.mark_failed(replica, exc)
+            else:
+                if not replica.healthy:
+                    replica_logger.info("replica %d is healthy again", replica.index)
+                replica.healthy = True
+
+    async def _health_loop(self):
+        while True:
+            await self.check_health()
+            await asyncio.sleep(self.check_seconds)
+
+    def start(self):
+        if self.replicas and self._health_task is None:
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    async def stop(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    def stats(self):
+        return {
+            "strategy": self.strategy,
+            "primary_reads": self.primary_reads,
+            "sticky_reads": self.sticky_reads,
+            "sticky_users": self._recent_writers.stats()["entries"],
+            "replicas": [
+                {
+                    "index": replica.index,
+                    "url": replica.engine.url.render_as_string(hide_password=True),
+                    "healthy": replica.healthy,
+                    "in_use": replica.in_use,
+                    "reads": replica.reads,
+                    "failures": replica.failures,
+                }
+                for replica in self.replicas
+            ],
+        }
+
+
+replica_router = ReplicaRouter(
+    settings.DATABASE_REPLICA_URLS,
+    strategy=settings.DB_REPLICA_STRATEGY,
+    sticky_seconds=settings.DB_READ_YOUR_WRITES_SECONDS,
+    check_seconds=settings.DB_REPLICA_HEALTH_CHECK_SECONDS,
 )
 
 Base = declarative_base()
@@ -23,3 +316,44 @@ async def get_db():
             yield session
         finally:
             await session.close()
+
+
+def _user_id_hint(request: Request) -> int | None:
+    # Unverified claims are only used to route the read; get_current_user
+    # still verifies the token before anything is returned.
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return jwt.get_unverified_claims(token).get("user_id")
+    except JWTError:
+        return None
+
+
+async def get_read_db(request: Request):
+    """Session for read-only work, served by a replica when one is available."""
+    replica = replica_router.choose(_user_id_hint(request))
+    if replica is not None:
+        replica.in_use += 1
+        try:
+            async with replica.sessionmaker() as session:
+                try:
+                    # Connect up front so an unreachable replica falls back to the primary
+                    await session.connection()
+                except DBAPIError as exc:
+                    replica_router.mark_failed(replica, exc)
+                else:
+                    replica.reads += 1
+                    try:
+                        yield session
+                    except (OperationalError, InterfaceError) as exc:
+                        if exc.connection_invalidated:
+                            replica_router.mark_failed(replica, exc)
+                        raise
+                    return
+        finally:
+            replica.in_use -= 1
+    replica_router.primary_reads += 1
+    async with AsyncSessionLocal() as session:
+        yield session
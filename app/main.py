@@ -1,8 +1,21 @@
+import asyncio
+import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine
-from app.models import user, task
-from app.routers import auth, task as task_router
+from app.config import settings
+from app.database import prewarm_pool, replica_router
+from app.middleware.idempotency import IdempotencyMiddleware, idempotency_sweeper
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.rate_limit import RateLimitMiddleware
+from app.middleware.startup import FirstRequestMiddleware
+from app.migrations import check_schema
+from app.routers import auth, health, metrics, ops, task as task_router
+from app.services.task_archive_service import task_archiver
+from app.services.task_write_queue import task_create_batcher
+from app.sharding import all_engines, shard_router
+from app.utils.startup import startup_report
+
+startup_logger = logging.getLogger("app.startup")
 
 
 app = FastAPI()
@@ -13,6 +26,15 @@ origins = [
     "http://127.0.0.1:8000",
     "https://tasky-sable.vercel.app"
 ]
+if settings.IDEMPOTENCY_ENABLED:
+    # Innermost, so retries are still rate limited and measured
+    app.add_middleware(IdempotencyMiddleware)
+if settings.RATE_LIMIT_ENABLED:
+    # Added before CORS so rejections still carry CORS headers
+    app.add_middleware(RateLimitMiddleware)
+if settings.METRICS_ENABLED:
+    # Outside the rate limiter so rejected requests are measured too
+    app.add_middleware(MetricsMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -20,13 +42,35 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Outermost, so the first request is timed from end to end
+app.add_middleware(FirstRequestMiddleware)
 
 
 @app.on_event("startup")
 async def startup():
-    async with engine.begin() as conn:
-        await conn.run_sync(user.Base.metadata.create_all)
-        await conn.run_sync(task.Base.metadata.create_all)
+    # Tables are created by `python -m app migrate`; boot only reads their version
+    with startup_report.phase("schema_check"):
+        await check_schema()
+    if settings.DB_POOL_PREWARM:
+        with startup_report.phase("pool_prewarm"):
+            await asyncio.gather(
+                *(prewarm_pool(target, settings.DB_POOL_PREWARM) for target in all_engines())
+            )
+    replica_router.start()
+    task_archiver.start()
+    idempotency_sweeper.start()
+    startup_report.mark_ready()
+    startup_logger.info("worker %s", startup_report.summary())
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    # Commit creates still waiting in the write queue before exiting
+    await task_create_batcher.stop()
+    await task_archiver.stop()
+    await idempotency_sweeper.stop()
+    await replica_router.stop()
+    await shard_router.stop()
 
 
 @app.get("/")
@@ -36,3 +80,8 @@ async def read_root():
 
 app.include_router(auth.router)
 app.include_router(task_router.router)
+if settings.OPS_TOKEN:
+    app.include_router(ops.router)
+app.include_router(health.router)
+if settings.METRICS_ENABLED and settings.OPS_TOKEN:
+    app.include_router(metrics.router)
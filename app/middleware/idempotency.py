@@ -0,0 +1,248 @@
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import time
+from app.config import settings
+from app.utils.auth import authenticate
+from app.utils.cache import SingleFlight
+from app.utils.idempotency import (
+    DatabaseIdempotencyStore,
+    IdempotencyStore,
+    MemoryIdempotencyStore,
+    StoredResponse,
+)
+from app.utils.metrics import registry
+
+IDEMPOTENT_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+IDEMPOTENT_PATH_PREFIX = "/tasks"
+MAX_KEY_LENGTH = 255
+# Outcomes that depend on when the request ran rather than on what it asked for
+TRANSIENT_STATUSES = {401, 403, 408, 409, 425, 429}
+# Longer than any write takes; frees the key if a worker dies mid-request
+CLAIM_SECONDS = 60
+PENDING_POLL_SECONDS = 0.05
+OUTCOMES = ("executed", "replayed", "coalesced", "mismatch", "in_progress")
+
+idempotency_logger = logging.getLogger("app.idempotency")
+
+idempotency_requests = registry.counter(
+    "idempotency_requests_total", "Task writes sent with an Idempotency-Key by outcome", ("outcome",)
+)
+
+
+def build_store() -> IdempotencyStore:
+    if settings.IDEMPOTENCY_BACKEND == "database":
+        return DatabaseIdempotencyStore()
+    return MemoryIdempotencyStore(settings.IDEMPOTENCY_MAX_BYTES)
+
+
+idempotency_store = build_store()
+idempotency_flights = SingleFlight()
+
+
+def _fingerprint(scope, body: bytes) -> str:
+    digest = hashlib.sha256()
+    for part in (scope["method"].encode(), scope["path"].encode(), scope["query_string"], body):
+        digest.update(hashlib.sha256(part).digest())
+    return digest.hexdigest()
+
+
+async def _read_body(receive):
+    """The full request body, and a receive callable that hands it to the app again."""
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    body = b"".join(chunks)
+    delivered = False
+
+    async def replay():
+        nonlocal delivered
+        if delivered:
+            return await receive()
+        delivered = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return body, replay
+
+
+class IdempotencyMiddleware:
+    """Runs a task write at most once per Idempotency-Key.
+
+    Keys are scoped to the authenticated user. The first request with a
+    key runs and its response is stored for IDEMPOTENCY_TTL_SECONDS;
+    retries with the same key and request get that response back, marked
+    ``Idempotent-Replayed: true``, without touching the task tables. The
+    same key with a different request is rejected with 422. Duplicates
+    arriving while the first request runs wait for its response, in this
+    process through single-flight and across workers by polling the
+    database store. Server errors, auth failures and rate limits are not
+    stored, so retrying those runs the write.
+    """
+
+    def __init__(self, app, store: IdempotencyStore | None = None):
+        self.app = app
+        self.store = store or idempotency_store
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in IDEMPOTENT_METHODS
+            or not scope["path"].startswith(IDEMPOTENT_PATH_PREFIX)
+        ):
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        key = headers.get(b"idempotency-key")
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        key = key.decode("latin-1")
+        if not 0 < len(key) <= MAX_KEY_LENGTH:
+            await self._reject(send, 400, f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters")
+            return
+        user = await authenticate(
+            headers.get(b"authorization", b"").decode("latin-1"),
+            headers.get(b"x-api-key", b"").decode("latin-1"),
+        )
+        if user is None:
+            # The route rejects the credentials itself
+            await self.app(scope, receive, send)
+            return
+
+        body, receive = await _read_body(receive)
+        fingerprint = _fingerprint(scope, body)
+        leader = False
+
+        async def execute():
+            nonlocal leader
+            leader = True
+            return await self._execute(scope, receive, user.id, key, fingerprint)
+
+        response, outcome = await idempotency_flights.run((user.id, key), execute)
+        if not leader:
+            outcome = "coalesced"
+        if response.fingerprint != fingerprint:
+            outcome = "mismatch"
+        idempotency_requests.inc(outcome)
+
+        if outcome == "mismatch":
+            await self._reject(send, 422, "Idempotency-Key was already used with a different request")
+        elif response.status_code is None:
+            await self._reject(
+                send, 409, "A request with this Idempotency-Key is still in progress", retry_after=1
+            )
+        else:
+            await self._send(send, response, replayed=outcome != "executed")
+
+    async def _execute(self, scope, receive, user_id: int, key: str, fingerprint: str):
+        """(response, outcome) for the key, running the app only if no one else has."""
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        while True:
+            stored = await self.store.get(user_id, key)
+            if stored is None:
+                if await self.store.claim(user_id, key, fingerprint, CLAIM_SECONDS):
+                    return await self._run(scope, receive, user_id, key, fingerprint), "executed"
+                # Claimed by another worker in the meantime
+                continue
+            if stored.fingerprint != fingerprint or stored.status_code is not None:
+                return stored, "replayed"
+            if time.monotonic() >= deadline:
+                return stored, "in_progress"
+            await asyncio.sleep(PENDING_POLL_SECONDS)
+
+    async def _run(self, scope, receive, user_id: int, key: str, fingerprint: str) -> StoredResponse:
+        response = StoredResponse(fingerprint, headers=[])
+        chunks = []
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                response.status_code = message["status"]
+                response.headers = [
+                    [name.decode("latin-1"), value.decode("latin-1")]
+                    for name, value in message.get("headers", [])
+                ]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        try:
+            await self.app(scope, receive, capture)
+        except BaseException:
+            await self.store.release(user_id, key)
+            raise
+        response.body = b"".join(chunks)
+        if response.status_code < 500 and response.status_code not in TRANSIENT_STATUSES:
+            await self.store.complete(user_id, key, response, settings.IDEMPOTENCY_TTL_SECONDS)
+        else:
+            await self.store.release(user_id, key)
+        return response
+
+    @staticmethod
+    async def _send(send, response: StoredResponse, replayed: bool):
+        headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in response.headers]
+        if replayed:
+            headers.append((b"idempotent-replayed", b"true"))
+        await send({"type": "http.response.start", "status": response.status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": response.body})
+
+    @staticmethod
+    async def _reject(send, status_code: int, detail: str, retry_after: float | None = None):
+        body = json.dumps({"detail": detail}).encode()
+        headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ]
+        if retry_after is not None:
+            headers.append((b"retry-after", str(max(1, math.ceil(retry_after))).encode()))
+        await send({"type": "http.response.start", "status": status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+class IdempotencySweeper:
+    """Deletes expired idempotency keys every interval_seconds."""
+
+    def __init__(self, store: IdempotencyStore, interval_seconds: float):
+        self.store = store
+        self.interval_seconds = interval_seconds
+        self.swept = 0
+        self._task = None
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                self.swept += await self.store.sweep()
+            except Exception:
+                idempotency_logger.exception("idempotency key sweep failed")
+
+    def start(self):
+        if settings.IDEMPOTENCY_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self):
+        return {
+            "enabled": settings.IDEMPOTENCY_ENABLED,
+            "backend": type(self.store).__name__,
+            "ttl_seconds": settings.IDEMPOTENCY_TTL_SECONDS,
+            "requests": {outcome: idempotency_requests.value(outcome) for outcome in OUTCOMES},
+            "swept": self.swept,
+            **self.store.stats(),
+        }
+
+
+idempotency_sweeper = IdempotencySweeper(idempotency_store, settings.IDEMPOTENCY_SWEEP_INTERVAL_SECONDS)
@@ -0,0 +1,69 @@
+import time
+from app.utils.metrics import (
+    RequestTimings,
+    request_timings,
+    http_request_duration,
+    http_request_db_queries,
+    http_request_db_duration,
+    http_request_auth_duration,
+)
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:.2f}"
+
+
+class MetricsMiddleware:
+    """Records per-route latency and per-request DB and auth time.
+
+    The same numbers are returned to the client in a Server-Timing header
+    so a single slow response can be broken down from the browser or curl.
+    Routes are labelled by their path template, never the raw path, to keep
+    label cardinality bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = request_timings.set(timings)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", self._server_timing(timings, start).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_timings.reset(token)
+            route = scope.get("route")
+            labels = (scope["method"], route.path if route is not None else "unmatched")
+            http_request_duration.observe(time.perf_counter() - start, *labels, status_code)
+            http_request_db_queries.observe(timings.db_queries, *labels)
+            http_request_db_duration.observe(timings.db_seconds, *labels)
+            http_request_auth_duration.observe(timings.auth_seconds, *labels)
+
+    @staticmethod
+    def _server_timing(timings: RequestTimings, start: float) -> str:
+        entries = [
+            f"app;dur={_ms(time.perf_counter() - start)}",
+            f'db;dur={_ms(timings.db_seconds)};desc="{timings.db_queries} queries"',
+            f"auth;dur={_ms(timings.auth_seconds)}",
+        ]
+        if timings.pool_wait_seconds:
+            entries.append(f"pool;dur={_ms(timings.pool_wait_seconds)}")
+        if timings.password_hash_seconds:
+            entries.append(f"hash;dur={_ms(timings.password_hash_seconds)}")
+        return ", ".join(entries)
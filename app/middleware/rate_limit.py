@@ -0,0 +1,157 @@
+import hashlib
+import json
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from app.config import settings
+from app.database import pool_monitor
+from app.utils.auth import token_vouches_for_api_key
+
+AUTH_PATHS = {"/token", "/signup"}
+EXEMPT_METHODS = {"OPTIONS"}
+# Load balancer probes; shedding them would take every busy worker out of rotation
+EXEMPT_PATHS = {"/health/live", "/health/ready"}
+# Open for as long as the client listens; counting them would shed everything else
+LONG_LIVED_PATHS = {"/tasks/events"}
+
+
+class TokenBucketStore(ABC):
+    """Storage for token buckets.
+
+    Implement this against a shared store (e.g. an atomic script on a
+    key-value server) to enforce limits across workers and instances.
+    """
+
+    @abstractmethod
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        """Consume one token from key's bucket.
+
+        Returns 0 when the request is allowed, otherwise the number of
+        seconds until a token becomes available.
+        """
+
+
+class MemoryTokenBucketStore(TokenBucketStore):
+    """Per-process token buckets with LRU eviction of idle keys."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.pop(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated_at) * rate)
+        if tokens >= 1:
+            tokens -= 1
+            retry_after = 0.0
+        else:
+            retry_after = (1 - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+
+class RateLimitCounters:
+    def __init__(self):
+        self.in_flight = 0
+        self.limited = 0
+        self.shed = 0
+
+    def stats(self):
+        return {
+            "in_flight": self.in_flight,
+            "rate_limited": self.limited,
+            "shed": self.shed,
+        }
+
+
+rate_limit_counters = RateLimitCounters()
+
+
+class RateLimitMiddleware:
+    """Token-bucket rate limiting plus concurrency-based load shedding.
+
+    Requests carrying an X-API-Key together with a valid bearer token
+    issued for that key are limited per key, others per client IP, so
+    invented keys cannot buy a fresh bucket. /token and /signup use a stricter per-IP bucket. When too many
+    requests are in flight, or pool checkouts are waiting too long, new
+    requests are shed with 503 before they reach the database.
+    """
+
+    def __init__(self, app, store: TokenBucketStore | None = None):
+        self.app = app
+        self.store = store or MemoryTokenBucketStore(settings.RATE_LIMIT_MAX_KEYS)
+        self.counters = rate_limit_counters
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] in EXEMPT_METHODS
+            or scope["path"] in EXEMPT_PATHS
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        if (
+            self.counters.in_flight >= settings.LOAD_SHED_MAX_IN_FLIGHT
+            or pool_monitor.recent_wait_seconds > settings.LOAD_SHED_POOL_WAIT_SECONDS
+        ):
+            self.counters.shed += 1
+            await self._reject(send, 503, "Server is overloaded, retry later", 1)
+            return
+
+        retry_after = await self._check_buckets(scope)
+        if retry_after:
+            self.counters.limited += 1
+            await self._reject(send, 429, "Rate limit exceeded", retry_after)
+            return
+
+        if scope["path"] in LONG_LIVED_PATHS:
+            await self.app(scope, receive, send)
+            return
+        self.counters.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.counters.in_flight -= 1
+
+    async def _check_buckets(self, scope) -> float:
+        client_ip = scope["client"][0] if scope.get("client") else "unknown"
+        if scope["path"] in AUTH_PATHS:
+            return await self.store.take(
+                f"auth:{client_ip}",
+                settings.RATE_LIMIT_AUTH_RATE,
+                settings.RATE_LIMIT_AUTH_BURST,
+            )
+        headers = dict(scope["headers"])
+        api_key = headers.get(b"x-api-key")
+        if api_key and token_vouches_for_api_key(
+            headers.get(b"authorization", b"").decode("latin-1"), api_key.decode("latin-1")
+        ):
+            return await self.store.take(
+                f"key:{hashlib.sha256(api_key).hexdigest()}",
+                settings.RATE_LIMIT_API_KEY_RATE,
+                settings.RATE_LIMIT_API_KEY_BURST,
+            )
+        return await self.store.take(
+            f"ip:{client_ip}", settings.RATE_LIMIT_IP_RATE, settings.RATE_LIMIT_IP_BURST
+        )
+
+    @staticmethod
+    async def _reject(send, status_code: int, detail: str, retry_after: float):
+        body = json.dumps({"detail": detail}).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status_code,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
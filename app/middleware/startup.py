@@ -0,0 +1,33 @@
+import time
+from app.utils.startup import startup_report
+
+
+class FirstRequestMiddleware:
+    """Times the first HTTP request this worker serves for the startup report.
+
+    The first request pays for what startup left lazy, such as opening
+    database connections and filling caches.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or startup_report.first_request is not None:
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            startup_report.record_first_request(
+                scope["method"], scope["path"], status_code, time.perf_counter() - start
+            )
@@ -0,0 +1,226 @@
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+from sqlalchemy import Column, Integer, MetaData, Table, inspect, insert, select, text, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from sqlalchemy.schema import CreateTable
+from app.config import settings
+from app.database import Base, engine
+from app.models import user, task, shard, idempotency  # noqa: F401  (register all tables)
+from app.models.task import POSTGRESQL_SEARCH_DDL, SQLITE_SEARCH_DDL, shard_metadata
+from app.services.task_collection_service import TaskCollectionService
+from app.sharding import shard_router
+
+migration_logger = logging.getLogger("app.migrations")
+
+# One row holding the version of the schema in this database
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("version", Integer, nullable=False),
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    upgrade: Callable[[AsyncConnection, MetaData], Awaitable[None]]
+
+
+MIGRATIONS: list[Migration] = []
+
+
+def migration(version: int, description: str):
+    """Register the decorated coroutine as the upgrade to version.
+
+    Upgrades run in version order, in the transaction that records the new
+    version, and are given the tables kept in the database being migrated.
+    """
+
+    def register(upgrade):
+        if version != len(MIGRATIONS) + 1:
+            raise ValueError(f"Migration {version} registered out of order")
+        MIGRATIONS.append(Migration(version, description, upgrade))
+        return upgrade
+
+    return register
+
+
+# Migrations 1-5 bring a database created by create_all at any earlier
+# release to the current schema, so each checks what is already there.
+# Later migrations can assume the schema of the version before them.
+
+# Columns added to tables after they were first created, with the value
+# existing rows get
+ADDED_COLUMNS = [
+    ("users", "token_version", "0"),
+    ("tasks", "updated_at", None),
+    ("tasks", "version", "0"),
+    ("tasks", "deleted_at", None),
+    ("task_collections", "pending_count", "0"),
+    ("task_collections", "completed_count", "0"),
+    ("task_collections", "compacted_version", "0"),
+]
+
+
+@migration(1, "Create tables added since the first release")
+async def create_missing_tables(conn: AsyncConnection, metadata: MetaData):
+    await conn.run_sync(metadata.create_all)
+
+
+@migration(2, "Add columns added to existing tables since the first release")
+async def add_missing_columns(conn: AsyncConnection, metadata: MetaData):
+    def upgrade(sync_connection):
+        inspector = inspect(sync_connection)
+        for table_name, column_name, default in ADDED_COLUMNS:
+            if table_name not in metadata.tables:
+                continue
+            if column_name in {column["name"] for column in inspector.get_columns(table_name)}:
+                continue
+            column_type = metadata.tables[table_name].c[column_name].type.compile(sync_connection.dialect)
+            ddl = f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}"
+            if default is not None:
+                ddl += f" NOT NULL DEFAULT {default}"
+            sync_connection.exec_driver_sql(ddl)
+
+    await conn.run_sync(upgrade)
+
+
+@migration(3, "Create indexes missing from existing tables")
+async def create_missing_indexes(conn: AsyncConnection, metadata: MetaData):
+    def upgrade(sync_connection):
+        for table in metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(sync_connection, checkfirst=True)
+
+    await conn.run_sync(upgrade)
+
+
+@migration(4, "Index task titles and descriptions for full-text search")
+async def create_search_index(conn: AsyncConnection, metadata: MetaData):
+    def upgrade(sync_connection):
+        inspector = inspect(sync_connection)
+        dialect = sync_connection.dialect.name
+        if dialect == "sqlite" and not inspector.has_table("tasks_fts"):
+            for statement in SQLITE_SEARCH_DDL:
+                sync_connection.exec_driver_sql(statement)
+            # Index the tasks written before the triggers existed
+            sync_connection.exec_driver_sql("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')")
+        elif dialect == "postgresql" and "search_vector" not in {
+            column["name"] for column in inspector.get_columns("tasks")
+        }:
+            for statement in POSTGRESQL_SEARCH_DDL:
+                sync_connection.exec_driver_sql(statement)
+
+    await conn.run_sync(upgrade)
+
+
+@migration(5, "Recompute task counters and daily statistics")
+async def recompute_task_counters(conn: AsyncConnection, metadata: MetaData):
+    # Counters of tasks written before they were maintained start out wrong
+    async with AsyncSession(bind=conn, join_transaction_mode="create_savepoint") as db:
+        await TaskCollectionService.reconcile(db)
+
+
+LATEST_VERSION = MIGRATIONS[-1].version
+shard_tables = shard_metadata()
+
+
+def databases() -> list[tuple]:
+    """(name, engine, metadata) of every database and the tables the app keeps in it."""
+    targets = [("primary", engine, Base.metadata)]
+    for task_shard in shard_router.shards:
+        if task_shard.engine is not engine:
+            targets.append((f"shard {task_shard.index}", task_shard.engine, shard_tables))
+    return targets
+
+
+async def current_version(target) -> int:
+    """Schema version recorded in the database; 0 if it was never migrated."""
+    async with target.connect() as conn:
+        try:
+            return await conn.scalar(select(schema_version.c.version)) or 0
+        except DBAPIError:
+            await conn.rollback()
+            if await conn.run_sync(lambda sync_connection: inspect(sync_connection).has_table("schema_version")):
+                raise
+            return 0
+
+
+async def _lock(conn: AsyncConnection):
+    """Make concurrent migrations of the same database wait for this one to commit."""
+    if conn.dialect.name == "postgresql":
+        await conn.execute(text("LOCK TABLE schema_version IN EXCLUSIVE MODE"))
+    else:
+        # Any write takes SQLite's database lock for the rest of the transaction
+        await conn.execute(update(schema_version).values(version=schema_version.c.version))
+
+
+async def migrate_database(target, metadata: MetaData) -> dict:
+    """Bring one database to LATEST_VERSION in a single transaction.
+
+    A database holding none of the app's tables is created at the latest
+    schema directly rather than by replaying every migration.
+    """
+    async with target.connect() as conn:
+        await conn.execute(CreateTable(schema_version, if_not_exists=True))
+        await conn.commit()
+    async with target.begin() as conn:
+        await _lock(conn)
+        version = await conn.scalar(select(schema_version.c.version))
+        result = {"from_version": version or 0, "to_version": version or 0, "created": False, "applied": []}
+        if version is None:
+            existing = await conn.run_sync(lambda sync_connection: inspect(sync_connection).get_table_names())
+            await conn.execute(insert(schema_version).values(id=1, version=0))
+            if not set(existing) & set(metadata.tables):
+                await conn.run_sync(metadata.create_all)
+                await conn.execute(update(schema_version).values(version=LATEST_VERSION))
+                return {**result, "to_version": LATEST_VERSION, "created": True}
+            version = 0
+        for pending in MIGRATIONS[version:]:
+            migration_logger.info("applying migration %d: %s", pending.version, pending.description)
+            await pending.upgrade(conn, metadata)
+            result["applied"].append(f"{pending.version}: {pending.description}")
+        if version < LATEST_VERSION:
+            await conn.execute(update(schema_version).values(version=LATEST_VERSION))
+            result["to_version"] = LATEST_VERSION
+    return result
+
+
+async def migrate() -> list[dict]:
+    """Migrate every database; returns what was done to each."""
+    return [
+        {"database": name, **await migrate_database(target, metadata)}
+        for name, target, metadata in databases()
+    ]
+
+
+async def check_schema() -> list[dict]:
+    """Read the schema version of every database at startup.
+
+    Databases behind LATEST_VERSION are migrated when DB_MIGRATE_ON_STARTUP
+    is set; otherwise the app refuses to start rather than run against
+    tables it does not match.
+    """
+    versions = []
+    behind = []
+    for name, target, metadata in databases():
+        version = await current_version(target)
+        if version < LATEST_VERSION and settings.DB_MIGRATE_ON_STARTUP:
+            version = (await migrate_database(target, metadata))["to_version"]
+        if version < LATEST_VERSION:
+            behind.append(f"{name} is at version {version}")
+        elif version > LATEST_VERSION:
+            migration_logger.warning(
+                "%s is at schema version %d, newer than this release (%d)", name, version, LATEST_VERSION
+            )
+        versions.append({"database": name, "version": version})
+    if behind:
+        raise RuntimeError(
+            f"Database schema is older than this release (version {LATEST_VERSION}): {', '.join(behind)}."
+            " Run `python -m app migrate` first, or set DB_MIGRATE_ON_STARTUP=true."
+        )
+    return versions
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, ForeignKey, Integer, LargeBinary, String, Text
+from ..database import Base
+from .task import Timestamp
+
+
+class IdempotencyRecord(Base):
+    """Stored response of a write sent with an Idempotency-Key header."""
+
+    __tablename__ = "idempotency_keys"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    key = Column(String, primary_key=True)
+    # Hash of the method, path, query and body the key was first used with
+    fingerprint = Column(String, nullable=False)
+    # Null while the first request with the key is still running
+    status_code = Column(Integer, nullable=True)
+    headers = Column(Text, nullable=True)
+    body = Column(LargeBinary, nullable=True)
+    expires_at = Column(Timestamp, nullable=False, index=True)
@@ -0,0 +1,26 @@
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, String
+from ..database import Base
+
+
+class UserShard(Base):
+    """Shard holding a user's tasks, recorded on first access.
+
+    Kept on the primary database. Stored rather than recomputed so adding
+    a shard never moves a user's tasks until they are copied over.
+    """
+
+    __tablename__ = "user_shards"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    shard = Column(Integer, nullable=False)
+    # Set while the user's tasks are copied to another shard; writes are refused
+    moving = Column(Boolean, nullable=False, default=False)
+
+
+class IdBlock(Base):
+    """Next unallocated id of a sharded table, handed out in blocks."""
+
+    __tablename__ = "id_blocks"
+
+    name = Column(String, primary_key=True)
+    next_id = Column(Integer, nullable=False)
@@ -1,10 +1,23 @@
-from sqlalchemy import Column, Integer, String, Enum, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Enum, ForeignKey, DateTime, Date, Index, DDL, MetaData, event, text
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
 from ..database import Base
 
 
+# SQLite stores timestamps as text. Rows written by CURRENT_TIMESTAMP have no
+# fractional part, so bound parameters must use the same format for keyset
+# comparisons on created_at to be exact.
+Timestamp = DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(
+        storage_format="%(year)04d-%(month)02d-%(day)02d "
+        "%(hour)02d:%(minute)02d:%(second)02d"
+    ),
+    "sqlite",
+)
+
+
 class TaskStatus(str, enum.Enum):
     pending = "pending"
     completed = "completed"
@@ -12,12 +25,146 @@ class TaskStatus(str, enum.Enum):
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Serves the keyset-paginated listing in TaskService.get_tasks.
+        Index("ix_tasks_user_created_id", "user_id", "created_at", "id"),
+        # Serves TaskService.get_changes: rows written after a version, in order.
+        Index("ix_tasks_user_version_id", "user_id", "version", "id"),
+        # Only tombstones are indexed, for TaskService.compact_tombstones.
+        Index(
+            "ix_tasks_deleted_at",
+            "deleted_at",
+            sqlite_where=text("deleted_at IS NOT NULL"),
+            postgresql_where=text("deleted_at IS NOT NULL"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
     description = Column(String, nullable=False)
     status = Column(Enum(TaskStatus), default=TaskStatus.pending, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(Timestamp, server_default=func.now())
+    updated_at = Column(Timestamp, nullable=True)
+    # Collection version of the user at the time of the last write to this task
+    version = Column(Integer, nullable=False, default=0)
+    # Set when the task is deleted; the row stays as a tombstone for delta sync
+    deleted_at = Column(Timestamp, nullable=True)
 
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     owner = relationship("User", back_populates="tasks")
+
+
+# Full-text search over title and description. The index is maintained by the
+# database in the same transaction as every insert, update and delete on tasks.
+SQLITE_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE tasks_fts USING fts5("
+    "title, description, content='tasks', content_rowid='id')",
+    "CREATE TRIGGER tasks_fts_ai AFTER INSERT ON tasks BEGIN "
+    "INSERT INTO tasks_fts(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); END",
+    "CREATE TRIGGER tasks_fts_ad AFTER DELETE ON tasks BEGIN "
+    "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    "CREATE TRIGGER tasks_fts_au AFTER UPDATE OF title, description ON tasks BEGIN "
+    "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO tasks_fts(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); END",
+]
+SQLITE_DROP_SEARCH_DDL = [
+    "DROP TRIGGER IF EXISTS tasks_fts_ai",
+    "DROP TRIGGER IF EXISTS tasks_fts_ad",
+    "DROP TRIGGER IF EXISTS tasks_fts_au",
+    "DROP TABLE IF EXISTS tasks_fts",
+]
+POSTGRESQL_SEARCH_DDL = [
+    "ALTER TABLE tasks ADD COLUMN search_vector tsvector GENERATED ALWAYS AS "
+    "(to_tsvector('simple', title || ' ' || description)) STORED",
+    "CREATE INDEX ix_tasks_search_vector ON tasks USING GIN (search_vector)",
+]
+
+
+def add_search_ddl(table):
+    """Create the full-text index along with the given tasks table, and drop it with the table."""
+    for statement in SQLITE_SEARCH_DDL:
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+    # The search_vector column and its index go with the table on PostgreSQL
+    for statement in SQLITE_DROP_SEARCH_DDL:
+        event.listen(table, "before_drop", DDL(statement).execute_if(dialect="sqlite"))
+    for statement in POSTGRESQL_SEARCH_DDL:
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+
+
+add_search_ddl(Task.__table__)
+
+
+class TaskCollection(Base):
+    """Per-user task collection state, bumped on every task write."""
+
+    __tablename__ = "task_collections"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    pending_count = Column(Integer, nullable=False, default=0)
+    completed_count = Column(Integer, nullable=False, default=0)
+    # Highest version among purged tombstones; deltas from before it are incomplete
+    compacted_version = Column(Integer, nullable=False, default=0)
+
+
+class TaskDailyStats(Base):
+    """Number of tasks a user created on each UTC day."""
+
+    __tablename__ = "task_daily_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    created_count = Column(Integer, nullable=False, default=0)
+
+
+class TaskArchive(Base):
+    """Completed tasks moved out of ``tasks`` once they have not been written for a while.
+
+    Same columns as Task; archived rows are never tombstones. Writing an
+    archived task moves it back into ``tasks``.
+    """
+
+    __tablename__ = "tasks_archive"
+    __table_args__ = (
+        Index("ix_tasks_archive_user_created_id", "user_id", "created_at", "id"),
+        Index("ix_tasks_archive_user_version_id", "user_id", "version", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    title = Column(String, nullable=False)
+    description = Column(String, nullable=False)
+    status = Column(Enum(TaskStatus), nullable=False)
+    created_at = Column(Timestamp)
+    updated_at = Column(Timestamp, nullable=True)
+    version = Column(Integer, nullable=False, default=0)
+    archived_at = Column(Timestamp, nullable=False)
+
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+
+# Task before TaskArchive: moves between them only go from tasks to the
+# archive while a user is being moved to another shard.
+SHARDED_MODELS = (Task, TaskArchive, TaskCollection, TaskDailyStats)
+
+
+def shard_metadata() -> MetaData:
+    """Sharded task tables as created on a shard database.
+
+    Users stay on the primary database, so the copies carry no foreign
+    keys to them.
+    """
+    metadata = MetaData()
+    for model in SHARDED_MODELS:
+        table = model.__table__.to_metadata(metadata)
+        for constraint in list(table.foreign_key_constraints):
+            table.constraints.discard(constraint)
+        table.foreign_keys.clear()
+        for table_column in table.columns:
+            table_column.foreign_keys.clear()
+        if model is Task:
+            add_search_ddl(table)
+    return metadata
@@ -11,5 +11,7 @@ class User(Base):
     username = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     api_key = Column(String, unique=True, index=True, nullable=False)
+    # Access tokens issued with a lower version are revoked
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     tasks = relationship("Task", back_populates="owner", cascade="all, delete-orphan")
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, Body, status
+from fastapi import APIRouter, Depends, Body, Response, status
 from fastapi.security.oauth2 import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.schemas.user import UserCreate, UserResponse, Token
 from app.services.user_service import UserService
+from app.models.user import User
+from app.utils.auth import get_current_user
 from typing import Annotated
 
 router = APIRouter(tags=["authentication"])
@@ -66,4 +68,29 @@ async def login(
     Returns JWT access token, token type, and user's API key.
     """
     user, access_token = await UserService.authenticate_user(form_data, db)
-    return Token(access_token=access_token, token_type="bearer", api_key=user.api_key)
\ No newline at end of file
+    return Token(access_token=access_token, token_type="bearer", api_key=user.api_key)
+
+
+@router.post(
+    "/token/revoke",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Revoke all access tokens",
+    description="Invalidate every access token issued to the current user. A new login is required afterwards.",
+    responses={
+        204: {"description": "Tokens revoked"},
+        401: {"description": "Authentication required"}
+    }
+)
+async def revoke_tokens(
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)]
+) -> Response:
+    """
+    Sign out everywhere.
+
+    Requests made with previously issued tokens are rejected with 401. Other
+    workers pick the revocation up within `AUTH_REVOCATION_REFRESH_SECONDS`
+    when stateless authentication is enabled.
+    """
+    await UserService.revoke_tokens(current_user.id, db)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
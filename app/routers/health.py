@@ -0,0 +1,56 @@
+import asyncio
+import os
+import time
+from fastapi import APIRouter, Response, status
+from sqlalchemy import text
+from app.config import settings
+from app.migrations import databases
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+
+async def _select_one(target):
+    async with target.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+
+async def _check_database(name: str, target) -> dict:
+    start = time.perf_counter()
+    try:
+        # Bounds the pool checkout as well as the query
+        await asyncio.wait_for(_select_one(target), settings.HEALTH_CHECK_TIMEOUT_SECONDS)
+    except Exception as exc:
+        return {"database": name, "ok": False, "error": type(exc).__name__}
+    return {"database": name, "ok": True, "seconds": time.perf_counter() - start}
+
+
+@router.get(
+    "/live",
+    summary="Worker liveness",
+    description="Answers as long as this worker's event loop is running; does not touch the database",
+)
+async def live() -> dict:
+    return {"status": "ok", "pid": os.getpid()}
+
+
+@router.get(
+    "/ready",
+    summary="Worker readiness",
+    description="Checks that this worker can reach the primary database and every task shard; 503 if any check fails or times out",
+    responses={503: {"description": "A database is unreachable; take this worker out of rotation"}},
+)
+async def ready(response: Response) -> dict:
+    """
+    Readiness probe for load balancers.
+
+    Runs `SELECT 1` on the primary and on every task shard, each bounded by
+    HEALTH_CHECK_TIMEOUT_SECONDS. Read replicas are not checked: reads fall
+    back to the primary when none is healthy.
+    """
+    checks = await asyncio.gather(
+        *(_check_database(name, target) for name, target, _ in databases())
+    )
+    ok = all(check["ok"] for check in checks)
+    if not ok:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {"status": "ready" if ok else "unavailable", "pid": os.getpid(), "databases": checks}
@@ -0,0 +1,74 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from app.database import engine, pool_monitor
+from app.middleware.rate_limit import rate_limit_counters
+from app.utils.auth import principal_cache, password_pool, require_ops_token
+from app.utils.metrics import registry
+from app.utils.startup import startup_report
+
+# Mounted only when OPS_TOKEN is set, like the ops endpoints
+router = APIRouter(tags=["operations"], dependencies=[Depends(require_ops_token)])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+db_pool_connections = registry.gauge(
+    "db_pool_connections", "Connections in the database pool by state", ("state",)
+)
+db_pool_timeouts = registry.gauge(
+    "db_pool_timeouts", "Pool checkouts that timed out since startup"
+)
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "Requests currently being handled"
+)
+http_requests_rejected = registry.gauge(
+    "http_requests_rejected", "Requests rejected by the rate limiter since startup", ("reason",)
+)
+auth_cache_requests = registry.gauge(
+    "auth_cache_requests", "Principal cache lookups since startup", ("result",)
+)
+password_hash_pool_tasks = registry.gauge(
+    "password_hash_pool_tasks", "Password hashing pool work by state", ("state",)
+)
+startup_seconds = registry.gauge(
+    "startup_seconds", "Time this worker spent starting up by phase", ("phase",)
+)
+
+
+@registry.collector
+def _collect_runtime_state():
+    pool = pool_monitor.stats(engine.pool)
+    for state in ("checked_out", "checked_in", "overflow"):
+        if state in pool:
+            db_pool_connections.set(pool[state], state)
+    db_pool_timeouts.set(pool["timeouts"])
+
+    limits = rate_limit_counters.stats()
+    http_requests_in_flight.set(limits["in_flight"])
+    http_requests_rejected.set(limits["rate_limited"], "rate_limited")
+    http_requests_rejected.set(limits["shed"], "shed")
+
+    cache = principal_cache.stats()
+    auth_cache_requests.set(cache["hits"], "hit")
+    auth_cache_requests.set(cache["misses"], "miss")
+
+    hashing = password_pool.stats()
+    for state in ("active", "queued", "rejected"):
+        password_hash_pool_tasks.set(hashing[state], state)
+
+    startup_seconds.set(startup_report.import_seconds, "imports")
+    for phase, seconds in startup_report.phases.items():
+        startup_seconds.set(seconds, phase)
+    if startup_report.ready_seconds is not None:
+        startup_seconds.set(startup_report.ready_seconds, "ready")
+    if startup_report.first_request is not None:
+        startup_seconds.set(startup_report.first_request["seconds"], "first_request")
+
+
+@router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    summary="Prometheus metrics",
+    description="Request latency, database, authentication and pool metrics in Prometheus text format",
+)
+async def metrics() -> PlainTextResponse:
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
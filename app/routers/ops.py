@@ -0,0 +1,128 @@
+from fastapi import APIRouter, Depends
+from app.database import engine, pool_monitor, replica_router
+from app.middleware.idempotency import idempotency_sweeper
+from app.middleware.rate_limit import rate_limit_counters
+from app.migrations import LATEST_VERSION, current_version, databases
+from app.services.task_archive_service import task_archiver
+from app.services.task_cache_service import TaskCacheService
+from app.services.task_event_service import task_events
+from app.services.task_write_queue import task_create_batcher
+from app.sharding import shard_router, task_ids
+from app.utils.auth import principal_cache, password_pool, require_ops_token, token_versions
+from app.utils.startup import startup_report
+
+
+# Mounted only when OPS_TOKEN is set: these expose database layout and internals
+# and some run table scans
+router = APIRouter(prefix="/ops", tags=["operations"], dependencies=[Depends(require_ops_token)])
+
+
+@router.get(
+    "/auth-cache",
+    summary="Authentication cache statistics",
+    description="Hit/miss counters and occupancy of the in-process principal cache, plus the token revocation map",
+)
+async def auth_cache_stats() -> dict:
+    return {**principal_cache.stats(), "token_versions": token_versions.stats()}
+
+
+@router.get(
+    "/password-hashing",
+    summary="Password hashing pool statistics",
+    description="Utilization, queue depth and rejections of the bcrypt worker pool",
+)
+async def password_hashing_stats() -> dict:
+    return password_pool.stats()
+
+
+@router.get(
+    "/db-pool",
+    summary="Database connection pool statistics",
+    description="Checked-out and overflow connections plus checkout wait times",
+)
+async def db_pool_stats() -> dict:
+    return pool_monitor.stats(engine.pool)
+
+
+@router.get(
+    "/db-replicas",
+    summary="Read replica routing statistics",
+    description="Health, sessions in use and reads served per replica, plus reads kept on the primary",
+)
+async def db_replica_stats() -> dict:
+    return replica_router.stats()
+
+
+@router.get(
+    "/rate-limit",
+    summary="Rate limiting and load shedding statistics",
+    description="In-flight requests and the number of rate-limited and shed requests",
+)
+async def rate_limit_stats() -> dict:
+    return rate_limit_counters.stats()
+
+
+@router.get(
+    "/idempotency",
+    summary="Idempotency key statistics",
+    description="Task writes executed, replayed, coalesced or rejected by Idempotency-Key, plus the key store",
+)
+async def idempotency_stats() -> dict:
+    return idempotency_sweeper.stats()
+
+
+@router.get(
+    "/task-writes",
+    summary="Task create batching statistics",
+    description="Queue depth and group-commit batch sizes of the task create write queue",
+)
+async def task_write_stats() -> dict:
+    return task_create_batcher.stats()
+
+
+@router.get(
+    "/task-cache",
+    summary="Task cache statistics",
+    description="Hits, misses, coalesced misses and occupancy of the task list cache",
+)
+async def task_cache_stats() -> dict:
+    return TaskCacheService.stats()
+
+
+@router.get(
+    "/task-events",
+    summary="Task change feed statistics",
+    description="Connected change feeds, buffered history and subscribers dropped for falling behind",
+)
+async def task_event_stats() -> dict:
+    return task_events.stats()
+
+
+@router.get(
+    "/task-archive",
+    summary="Task archive statistics",
+    description="Rows in the tasks table and the archive per shard, plus tasks archived and restored and the last archive run",
+)
+async def task_archive_stats() -> dict:
+    return {**task_archiver.stats(), "tables": await task_archiver.table_sizes()}
+
+
+@router.get(
+    "/shards",
+    summary="Task shard statistics",
+    description="Configured task shards, sessions opened per shard, placement cache and task id blocks",
+)
+async def shard_stats() -> dict:
+    return {**shard_router.stats(), "task_ids": task_ids.stats()}
+
+
+@router.get(
+    "/startup",
+    summary="Worker startup report",
+    description="Import time per module, startup phases, time to ready and first request latency of this worker, plus the schema version of each database",
+)
+async def startup_stats() -> dict:
+    schema = [
+        {"database": name, "version": await current_version(target)} for name, target, _ in databases()
+    ]
+    return {**startup_report.stats(), "schema": {"latest_version": LATEST_VERSION, "databases": schema}}
@@ -1,14 +1,84 @@
-from fastapi import APIRouter, Depends, Path, status, Body, HTTPException
+from fastapi import APIRouter, Depends, Header, Path, Query, Response, status, Body, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Annotated, List
-from app.schemas.task import TaskCreate, TaskUpdate, TaskResponse
+from typing import Annotated
+from datetime import datetime
+from app.schemas.task import (
+    TaskCreate,
+    TaskUpdate,
+    TaskResponse,
+    TaskPage,
+    TaskChanges,
+    TaskStatus,
+    ExportFormat,
+    TaskBatchCreate,
+    TaskBatchUpdate,
+    TaskBatchDelete,
+    TaskBatchResult,
+    TaskStats,
+)
 from app.models.user import User
 from app.utils.auth import get_current_user
 from app.services.task_service import TaskService
-from app.database import get_db
+from app.services.task_collection_service import TaskCollectionService
+from app.services.task_event_service import TaskEventService
+from app.services.task_write_queue import task_create_batcher
+from app.config import settings
+from app.database import get_read_db
+from app.sharding import shard_router
+from app.utils.serialization import (
+    json_response,
+    task_adapter,
+    task_page_adapter,
+    task_changes_page_adapter,
+)
+from app.utils.etag import (
+    task_list_etag,
+    task_etag,
+    parse_etags,
+    etag_matches,
+    task_version_from_etag,
+)
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+# Clients may store responses but must revalidate them with If-None-Match.
+CACHE_CONTROL = "private, no-cache"
+
+
+async def get_task_db(current_user: Annotated[User, Depends(get_current_user)]):
+    """Session for writing the user's tasks, on the shard that holds them."""
+    async with shard_router.session(current_user.id, write=True) as session:
+        yield session
+
+
+async def get_task_read_db(
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+):
+    """Session for reading the user's tasks.
+
+    Unsharded, this is the replica-routed session authentication already
+    uses; replicas mirror the primary only, so shards are read directly.
+    """
+    if not shard_router.sharded:
+        yield db
+        return
+    async with shard_router.session(current_user.id) as session:
+        yield session
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+    )
+
 
 @router.post(
     "/", 
@@ -25,7 +95,8 @@ router = APIRouter(prefix="/tasks", tags=["tasks"])
 async def create_task(
     task: Annotated[TaskCreate, Body(description="Task data including title, description, and priority")],
     current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_task_db)],
+    response: Response,
 ) -> TaskResponse:
     """
     Create a new task for the authenticated user.
@@ -36,30 +107,327 @@ async def create_task(
     
     Returns the created task with its unique ID and timestamps.
     """
-    return await TaskService.create_task(task, current_user, db)
+    if settings.TASK_CREATE_BATCHING:
+        # Group-committed with other creates arriving in the same window
+        db_task = await task_create_batcher.submit(task, current_user.id)
+    else:
+        db_task = await TaskService.create_task(task, current_user, db)
+    response.headers["ETag"] = task_etag(db_task.id, db_task.version)
+    return db_task
 
 
 @router.get(
     "/", 
-    response_model=List[TaskResponse],
-    summary="Get all user tasks",
-    description="Retrieve all tasks belonging to the authenticated user",
+    response_model=TaskPage,
+    summary="Get user tasks",
+    description="Retrieve a page of tasks belonging to the authenticated user",
     responses={
-        200: {"description": "List of user tasks"},
+        200: {"description": "Page of user tasks"},
+        304: {"description": "Tasks unchanged since the ETag in If-None-Match"},
+        400: {"description": "Invalid cursor"},
         401: {"description": "Authentication required"}
     }
 )
 async def get_tasks(
     current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[AsyncSession, Depends(get_db)]
-) -> List[TaskResponse]:
+    db: Annotated[AsyncSession, Depends(get_task_read_db)],
+    if_none_match: Annotated[str | None, Header(description="ETag of a previously fetched page")] = None,
+    limit: Annotated[int, Query(description="Maximum number of tasks to return", ge=1, le=500)] = 50,
+    cursor: Annotated[str | None, Query(description="Cursor returned as next_cursor by the previous page")] = None,
+    task_status: Annotated[TaskStatus | None, Query(alias="status", description="Only return tasks with this status")] = None,
+    created_after: Annotated[datetime | None, Query(description="Only return tasks created after this time")] = None,
+    created_before: Annotated[datetime | None, Query(description="Only return tasks created before this time")] = None,
+    include_archived: Annotated[bool, Query(description="Also return archived completed tasks")] = False,
+) -> TaskPage:
     """
-    Get all tasks for the authenticated user.
+    Get tasks for the authenticated user, newest first.
     
-    Returns a list of all tasks created by the current user,
-    ordered by creation date.
+    - **limit**: Page size (1-500, default 50)
+    - **cursor**: Pass the previous page's `next_cursor` to continue
+    - **status**: Filter by task status
+    - **created_after** / **created_before**: Filter by creation time
+    - **include_archived**: Include completed tasks moved to the archive
+    
+    `next_cursor` is null once the last page has been returned.
+    The ETag changes whenever any of the user's tasks is written or archived.
+    """
+    version = await TaskCollectionService.get_version(current_user.id, db)
+    etag = task_list_etag(current_user.id, version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    params = {
+        "limit": limit,
+        "cursor": cursor,
+        "task_status": task_status.value if task_status else None,
+        "created_after": created_after,
+        "created_before": created_before,
+        "include_archived": include_archived,
+    }
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if settings.TASK_CACHE_ENABLED:
+        body = await TaskService.get_tasks_json(current_user, db, version, **params)
+        return Response(content=body, media_type="application/json", headers=headers)
+    tasks, next_cursor = await TaskService.get_tasks(current_user, db, **params)
+    return json_response(
+        task_page_adapter,
+        {"items": [task._asdict() for task in tasks], "next_cursor": next_cursor},
+        headers=headers,
+    )
+
+
+@router.get(
+    "/stats",
+    response_model=TaskStats,
+    summary="Get task statistics",
+    description="Task counts by status, completion rate and tasks created per day for the authenticated user",
+    responses={
+        200: {"description": "Task statistics"},
+        401: {"description": "Authentication required"}
+    }
+)
+async def get_task_stats(
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_task_read_db)],
+    days: Annotated[int, Query(description="Number of days of per-day counts to return", ge=1, le=366)] = 30,
+) -> TaskStats:
     """
-    return await TaskService.get_tasks(current_user, db)
+    Get statistics about the authenticated user's tasks.
+    
+    Served from counters maintained on every task write, so the cost
+    does not depend on how many tasks the user has.
+    """
+    return await TaskCollectionService.get_stats(current_user.id, db, days)
+
+
+@router.get(
+    "/export",
+    summary="Export user tasks",
+    description="Stream all tasks of the authenticated user as NDJSON or CSV",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "Streamed task export",
+            "content": {"application/x-ndjson": {}, "text/csv": {}},
+        },
+        401: {"description": "Authentication required"}
+    }
+)
+async def export_tasks(
+    current_user: Annotated[User, Depends(get_current_user)],
+    export_format: Annotated[ExportFormat, Query(alias="format", description="Output format")] = ExportFormat.NDJSON,
+    task_status: Annotated[TaskStatus | None, Query(alias="status", description="Only export tasks with this status")] = None,
+    created_after: Annotated[datetime | None, Query(description="Only export tasks created after this time")] = None,
+    created_before: Annotated[datetime | None, Query(description="Only export tasks created before this time")] = None,
+    include_archived: Annotated[bool, Query(description="Also export archived completed tasks")] = False,
+) -> StreamingResponse:
+    """
+    Export tasks for the authenticated user, newest first.
+    
+    - **format**: `ndjson` (one task object per line) or `csv` (with a header row)
+    - **status**, **created_after**, **created_before**, **include_archived**: Same filters as `GET /tasks/`
+    
+    Rows are streamed from the database in chunks, so exports of any
+    size use constant memory.
+    """
+    return StreamingResponse(
+        TaskService.export_tasks(
+            current_user.id,
+            export_format.value,
+            task_status=task_status.value if task_status else None,
+            created_after=created_after,
+            created_before=created_before,
+            include_archived=include_archived,
+        ),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="tasks.{export_format.value}"'
+        },
+    )
+
+
+@router.get(
+    "/changes",
+    response_model=TaskChanges,
+    summary="Get task changes since a version",
+    description="Delta sync: tasks created, updated or deleted after a collection version",
+    responses={
+        200: {"description": "Page of changes, oldest first"},
+        400: {"description": "Invalid cursor"},
+        401: {"description": "Authentication required"},
+        410: {"description": "Changes since this version were compacted; sync again from version 0"}
+    }
+)
+async def get_task_changes(
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_task_read_db)],
+    since: Annotated[int, Query(description="Collection version from the client's previous sync, 0 for a full sync", ge=0)] = 0,
+    limit: Annotated[int, Query(description="Maximum number of changes to return", ge=1, le=1000)] = 500,
+    cursor: Annotated[str | None, Query(description="Cursor returned as next_cursor by the previous page")] = None,
+) -> TaskChanges:
+    """
+    Get what changed in the authenticated user's tasks after **since**.
+    
+    Each change is `{"op": "upsert", "id", "task"}` with the current task or
+    `{"op": "delete", "id"}`. Follow **next_cursor** until it is null, then
+    keep **version** as the next **since**. `since=0` returns every task.
+    
+    Deleted tasks are kept as tombstones for `TASK_TOMBSTONE_RETENTION_DAYS`;
+    a client that has not synced for longer gets `410` and must sync from 0.
+    """
+    version, changes, next_cursor = await TaskService.get_changes(
+        current_user, db, since, limit=limit, cursor=cursor
+    )
+    return json_response(
+        task_changes_page_adapter,
+        {"version": version, "changes": changes, "next_cursor": next_cursor},
+    )
+
+
+@router.get(
+    "/events",
+    summary="Stream task changes",
+    description="Server-sent events with every change to the authenticated user's tasks",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "Event stream of `ready`, `changes` and `resync` events",
+            "content": {"text/event-stream": {}},
+        },
+        401: {"description": "Authentication required"}
+    }
+)
+async def stream_task_events(
+    current_user: Annotated[User, Depends(get_current_user)],
+    since: Annotated[int | None, Query(description="Collection version the client already has", ge=0)] = None,
+    last_event_id: Annotated[int | None, Header(description="Sent by EventSource on reconnect; same as since", ge=0)] = None,
+) -> StreamingResponse:
+    """
+    Stream changes to the authenticated user's tasks as they are committed.
+    
+    - **ready**: `{"version": n}`, the version the stream continues from
+    - **changes**: `{"version": n, "changes": [...]}`, every task created,
+      updated (`op: upsert`, with the full task) or deleted (`op: delete`)
+      by one write
+    - **resync**: changes were missed; refetch `GET /tasks/` and continue
+    
+    Each event id is the collection version. Reconnecting with **since**
+    (or `Last-Event-ID`) replays the missed changes when they are still
+    buffered, and sends `resync` otherwise.
+    """
+    return StreamingResponse(
+        TaskEventService.stream(current_user.id, since if since is not None else last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get(
+    "/search",
+    response_model=TaskPage,
+    summary="Search user tasks",
+    description="Full-text search over the title and description of the authenticated user's tasks",
+    responses={
+        200: {"description": "Page of matching tasks, best match first"},
+        400: {"description": "Invalid cursor, or a cursor past the deepest searchable page"},
+        401: {"description": "Authentication required"}
+    }
+)
+async def search_tasks(
+    q: Annotated[str, Query(description="Words to search for", min_length=1, max_length=200)],
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_task_read_db)],
+    limit: Annotated[int, Query(description="Maximum number of tasks to return", ge=1, le=100)] = 20,
+    cursor: Annotated[str | None, Query(description="Cursor returned as next_cursor by the previous page")] = None,
+) -> TaskPage:
+    """
+    Search tasks for the authenticated user.
+    
+    Every word in **q** must appear in the title or description; words
+    also match as prefixes on SQLite. Results are ranked by relevance, and
+    only the first 1000 can be paged through. Archived tasks are not searched.
+    """
+    tasks, next_cursor = await TaskService.search_tasks(
+        q, current_user, db, limit=limit, cursor=cursor
+    )
+    return json_response(
+        task_page_adapter,
+        {"items": [task._asdict() for task in tasks], "next_cursor": next_cursor},
+    )
+
+
+@router.post(
+    "/batch",
+    response_model=TaskBatchResult,
+    summary="Create tasks in bulk",
+    description="Create up to the configured batch size of tasks in a single transaction",
+    responses={
+        200: {"description": "Per-task results in request order"},
+        401: {"description": "Authentication required"},
+        422: {"description": "Invalid task data or batch too large"}
+    }
+)
+async def create_tasks(
+    batch: Annotated[TaskBatchCreate, Body(description="Tasks to create")],
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_task_db)],
+) -> TaskBatchResult:
+    """
+    Create several tasks at once.
+    
+    All tasks are inserted with one multi-row statement and committed
+    together. Each result carries the status code and created task.
+    """
+    return TaskBatchResult(results=await TaskService.create_tasks(batch.tasks, current_user, db))
+
+
+@router.patch(
+    "/batch",
+    response_model=TaskBatchResult,
+    summary="Update tasks in bulk",
+    description="Apply partial updates to several tasks in a single transaction",
+    responses={
+        200: {"description": "Per-task results in request order"},
+        401: {"description": "Authentication required"},
+        422: {"description": "Invalid update data or batch too large"}
+    }
+)
+async def update_tasks(
+    batch: Annotated[TaskBatchUpdate, Body(description="Updates to apply, each with the task ID")],
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_task_db)],
+) -> TaskBatchResult:
+    """
+    Update several tasks at once.
+    
+    Only the fields provided for each task are changed. Tasks that do not
+    exist or belong to another user are reported with a 404 result.
+    """
+    return TaskBatchResult(results=await TaskService.update_tasks(batch.tasks, current_user, db))
+
+
+@router.delete(
+    "/batch",
+    response_model=TaskBatchResult,
+    summary="Delete tasks in bulk",
+    description="Delete several tasks in a single transaction",
+    responses={
+        200: {"description": "Per-task results in request order"},
+        401: {"description": "Authentication required"},
+        422: {"description": "Invalid IDs or batch too large"}
+    }
+)
+async def delete_tasks(
+    batch: Annotated[TaskBatchDelete, Body(description="IDs of the tasks to delete")],
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_task_db)],
+) -> TaskBatchResult:
+    """
+    Delete several tasks permanently.
+    
+    Tasks that do not exist or belong to another user are reported
+    with a 404 result.
+    """
+    return TaskBatchResult(results=await TaskService.delete_tasks(batch.ids, current_user, db))
 
 
 @router.get(
@@ -69,6 +437,7 @@ async def get_tasks(
     description="Retrieve a specific task by its ID (must belong to authenticated user)",
     responses={
         200: {"description": "Task details"},
+        304: {"description": "Task unchanged since the ETag in If-None-Match"},
         401: {"description": "Authentication required"},
         403: {"description": "Access denied - task doesn't belong to user"},
         404: {"description": "Task not found"}
@@ -77,15 +446,37 @@ async def get_tasks(
 async def get_task(
     task_id: Annotated[int, Path(description="The ID of the task to retrieve", gt=0)],
     current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_task_read_db)],
+    if_none_match: Annotated[str | None, Header(description="ETag of a previously fetched copy")] = None,
 ) -> TaskResponse:
     """
     Get a specific task by ID.
     
-    The task must belong to the authenticated user.
-    Returns detailed task information including status and timestamps.
+    The task must belong to the authenticated user; archived tasks
+    are found too. Returns detailed task information including status
+    and timestamps.
     """
-    return await TaskService.get_task(task_id, current_user, db)
+    if settings.TASK_CACHE_ENABLED:
+        version = await TaskCollectionService.get_version(current_user.id, db)
+        etag, body = await TaskService.get_task_json(task_id, current_user, db, version)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        return Response(
+            content=body,
+            media_type="application/json",
+            headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+        )
+    if if_none_match:
+        # Only the version is read, which also confirms the task is the user's
+        etag = task_etag(task_id, await TaskService.get_task_version(task_id, current_user, db))
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+    task = await TaskService.get_task(task_id, current_user, db)
+    return json_response(
+        task_adapter,
+        task._asdict(),
+        headers={"ETag": task_etag(task.id, task.version), "Cache-Control": CACHE_CONTROL},
+    )
 
 
 @router.put(
@@ -98,7 +489,8 @@ async def get_task(
         400: {"description": "Invalid update data"},
         401: {"description": "Authentication required"},
         403: {"description": "Access denied - task doesn't belong to user"},
-        404: {"description": "Task not found"}
+        404: {"description": "Task not found"},
+        412: {"description": "Task changed since the ETag in If-Match"}
     }
 )
 async def update_task(
@@ -108,7 +500,9 @@ async def update_task(
         Body(description="Updated task data (only provided fields will be updated)")
     ],
     current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_task_db)],
+    response: Response,
+    if_match: Annotated[str | None, Header(description="Only update if the task still has this ETag")] = None,
 ) -> TaskResponse:
     """
     Update an existing task.
@@ -117,9 +511,28 @@ async def update_task(
     Common use case is updating the task status, but all fields
     can be modified if needed.
     
-    The task must belong to the authenticated user.
+    The task must belong to the authenticated user. Send the task's
+    ETag in `If-Match` to reject the update if someone else changed it.
+    Updating an archived task moves it back out of the archive.
     """
-    return await TaskService.update_task(task_id, task_update, current_user, db)
+    expected_versions = None
+    tags = parse_etags(if_match)
+    if tags and "*" not in tags:
+        expected_versions = [
+            version
+            for version in (task_version_from_etag(tag, task_id) for tag in tags)
+            if version is not None
+        ]
+        if not expected_versions:
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail="Task has been modified",
+            )
+    task = await TaskService.update_task(
+        task_id, task_update, current_user, db, expected_versions=expected_versions
+    )
+    response.headers["ETag"] = task_etag(task.id, task.version)
+    return task
 
 
 @router.delete(
@@ -136,7 +549,7 @@ async def update_task(
 async def delete_task(
     task_id: Annotated[int, Path(description="The ID of the task to delete", gt=0)],
     current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_task_db)],
 ) -> None:
     """
     Delete a task permanently.
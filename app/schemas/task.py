@@ -1,7 +1,9 @@
 from pydantic import BaseModel, ConfigDict, Field
-from datetime import datetime
-from typing import Annotated
+from datetime import date, datetime
+from typing import Annotated, Literal
+from typing_extensions import NotRequired, TypedDict
 from enum import Enum
+from app.config import settings
 
 
 class TaskStatus(str, Enum):
@@ -11,6 +13,12 @@ class TaskStatus(str, Enum):
 
 
 
+class ExportFormat(str, Enum):
+
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
 class TaskBase(BaseModel):
     title: Annotated[str, Field(description="Task title", min_length=1, max_length=200)]
     description: Annotated[str, Field(description="Task description", max_length=1000)]
@@ -36,3 +44,108 @@ class TaskResponse(TaskBase):
     id: Annotated[int, Field(description="Unique task identifier", gt=0)]
     user_id: Annotated[int, Field(description="ID of the user who owns this task", gt=0)]
     created_at: Annotated[datetime, Field(description="Timestamp when the task was created")]
+    updated_at: Annotated[datetime | None, Field(None, description="Timestamp of the last update, null if never updated")]
+    version: Annotated[int, Field(description="Version of the task, also exposed as its ETag")]
+
+
+class TaskRow(TypedDict):
+    """Serialization-only shape of TaskResponse for rows already read from the database"""
+    title: str
+    description: str
+    status: str
+    id: int
+    user_id: int
+    created_at: datetime
+    updated_at: datetime | None
+    version: int
+
+
+class TaskPageRow(TypedDict):
+    """Serialization-only shape of TaskPage"""
+    items: list[TaskRow]
+    next_cursor: str | None
+
+
+class TaskChange(TypedDict):
+    """One task written in a change event: the full task, or the id of a deleted one"""
+    op: Literal["upsert", "delete"]
+    id: int
+    task: NotRequired[TaskRow]
+
+
+class TaskChangeEvent(TypedDict):
+    """All task changes committed under one collection version"""
+    version: int
+    changes: list[TaskChange]
+
+
+class TaskChangesPageRow(TypedDict):
+    """Serialization-only shape of TaskChanges"""
+    version: int
+    changes: list[TaskChange]
+    next_cursor: str | None
+
+
+class TaskChanges(BaseModel):
+    """Schema for a page of task changes returned by delta sync"""
+    version: Annotated[int, Field(description="Collection version the changes are complete up to once next_cursor is null; pass it as since next time")]
+    changes: Annotated[list[TaskChange], Field(description="Tasks created, updated or deleted after since, oldest change first")]
+    next_cursor: Annotated[str | None, Field(None, description="Cursor for the rest of this sync, null on the last page")]
+
+
+class TaskPage(BaseModel):
+    """Schema for a page of tasks returned by keyset pagination"""
+    items: Annotated[list[TaskResponse], Field(description="Tasks in this page, newest first")]
+    next_cursor: Annotated[str | None, Field(None, description="Opaque cursor for the next page, null on the last page")]
+
+
+class TaskBatchCreate(BaseModel):
+    """Schema for creating several tasks in one transaction"""
+    tasks: Annotated[list[TaskCreate], Field(description="Tasks to create", min_length=1, max_length=settings.TASK_BATCH_MAX_SIZE)]
+
+
+class TaskBatchUpdateItem(TaskUpdate):
+    """Schema for one update within a batch"""
+    id: Annotated[int, Field(description="ID of the task to update", gt=0)]
+
+
+class TaskBatchUpdate(BaseModel):
+    """Schema for updating several tasks in one transaction"""
+    tasks: Annotated[list[TaskBatchUpdateItem], Field(description="Updates to apply", min_length=1, max_length=settings.TASK_BATCH_MAX_SIZE)]
+
+
+class TaskBatchDelete(BaseModel):
+    """Schema for deleting several tasks in one transaction"""
+    ids: Annotated[list[Annotated[int, Field(gt=0)]], Field(description="IDs of the tasks to delete", min_length=1, max_length=settings.TASK_BATCH_MAX_SIZE)]
+
+
+class TaskBatchItemResult(BaseModel):
+    """Outcome of a single operation within a batch"""
+    index: Annotated[int, Field(description="Position of the operation in the request")]
+    status_code: Annotated[int, Field(description="HTTP status the operation would have returned on its own")]
+    id: Annotated[int | None, Field(None, description="ID of the affected task")]
+    task: Annotated[TaskResponse | None, Field(None, description="The created or updated task")]
+    detail: Annotated[str | None, Field(None, description="Error detail when the operation failed")]
+
+
+class TaskBatchResult(BaseModel):
+    """Schema for per-item batch results"""
+    results: Annotated[list[TaskBatchItemResult], Field(description="One result per requested operation, in request order")]
+
+
+class TaskStatusCounts(BaseModel):
+    pending: Annotated[int, Field(description="Number of pending tasks")]
+    completed: Annotated[int, Field(description="Number of completed tasks")]
+
+
+class TaskDayCount(BaseModel):
+    day: Annotated[date, Field(description="UTC day")]
+    count: Annotated[int, Field(description="Tasks created on that day that still exist")]
+
+
+class TaskStats(BaseModel):
+    """Schema for per-user task statistics"""
+    counts: Annotated[TaskStatusCounts, Field(description="Number of tasks per status")]
+    total: Annotated[int, Field(description="Total number of tasks")]
+    completion_rate: Annotated[float, Field(description="Share of tasks that are completed, between 0 and 1")]
+    created_per_day: Annotated[list[TaskDayCount], Field(description="Tasks created per day, oldest first; days without tasks are omitted")]
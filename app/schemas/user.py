@@ -33,3 +33,5 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     user_id: int | None = None
+    api_key_hash: str | None = None
+    token_version: int | None = None
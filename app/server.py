@@ -0,0 +1,353 @@
+import asyncio
+import logging
+import math
+import os
+import select
+import signal
+import time
+import traceback
+from dataclasses import dataclass
+import uvicorn
+from app.config import settings
+from app.sharding import all_engines
+from app.utils.startup import startup_report
+
+server_logger = logging.getLogger("app.server")
+
+STOP_SIGNALS = (signal.SIGTERM, signal.SIGINT)
+POLL_SECONDS = 1.0
+# Exit status of a worker whose startup failed, e.g. on an outdated schema
+BOOT_FAILED = 3
+# Time a stopping worker keeps reading from connections it just accepted
+DRAIN_SECONDS = 0.2
+
+
+def _cgroup_cpu_quota() -> float | None:
+    """CPUs allowed by the container's cgroup CPU quota, None if unlimited."""
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as cpu_max:
+            quota, period = cpu_max.read().split()
+        return None if quota == "max" else int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as quota_file:
+            quota = int(quota_file.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as period_file:
+            period = int(period_file.read())
+        return None if quota <= 0 else quota / period
+    except (OSError, ValueError):
+        return None
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on, honoring CPU affinity and a container CPU quota."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    quota = _cgroup_cpu_quota()
+    if quota is not None:
+        cpus = min(cpus, math.ceil(quota))
+    return max(cpus, 1)
+
+
+class WorkerServer(uvicorn.Server):
+    """uvicorn server that tells the supervisor once it accepts connections."""
+
+    def __init__(self, config: uvicorn.Config, ready_fd: int):
+        super().__init__(config)
+        self.ready_fd = ready_fd
+
+    async def startup(self, sockets=None):
+        await super().startup(sockets=sockets)
+        if not self.should_exit:
+            os.write(self.ready_fd, b"1")
+        # Closed without a byte when startup failed
+        os.close(self.ready_fd)
+
+    async def shutdown(self, sockets=None):
+        # uvicorn closes connections without a request in progress right after
+        # it stops accepting, dropping requests still in flight on connections
+        # accepted just before; let those arrive first. The other workers
+        # accept new connections meanwhile.
+        for server in self.servers:
+            server.close()
+        await asyncio.sleep(DRAIN_SECONDS)
+        await super().shutdown(sockets=sockets)
+
+
+@dataclass
+class Worker:
+    pid: int
+    ready_fd: int | None
+    started_at: float
+
+
+class Supervisor:
+    """Runs uvicorn in worker processes forked from this one, sharing one listening socket.
+
+    The app is imported once before forking, so a worker is serving within
+    its own startup hook's time instead of re-importing everything. Each
+    worker drops the pooled database connections it inherited and opens
+    its own. SIGHUP replaces the workers one at a time: a replacement is
+    started and must be accepting connections before the worker it
+    replaces is stopped, so capacity never drops during the restart.
+    Workers are stopped with SIGTERM, which lets uvicorn finish in-flight
+    requests for up to the graceful timeout. A worker that dies is
+    replaced; one that fails to start stops the server, since its
+    replacement would fail the same way.
+    """
+
+    def __init__(self, config: uvicorn.Config, workers: int, ready_timeout: float, graceful_timeout: float):
+        self.config = config
+        self.worker_count = workers
+        self.ready_timeout = ready_timeout
+        self.graceful_timeout = graceful_timeout
+        self.workers: dict[int, Worker] = {}
+        self.socket = None
+        self._signals = []
+        self._wakeup_read = None
+        self._wakeup_write = None
+
+    def run(self) -> int:
+        """Serve until SIGTERM or SIGINT; returns the process exit status."""
+        # Imports the app and the HTTP protocol implementation once, for every worker
+        self.config.load()
+        self.socket = self.config.bind_socket()
+        self._wakeup_read, self._wakeup_write = os.pipe()
+        for signum in (*STOP_SIGNALS, signal.SIGHUP):
+            signal.signal(signum, self._on_signal)
+        try:
+            for _ in range(self.worker_count):
+                self._spawn()
+            if not self._wait_ready(list(self.workers.values())):
+                return 1
+            server_logger.info("serving on %d worker(s): %s", len(self.workers), sorted(self.workers))
+            while True:
+                signum = self._next_signal(POLL_SECONDS)
+                if signum in STOP_SIGNALS:
+                    server_logger.info("received %s, stopping", signal.Signals(signum).name)
+                    return 0
+                if signum == signal.SIGHUP:
+                    self._rolling_restart()
+                if not self._replace_dead_workers():
+                    return 1
+        finally:
+            self._stop(list(self.workers.values()))
+            self.socket.close()
+
+    def _on_signal(self, signum, frame):
+        self._signals.append(signum)
+        os.write(self._wakeup_write, b"s")
+
+    def _next_signal(self, timeout: float):
+        if not self._signals:
+            readable, _, _ = select.select([self._wakeup_read], [], [], timeout)
+            if readable:
+                os.read(self._wakeup_read, 64)
+        return self._signals.pop(0) if self._signals else None
+
+    def _stop_requested(self) -> bool:
+        return any(signum in STOP_SIGNALS for signum in self._signals)
+
+    def _spawn(self) -> Worker:
+        ready_read, ready_write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            status = 1
+            try:
+                os.close(ready_read)
+                self._init_worker()
+                server = WorkerServer(self.config, ready_write)
+                server.run(sockets=[self.socket])
+                status = 0 if server.started else BOOT_FAILED
+            except BaseException:
+                traceback.print_exc()
+            finally:
+                # Never return into the supervisor's loop
+                os._exit(status)
+        os.close(ready_write)
+        worker = Worker(pid=pid, ready_fd=ready_read, started_at=time.monotonic())
+        self.workers[pid] = worker
+        return worker
+
+    def _init_worker(self):
+        for signum in (*STOP_SIGNALS, signal.SIGHUP):
+            signal.signal(signum, signal.SIG_DFL)
+        os.close(self._wakeup_read)
+        os.close(self._wakeup_write)
+        for worker in self.workers.values():
+            if worker.ready_fd is not None:
+                os.close(worker.ready_fd)
+        # Pooled connections belong to the parent; drop them without closing
+        # so this worker opens its own
+        for target in all_engines():
+            target.sync_engine.dispose(close=False)
+        startup_report.mark_forked()
+
+    def _wait_ready(self, workers: list[Worker]) -> bool:
+        """Wait until every worker accepts connections; False if one failed, timed out or a stop was requested."""
+        deadline = time.monotonic() + self.ready_timeout
+        waiting = {worker.ready_fd: worker for worker in workers}
+        while waiting:
+            if self._stop_requested():
+                return False
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                pids = sorted(worker.pid for worker in waiting.values())
+                server_logger.error("worker(s) %s not ready after %.0fs", pids, self.ready_timeout)
+                return False
+            readable, _, _ = select.select([*waiting, self._wakeup_read], [], [], remaining)
+            for fd in readable:
+                if fd == self._wakeup_read:
+                    # Handled by the caller once the workers are ready
+                    os.read(self._wakeup_read, 64)
+                    continue
+                worker = waiting.pop(fd)
+                started = os.read(fd, 1)
+                os.close(fd)
+                worker.ready_fd = None
+                if not started:
+                    server_logger.error("worker %d failed to start", worker.pid)
+                    return False
+                server_logger.info(
+                    "worker %d ready in %.0f ms", worker.pid, (time.monotonic() - worker.started_at) * 1000
+                )
+        return True
+
+    def _stop(self, workers: list[Worker]):
+        """SIGTERM the workers and wait for them, killing any still running after the graceful timeout."""
+        for worker in workers:
+            self._signal_worker(worker, signal.SIGTERM)
+        # uvicorn's own graceful timeout plus time to run the shutdown hooks
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        pending = {worker.pid for worker in workers}
+        while pending:
+            for pid in list(pending):
+                if self._reap(pid):
+                    pending.discard(pid)
+            if pending and time.monotonic() >= deadline:
+                for pid in pending:
+                    server_logger.warning("worker %d did not stop in time, killing it", pid)
+                    self._signal_worker(self.workers[pid], signal.SIGKILL)
+                deadline = float("inf")
+            if pending:
+                time.sleep(0.05)
+        for worker in workers:
+            if worker.ready_fd is not None:
+                os.close(worker.ready_fd)
+            self.workers.pop(worker.pid, None)
+
+    @staticmethod
+    def _signal_worker(worker: Worker, signum):
+        try:
+            os.kill(worker.pid, signum)
+        except ProcessLookupError:
+            pass
+
+    @staticmethod
+    def _reap(pid: int) -> bool:
+        try:
+            reaped, _ = os.waitpid(pid, os.WNOHANG)
+        except ChildProcessError:
+            return True
+        return reaped == pid
+
+    def _rolling_restart(self):
+        server_logger.info("received SIGHUP, replacing %d worker(s) one at a time", len(self.workers))
+        for old in list(self.workers.values()):
+            if old.pid not in self.workers:
+                continue
+            replacement = self._spawn()
+            if not self._wait_ready([replacement]):
+                self._stop([replacement])
+                if not self._stop_requested():
+                    server_logger.error("replacement worker failed to start; keeping the remaining workers")
+                return
+            self._stop([old])
+        server_logger.info("rolling restart done: workers %s", sorted(self.workers))
+
+    def _replace_dead_workers(self) -> bool:
+        for worker in list(self.workers.values()):
+            try:
+                reaped, status = os.waitpid(worker.pid, os.WNOHANG)
+            except ChildProcessError:
+                reaped, status = worker.pid, 0
+            if reaped != worker.pid:
+                continue
+            del self.workers[worker.pid]
+            server_logger.warning(
+                "worker %d exited with status %d, starting a new one", worker.pid, os.waitstatus_to_exitcode(status)
+            )
+            if not self._wait_ready([self._spawn()]):
+                return False
+        return True
+
+
+def multi_worker_conflicts() -> list[str]:
+    """Enabled features that are wrong, not just weaker, when their state is per worker."""
+    conflicts = []
+    if settings.IDEMPOTENCY_ENABLED and settings.IDEMPOTENCY_BACKEND == "memory":
+        conflicts.append(
+            "IDEMPOTENCY_BACKEND=memory keeps stored responses per worker, so a retry that reaches"
+            " another worker runs the write again; set IDEMPOTENCY_BACKEND=database"
+        )
+    return conflicts
+
+
+def multi_worker_caveats() -> list[str]:
+    """Enabled features that only hold within a worker when their state is per worker."""
+    caveats = []
+    if settings.RATE_LIMIT_ENABLED:
+        caveats.append(
+            "rate limit buckets are per worker, so clients get up to that many times the RATE_LIMIT_* limits"
+        )
+    if settings.DATABASE_REPLICA_URLS and settings.DB_READ_YOUR_WRITES_SECONDS:
+        caveats.append(
+            "the read-your-writes pin is per worker, so a read served by another worker can miss"
+            " the user's own write until the replica catches up"
+        )
+    return caveats
+
+
+def serve(host: str, port: int, workers: int, forwarded_allow_ips: str) -> int:
+    """Run the app on workers processes (one per available CPU when 0); returns the exit status."""
+    conflicts = multi_worker_conflicts()
+    if not workers:
+        workers = available_cpus()
+        if workers > 1 and conflicts:
+            server_logger.warning("serving on 1 worker instead of %d: %s", workers, "; ".join(conflicts))
+            workers = 1
+    elif workers > 1 and conflicts:
+        server_logger.error("refusing to serve on %d workers: %s", workers, "; ".join(conflicts))
+        return 2
+    if workers > 1:
+        for caveat in multi_worker_caveats():
+            server_logger.warning("with %d workers, %s", workers, caveat)
+    config = uvicorn.Config(
+        "app.main:app",
+        host=host,
+        port=port,
+        # Pinned in requirements.txt; fail loudly rather than fall back to asyncio and h11
+        loop="uvloop",
+        http="httptools",
+        backlog=settings.SERVE_BACKLOG,
+        # Longer than the idle timeout of common load balancers (60s), so the
+        # server never closes a connection the balancer is about to reuse
+        timeout_keep_alive=settings.SERVE_KEEP_ALIVE_SECONDS,
+        timeout_graceful_shutdown=settings.SERVE_GRACEFUL_TIMEOUT_SECONDS,
+        access_log=settings.SERVE_ACCESS_LOG,
+        # Client addresses, which rate limits key on, from X-Forwarded-For
+        # when the connection comes from a trusted proxy
+        proxy_headers=True,
+        forwarded_allow_ips=forwarded_allow_ips,
+        lifespan="on",
+    )
+    supervisor = Supervisor(
+        config,
+        workers=workers,
+        ready_timeout=settings.SERVE_READY_TIMEOUT_SECONDS,
+        graceful_timeout=settings.SERVE_GRACEFUL_TIMEOUT_SECONDS,
+    )
+    return supervisor.run()
@@ -0,0 +1,217 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.models.task import Task, TaskArchive, TaskStatus
+from app.services.task_collection_service import TaskCollectionService
+from app.services.task_event_service import task_events
+from app.sharding import shard_router
+from app.utils.metrics import registry
+
+archive_logger = logging.getLogger("app.tasks.archive")
+
+task_archive_moves = registry.counter(
+    "task_archive_moves_total", "Tasks moved between the tasks table and the archive", ("direction",)
+)
+task_table_rows = registry.gauge(
+    "task_table_rows", "Rows of the task tables as of the last archive run", ("table",)
+)
+
+
+async def move_rows(source, target, conditions, db: AsyncSession, **values) -> list:
+    """Move the source rows matching conditions into target, in the caller's transaction.
+
+    Rows are deleted before they are inserted, so of several concurrent
+    moves of the same row only the one that deleted it inserts it.
+    Returns the moved rows.
+    """
+    columns = [
+        getattr(source, key) for key in target.__table__.columns.keys() if key in source.__table__.columns
+    ]
+    statement = delete(source).execution_options(synchronize_session=False)
+    if db.get_bind().dialect.delete_returning:
+        result = await db.execute(statement.where(*conditions).returning(*columns))
+        rows = result.all()
+    else:
+        result = await db.execute(select(*columns).where(*conditions).with_for_update())
+        rows = result.all()
+        if rows:
+            await db.execute(statement.where(source.id.in_([row.id for row in rows])))
+    if rows:
+        await db.execute(insert(target), [{**row._asdict(), **values} for row in rows])
+    return rows
+
+
+class TaskArchiveService:
+    @staticmethod
+    async def archive(
+        db: AsyncSession, older_than: datetime, batch_size: int = 1000, user_id=None
+    ) -> int:
+        """Move completed tasks last written before older_than into tasks_archive.
+
+        Walks the table by id in batches of batch_size, one transaction
+        each, and returns how many tasks were moved. Archived tasks are
+        still the user's tasks, so counters and delta sync are unaffected;
+        the collection version is bumped because the default task list
+        changed, and an empty change event is published for it.
+        """
+        archivable = [
+            Task.status == TaskStatus.completed,
+            Task.deleted_at.is_(None),
+            func.coalesce(Task.updated_at, Task.created_at) < older_than,
+            # SQLite hands out max(id) + 1; keeping the newest row in place
+            # means ids of archived tasks are never handed out again
+            Task.id < select(func.max(Task.id)).correlate(None).scalar_subquery(),
+        ]
+        if user_id is not None:
+            archivable.append(Task.user_id == user_id)
+        after = 0
+        moved = 0
+        while True:
+            result = await db.execute(
+                select(Task.id, Task.user_id)
+                .where(*archivable, Task.id > after)
+                .order_by(Task.id)
+                .limit(batch_size)
+            )
+            candidates = result.all()
+            if not candidates:
+                return moved
+            after = candidates[-1].id
+            # Versions first, like every other task write
+            versions = {
+                owner_id: await TaskCollectionService.bump_version(owner_id, db)
+                for owner_id in sorted({candidate.user_id for candidate in candidates})
+            }
+            rows = await move_rows(
+                Task,
+                TaskArchive,
+                [Task.id.in_([candidate.id for candidate in candidates]), *archivable],
+                db,
+                archived_at=datetime.now(timezone.utc),
+            )
+            await db.commit()
+            for owner_id, version in versions.items():
+                task_events.publish(owner_id, version, [])
+            task_archive_moves.inc("archived", amount=len(rows))
+            moved += len(rows)
+
+    @staticmethod
+    async def restore(user_id, task_ids, db: AsyncSession) -> int:
+        """Move the user's archived tasks back into tasks, in the caller's transaction.
+
+        Used by writes that did not find a task in tasks; the write then
+        stamps the restored rows with its version. Returns how many tasks
+        were restored.
+        """
+        rows = await move_rows(
+            TaskArchive,
+            Task,
+            [TaskArchive.user_id == user_id, TaskArchive.id.in_(task_ids)],
+            db,
+        )
+        task_archive_moves.inc("restored", amount=len(rows))
+        return len(rows)
+
+    @staticmethod
+    async def table_sizes(db: AsyncSession) -> dict:
+        """Rows of live tasks, deletion tombstones and archived tasks."""
+        tasks = await db.scalar(
+            select(func.count()).select_from(Task).where(Task.deleted_at.is_(None))
+        )
+        tombstones = await db.scalar(
+            select(func.count()).select_from(Task).where(Task.deleted_at.is_not(None))
+        )
+        archived = await db.scalar(select(func.count()).select_from(TaskArchive))
+        return {"tasks": tasks, "tombstones": tombstones, "archived": archived}
+
+
+class TaskArchiver:
+    """Archives completed tasks on every shard at a fixed interval.
+
+    Runs in every worker when TASK_ARCHIVE_ENABLED is set; concurrent runs
+    never move a task twice.
+    """
+
+    def __init__(self, after_days: float, interval_seconds: float, batch_size: int):
+        self.after_days = after_days
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.runs = 0
+        self.failures = 0
+        self.last_run = None
+        self._task = None
+
+    async def run_once(self) -> int:
+        older_than = datetime.now(timezone.utc) - timedelta(days=self.after_days)
+        started = time.perf_counter()
+        archived = 0
+        for shard in shard_router.shards:
+            async with shard.sessionmaker() as db:
+                archived += await TaskArchiveService.archive(db, older_than, self.batch_size)
+        seconds = time.perf_counter() - started
+        sizes = await self.table_sizes()
+        for table in ("tasks", "tombstones", "archived"):
+            task_table_rows.set(sum(shard_sizes[table] for shard_sizes in sizes), table)
+        self.runs += 1
+        self.last_run = {
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+            "archived": archived,
+            "seconds": round(seconds, 3),
+            "rows_per_second": round(archived / seconds, 1) if seconds else 0.0,
+        }
+        return archived
+
+    async def table_sizes(self) -> list[dict]:
+        sizes = []
+        for shard in shard_router.shards:
+            async with shard.sessionmaker() as db:
+                sizes.append({"shard": shard.index, **await TaskArchiveService.table_sizes(db)})
+        return sizes
+
+    async def _loop(self):
+        while True:
+            try:
+                archived = await self.run_once()
+                if archived:
+                    archive_logger.info("archived %d completed task(s)", archived)
+            except Exception:
+                self.failures += 1
+                archive_logger.exception("task archive run failed")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self):
+        if settings.TASK_ARCHIVE_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self):
+        return {
+            "enabled": settings.TASK_ARCHIVE_ENABLED,
+            "after_days": self.after_days,
+            "interval_seconds": self.interval_seconds,
+            "batch_size": self.batch_size,
+            "runs": self.runs,
+            "failures": self.failures,
+            "archived": task_archive_moves.value("archived"),
+            "restored": task_archive_moves.value("restored"),
+            "last_run": self.last_run,
+        }
+
+
+task_archiver = TaskArchiver(
+    after_days=settings.TASK_ARCHIVE_AFTER_DAYS,
+    interval_seconds=settings.TASK_ARCHIVE_INTERVAL_SECONDS,
+    batch_size=settings.TASK_ARCHIVE_BATCH_SIZE,
+)
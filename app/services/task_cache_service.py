@@ -0,0 +1,86 @@
+import hashlib
+import json
+from app.config import settings
+from app.utils.cache import (
+    CacheBackend,
+    KeyValueCacheBackend,
+    LocalKeyValueStore,
+    MemoryCacheBackend,
+    SingleFlight,
+)
+from app.utils.metrics import registry
+
+task_cache_requests = registry.counter(
+    "task_cache_requests_total", "Task cache lookups by result", ("result",)
+)
+
+
+def build_backend() -> CacheBackend:
+    if settings.TASK_CACHE_BACKEND == "local_kv":
+        return KeyValueCacheBackend(LocalKeyValueStore())
+    return MemoryCacheBackend(settings.TASK_CACHE_MAX_BYTES)
+
+
+# Replace with KeyValueCacheBackend(<shared client>) to share entries across workers
+task_cache_backend = build_backend()
+task_cache_flights = SingleFlight()
+
+
+def _namespace(user_id: int) -> str:
+    return f"tasks:{user_id}"
+
+
+class TaskCacheService:
+    """Serialized task pages and tasks, keyed by the user's collection version.
+
+    Every task write bumps the collection version, so keys built from the
+    version read in the caller's transaction can never return a stale page;
+    ``invalidate`` additionally frees the superseded entries right away.
+    Concurrent misses for the same key run one query.
+    """
+
+    @staticmethod
+    def page_key(user_id: int, version: int, params: dict) -> str:
+        digest = hashlib.sha256(
+            json.dumps(params, sort_keys=True, default=str).encode()
+        ).hexdigest()[:32]
+        return f"{_namespace(user_id)}:v{version}:page:{digest}"
+
+    @staticmethod
+    def task_key(user_id: int, version: int, task_id: int) -> str:
+        return f"{_namespace(user_id)}:v{version}:task:{task_id}"
+
+    @staticmethod
+    async def get_or_load(key: str, user_id: int, load) -> bytes:
+        """Return the cached value for key, running load() once on a miss."""
+        value = await task_cache_backend.get(key)
+        if value is not None:
+            task_cache_requests.inc("hit")
+            return value
+
+        async def load_and_store():
+            task_cache_requests.inc("miss")
+            loaded = await load()
+            await task_cache_backend.set(
+                key, loaded, settings.TASK_CACHE_TTL_SECONDS, namespace=_namespace(user_id)
+            )
+            return loaded
+
+        return await task_cache_flights.run(key, load_and_store)
+
+    @staticmethod
+    async def invalidate(user_id: int):
+        """Evict the user's entries after a write."""
+        if settings.TASK_CACHE_ENABLED:
+            await task_cache_backend.delete_namespace(_namespace(user_id))
+
+    @staticmethod
+    def stats() -> dict:
+        return {
+            "enabled": settings.TASK_CACHE_ENABLED,
+            "backend": type(task_cache_backend).__name__,
+            "hits": task_cache_requests.value("hit"),
+            "misses": task_cache_requests.value("miss"),
+            "coalesced": task_cache_flights.coalesced,
+            **task_cache_backend.stats(),
+        }
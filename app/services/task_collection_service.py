@@ -0,0 +1,256 @@
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, insert, delete, func
+from sqlalchemy.dialects import postgresql, sqlite
+from app.database import replica_router
+from app.models.task import Task, TaskArchive, TaskCollection, TaskDailyStats, TaskStatus
+from app.services.task_cache_service import TaskCacheService
+
+_UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _upsert_insert(db: AsyncSession):
+    """Dialect insert() supporting ON CONFLICT, or None if unavailable."""
+    dialect = db.get_bind().dialect
+    if dialect.insert_returning:
+        return _UPSERT_INSERTS.get(dialect.name)
+    return None
+
+
+def status_counts(statuses) -> dict:
+    """Counter deltas for tasks with the given statuses."""
+    statuses = [TaskStatus(task_status) for task_status in statuses]
+    return {
+        "pending": statuses.count(TaskStatus.pending),
+        "completed": statuses.count(TaskStatus.completed),
+    }
+
+
+def _utc_date(column, db: AsyncSession):
+    """The UTC calendar day of a timestamp column, whatever the session time zone."""
+    if db.get_bind().dialect.name == "postgresql":
+        return func.date(func.timezone("UTC", column))
+    # SQLite stores timestamps as UTC text
+    return func.date(column)
+
+
+class TaskCollectionService:
+    @staticmethod
+    async def bump_version(user_id, db: AsyncSession, pending=0, completed=0) -> int:
+        """Increment the user's collection version inside the caller's transaction.
+
+        pending/completed are added to the maintained status counters in the
+        same statement.
+        """
+        # Every task write passes through here; keep the user's reads on the primary
+        replica_router.mark_write(user_id)
+        # Cached entries are keyed by the old version and can no longer be served
+        await TaskCacheService.invalidate(user_id)
+        upsert = _upsert_insert(db)
+        if upsert is not None:
+            statement = upsert(TaskCollection).values(
+                user_id=user_id,
+                version=1,
+                pending_count=pending,
+                completed_count=completed,
+            )
+            statement = statement.on_conflict_do_update(
+                index_elements=[TaskCollection.user_id],
+                set_={
+                    "version": TaskCollection.version + 1,
+                    "pending_count": TaskCollection.pending_count + pending,
+                    "completed_count": TaskCollection.completed_count + completed,
+                },
+            ).returning(TaskCollection.version)
+            return await db.scalar(statement)
+        result = await db.execute(
+            update(TaskCollection)
+            .where(TaskCollection.user_id == user_id)
+            .values(
+                version=TaskCollection.version + 1,
+                pending_count=TaskCollection.pending_count + pending,
+                completed_count=TaskCollection.completed_count + completed,
+            )
+        )
+        if not result.rowcount:
+            await db.execute(
+                insert(TaskCollection).values(
+                    user_id=user_id,
+                    version=1,
+                    pending_count=pending,
+                    completed_count=completed,
+                )
+            )
+        return await TaskCollectionService.get_version(user_id, db)
+
+    @staticmethod
+    async def apply_counts(user_id, db: AsyncSession, pending=0, completed=0):
+        """Adjust status counters after a write whose effect was only known afterwards."""
+        if not pending and not completed:
+            return
+        await db.execute(
+            update(TaskCollection)
+            .where(TaskCollection.user_id == user_id)
+            .values(
+                pending_count=TaskCollection.pending_count + pending,
+                completed_count=TaskCollection.completed_count + completed,
+            )
+        )
+
+    @staticmethod
+    async def record_created(user_id, db: AsyncSession, count: int):
+        """Add count to today's (UTC) created-task counter."""
+        today = datetime.now(timezone.utc).date()
+        upsert = _upsert_insert(db)
+        if upsert is not None:
+            statement = upsert(TaskDailyStats).values(
+                user_id=user_id, day=today, created_count=count
+            )
+            await db.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[TaskDailyStats.user_id, TaskDailyStats.day],
+                    set_={"created_count": TaskDailyStats.created_count + count},
+                )
+            )
+            return
+        result = await db.execute(
+            update(TaskDailyStats)
+            .where(TaskDailyStats.user_id == user_id, TaskDailyStats.day == today)
+            .values(created_count=TaskDailyStats.created_count + count)
+        )
+        if not result.rowcount:
+            await db.execute(
+                insert(TaskDailyStats).values(user_id=user_id, day=today, created_count=count)
+            )
+
+    @staticmethod
+    async def record_deleted(user_id, db: AsyncSession, created_ats):
+        """Take deleted tasks out of the counters of the days they were created on."""
+        per_day = {}
+        for created_at in created_ats:
+            if created_at.tzinfo is not None:
+                created_at = created_at.astimezone(timezone.utc)
+            per_day[created_at.date()] = per_day.get(created_at.date(), 0) + 1
+        for day, count in per_day.items():
+            await db.execute(
+                update(TaskDailyStats)
+                .where(TaskDailyStats.user_id == user_id, TaskDailyStats.day == day)
+                .values(created_count=TaskDailyStats.created_count - count)
+            )
+
+    @staticmethod
+    async def get_version(user_id, db: AsyncSession) -> int:
+        version = await db.scalar(
+            select(TaskCollection.version).where(TaskCollection.user_id == user_id)
+        )
+        return version or 0
+
+    @staticmethod
+    async def get_stats(user_id, db: AsyncSession, days: int):
+        collection = await db.get(TaskCollection, user_id)
+        pending = collection.pending_count if collection else 0
+        completed = collection.completed_count if collection else 0
+        since = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+        result = await db.execute(
+            select(TaskDailyStats.day, TaskDailyStats.created_count)
+            .where(TaskDailyStats.user_id == user_id, TaskDailyStats.day >= since)
+            .order_by(TaskDailyStats.day)
+        )
+        total = pending + completed
+        return {
+            "counts": {"pending": pending, "completed": completed},
+            "total": total,
+            "completion_rate": completed / total if total else 0.0,
+            "created_per_day": [
+                {"day": day, "count": count} for day, count in result.all()
+            ],
+        }
+
+    @staticmethod
+    async def reconcile(db: AsyncSession, user_id=None) -> int:
+        """Recompute counters from the task tables; returns the number of users fixed up.
+
+        Each user is recomputed in its own transaction holding their
+        collection row lock, which every task write takes first in
+        bump_version, so no write can commit between the counts and the
+        counters being set from them.
+        """
+        if user_id is not None:
+            owner_ids = [user_id]
+        else:
+            result = await db.execute(
+                select(Task.user_id)
+                .union(select(TaskArchive.user_id), select(TaskCollection.user_id))
+            )
+            owner_ids = sorted(result.scalars().all())
+            await db.commit()
+        for owner_id in owner_ids:
+            await TaskCollectionService._reconcile_user(owner_id, db)
+        return len(owner_ids)
+
+    @staticmethod
+    async def _reconcile_user(user_id, db: AsyncSession):
+        await TaskCollectionService._lock_collection(user_id, db)
+        # Archived tasks are counted, tombstones of deleted tasks are not
+        sources = [
+            (Task, [Task.user_id == user_id, Task.deleted_at.is_(None)]),
+            (TaskArchive, [TaskArchive.user_id == user_id]),
+        ]
+        counts = {"pending": 0, "completed": 0}
+        per_day = {}
+        for model, scope in sources:
+            result = await db.execute(
+                select(model.status, func.count()).where(*scope).group_by(model.status)
+            )
+            for task_status, count in result.all():
+                counts[TaskStatus(task_status).value] += count
+            created_day = _utc_date(model.created_at, db)
+            result = await db.execute(
+                select(created_day, func.count()).where(*scope).group_by(created_day)
+            )
+            for day, count in result.all():
+                day = day if isinstance(day, date) else date.fromisoformat(day)
+                per_day[day] = per_day.get(day, 0) + count
+        await db.execute(
+            update(TaskCollection)
+            .where(TaskCollection.user_id == user_id)
+            .values(pending_count=counts["pending"], completed_count=counts["completed"])
+        )
+        await db.execute(delete(TaskDailyStats).where(TaskDailyStats.user_id == user_id))
+        if per_day:
+            await db.execute(
+                insert(TaskDailyStats),
+                [
+                    {"user_id": user_id, "day": day, "created_count": count}
+                    for day, count in per_day.items()
+                ],
+            )
+        await db.commit()
+
+    @staticmethod
+    async def _lock_collection(user_id, db: AsyncSession):
+        """Create the user's collection row if needed and hold its lock until the transaction ends."""
+        # Writing the row takes the lock on PostgreSQL and the database lock on SQLite
+        result = await db.execute(
+            update(TaskCollection)
+            .where(TaskCollection.user_id == user_id)
+            .values(version=TaskCollection.version)
+        )
+        if result.rowcount:
+            return
+        upsert = _upsert_insert(db)
+        if upsert is not None:
+            await db.execute(
+                upsert(TaskCollection)
+                .values(user_id=user_id, version=0, pending_count=0, completed_count=0)
+                .on_conflict_do_update(
+                    index_elements=[TaskCollection.user_id],
+                    set_={"version": TaskCollection.version},
+                )
+            )
+        else:
+            await db.execute(
+                insert(TaskCollection).values(
+                    user_id=user_id, version=0, pending_count=0, completed_count=0
+                )
+            )
@@ -0,0 +1,174 @@
+import asyncio
+import json
+from collections import OrderedDict, deque
+from app.config import settings
+from app.services.task_collection_service import TaskCollectionService
+from app.sharding import shard_router
+from app.utils.metrics import registry
+from app.utils.serialization import task_change_event_adapter
+
+task_events_published = registry.counter(
+    "task_events_published_total", "Task change events published to subscribers"
+)
+task_events_resyncs = registry.counter(
+    "task_events_resyncs_total", "Resync events sent instead of deltas", ("reason",)
+)
+
+
+class Subscription:
+    """One connected change feed with a bounded buffer of pending events."""
+
+    def __init__(self, user_id: int, buffer_size: int):
+        self.user_id = user_id
+        self.queue = asyncio.Queue(maxsize=buffer_size)
+        self.overflowed = False
+
+
+class TaskEventBroker:
+    """In-process fan-out of task change events to connected feeds.
+
+    Each event is serialized once and shared by every subscriber. A
+    subscriber whose buffer is full stops receiving events and is told to
+    resync instead of slowing publishers down. The last ``history_size``
+    events per user are kept so a reconnecting client can resume from the
+    version it last saw.
+    """
+
+    def __init__(self, buffer_size: int, history_size: int, history_users: int):
+        self.buffer_size = buffer_size
+        self.history_size = history_size
+        self.history_users = history_users
+        self.dropped = 0
+        self._subscribers = {}
+        self._history = OrderedDict()
+
+    def publish(self, user_id: int, version: int, changes: list[dict]):
+        data = task_change_event_adapter.dump_json({"version": version, "changes": changes})
+        history = self._history.pop(user_id, None) or deque(maxlen=self.history_size)
+        history.append((version, data))
+        self._history[user_id] = history
+        while len(self._history) > self.history_users:
+            self._history.popitem(last=False)
+        for subscription in self._subscribers.get(user_id, ()):
+            if subscription.overflowed:
+                continue
+            try:
+                subscription.queue.put_nowait((version, data))
+            except asyncio.QueueFull:
+                subscription.overflowed = True
+                self.dropped += 1
+        task_events_published.inc()
+
+    def subscribe(self, user_id: int) -> Subscription:
+        subscription = Subscription(user_id, self.buffer_size)
+        self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscribers = self._subscribers.get(subscription.user_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.user_id]
+
+    def replay(self, user_id: int, since: int, current: int):
+        """Buffered events after since, or None if any version up to current is missing."""
+        events = [event for event in self._history.get(user_id, ()) if event[0] > since]
+        versions = [version for version, _ in events]
+        if versions != list(range(since + 1, current + 1)):
+            return None
+        return events
+
+    def stats(self):
+        return {
+            "connections": sum(len(subscribers) for subscribers in self._subscribers.values()),
+            "users": len(self._subscribers),
+            "history_users": len(self._history),
+            "buffer_size": self.buffer_size,
+            "history_size": self.history_size,
+            "dropped": self.dropped,
+        }
+
+
+task_events = TaskEventBroker(
+    buffer_size=settings.TASK_EVENTS_BUFFER_SIZE,
+    history_size=settings.TASK_EVENTS_HISTORY_SIZE,
+    history_users=settings.TASK_EVENTS_HISTORY_USERS,
+)
+
+
+def _sse(event: str, version: int, data: bytes) -> bytes:
+    return b"id: %d\nevent: %s\ndata: %s\n\n" % (version, event.encode(), data)
+
+
+def _resync(version: int, reason: str) -> bytes:
+    task_events_resyncs.inc(reason)
+    return _sse("resync", version, json.dumps({"version": version, "reason": reason}).encode())
+
+
+async def _current_version(user_id: int) -> int:
+    # A short session per check; a feed must not hold a pooled connection open
+    async with shard_router.session(user_id) as db:
+        return await TaskCollectionService.get_version(user_id, db)
+
+
+class TaskEventService:
+    @staticmethod
+    async def stream(user_id: int, since: int | None):
+        """Server-sent events for the user's task changes.
+
+        ``ready`` carries the version the feed starts from, ``changes``
+        carries one committed version's deltas, and ``resync`` tells the
+        client that deltas were missed and it must refetch its tasks. Every
+        event id is a collection version, usable as ``since`` on reconnect.
+        """
+        # Subscribe before reading the version so nothing committed after it is missed
+        subscription = task_events.subscribe(user_id)
+        getter = None
+        try:
+            current = await _current_version(user_id)
+            last = current
+            if since is not None and since != current:
+                replayed = task_events.replay(user_id, since, current) if since < current else None
+                if replayed is None:
+                    yield _resync(current, "history")
+                else:
+                    for version, data in replayed:
+                        yield _sse("changes", version, data)
+            yield _sse("ready", last, json.dumps({"version": last}).encode())
+
+            while True:
+                if subscription.overflowed:
+                    while not subscription.queue.empty():
+                        subscription.queue.get_nowait()
+                    subscription.overflowed = False
+                    last = await _current_version(user_id)
+                    yield _resync(last, "overflow")
+                    continue
+                if getter is None:
+                    # Kept across keepalives; cancelling a get() on timeout can lose an event
+                    getter = asyncio.ensure_future(subscription.queue.get())
+                done, _ = await asyncio.wait({getter}, timeout=settings.TASK_EVENTS_KEEPALIVE_SECONDS)
+                if not done:
+                    # Writes handled by other workers are only visible in the database
+                    current = await _current_version(user_id)
+                    if current > last:
+                        last = current
+                        yield _resync(current, "external")
+                    else:
+                        yield b": keepalive\n\n"
+                    continue
+                version, data = getter.result()
+                getter = None
+                if version <= last:
+                    continue
+                if version > last + 1:
+                    last = version
+                    yield _resync(version, "gap")
+                    continue
+                last = version
+                yield _sse("changes", version, data)
+        finally:
+            if getter is not None:
+                getter.cancel()
+            task_events.unsubscribe(subscription)
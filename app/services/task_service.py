@@ -1,7 +1,96 @@
+import csv
+import io
+import re
+from datetime import datetime, timezone
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from app.models.task import Task
+from sqlalchemy import select, insert, update, delete, tuple_, or_, func, table, column, literal_column, null, union_all
+from app.config import settings
+from app.models.task import Task, TaskArchive, TaskCollection
+from app.services.task_archive_service import TaskArchiveService
+from app.services.task_cache_service import TaskCacheService
+from app.services.task_collection_service import TaskCollectionService, status_counts
+from app.services.task_event_service import task_events
+from app.sharding import shard_router, task_ids
+from app.utils.etag import task_etag
+from app.utils.pagination import (
+    encode_cursor,
+    decode_cursor,
+    encode_change_cursor,
+    decode_change_cursor,
+    encode_offset,
+    decode_offset,
+)
+from app.utils.serialization import task_adapter, task_page_adapter
+
+# Columns of TaskResponse, read as plain rows for the fast serialization path
+TASK_COLUMNS = (
+    Task.title,
+    Task.description,
+    Task.status,
+    Task.id,
+    Task.user_id,
+    Task.created_at,
+    Task.updated_at,
+    Task.version,
+)
+ARCHIVE_COLUMNS = tuple(getattr(TaskArchive, column.key) for column in TASK_COLUMNS)
+
+tasks_fts = table("tasks_fts", column("rowid"), column("rank"))
+# Deepest search result reachable by paging; every page ranks and skips all
+# the matches before it
+SEARCH_MAX_OFFSET = 1000
+
+
+def upsert_change(task) -> dict:
+    """Change event entry for a created or updated Task."""
+    return {
+        "op": "upsert",
+        "id": task.id,
+        "task": {column.key: getattr(task, column.key) for column in TASK_COLUMNS},
+    }
+
+
+def delete_change(task_id: int) -> dict:
+    return {"op": "delete", "id": task_id}
+
+
+def live_tasks(user_id):
+    """WHERE conditions for a user's tasks, excluding deletion tombstones."""
+    return [Task.user_id == user_id, Task.deleted_at.is_(None)]
+
+
+def task_filters(user_id, task_status=None, created_after=None, created_before=None, model=Task):
+    """WHERE conditions shared by every listing of a user's tasks, on Task or TaskArchive."""
+    conditions = live_tasks(user_id) if model is Task else [model.user_id == user_id]
+    if task_status is not None:
+        conditions.append(model.status == task_status)
+    if created_after is not None:
+        conditions.append(model.created_at > created_after)
+    if created_before is not None:
+        conditions.append(model.created_at < created_before)
+    return conditions
+
+
+def newest_first(columns):
+    return columns.created_at.desc(), columns.id.desc()
+
+
+def oldest_change_first(columns):
+    return columns.version, columns.id
+
+
+def union_ordered(queries, order, limit=None):
+    """Rows of all queries in the order given by order(columns).
+
+    With a limit, each query is ordered and limited on its own first, so
+    every branch reads at most limit rows through its own index.
+    """
+    if limit is not None:
+        queries = [select(query.limit(limit).subquery()) for query in queries]
+    merged = union_all(*queries).subquery()
+    query = select(merged).order_by(*order(merged.c))
+    return query.limit(limit) if limit is not None else query
 
 
 class TaskService:
@@ -12,32 +101,189 @@ class TaskService:
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Status must be 'pending' or 'completed'",
             )
-        db_task = Task(
-            title=task_create.title,
-            description=task_create.description,
-            status=task_create.status,
-            user_id=current_user.id,
+        values = {
+            "title": task_create.title,
+            "description": task_create.description,
+            "status": task_create.status.value,
+            "user_id": current_user.id,
+        }
+        ids = await TaskService.allocate_ids(1)
+        if ids:
+            (values["id"],) = ids
+        values["version"] = await TaskCollectionService.bump_version(
+            current_user.id, db, **status_counts([values["status"]])
         )
-        db.add(db_task)
-        await db.commit()
-        await db.refresh(db_task)
+        await TaskCollectionService.record_created(current_user.id, db, 1)
+        if db.get_bind().dialect.insert_returning:
+            db_task = await db.scalar(insert(Task).values(**values).returning(Task))
+            await db.commit()
+        else:
+            db_task = Task(**values)
+            db.add(db_task)
+            await db.commit()
+            await db.refresh(db_task)
+        task_events.publish(current_user.id, db_task.version, [upsert_change(db_task)])
         return db_task
 
     @staticmethod
-    async def get_tasks(current_user, db: AsyncSession):
-        result = await db.execute(
-            select(Task)
-            .where(Task.user_id == current_user.id)
-            .order_by(Task.created_at.desc())
+    async def get_tasks(
+        current_user,
+        db: AsyncSession,
+        limit: int = 50,
+        cursor: str | None = None,
+        task_status: str | None = None,
+        created_after=None,
+        created_before=None,
+        include_archived: bool = False,
+    ):
+        def page(model, columns):
+            query = select(*columns).where(
+                *task_filters(current_user.id, task_status, created_after, created_before, model)
+            )
+            if cursor is not None:
+                query = query.where(
+                    tuple_(model.created_at, model.id) < decode_cursor(cursor)
+                )
+            return query.order_by(*newest_first(model))
+
+        if include_archived:
+            query = union_ordered(
+                [page(Task, TASK_COLUMNS), page(TaskArchive, ARCHIVE_COLUMNS)], newest_first, limit + 1
+            )
+        else:
+            query = page(Task, TASK_COLUMNS).limit(limit + 1)
+        result = await db.execute(query)
+        tasks = result.all()
+        next_cursor = None
+        if len(tasks) > limit:
+            tasks = tasks[:limit]
+            next_cursor = encode_cursor(tasks[-1].created_at, tasks[-1].id)
+        return tasks, next_cursor
+
+    @staticmethod
+    async def get_tasks_json(current_user, db: AsyncSession, version: int, **params) -> bytes:
+        """Serialized get_tasks page, served from the task cache when present.
+
+        version must be the collection version read in this session.
+        """
+
+        async def load():
+            tasks, next_cursor = await TaskService.get_tasks(current_user, db, **params)
+            return task_page_adapter.dump_json(
+                {"items": [task._asdict() for task in tasks], "next_cursor": next_cursor}
+            )
+
+        key = TaskCacheService.page_key(current_user.id, version, params)
+        return await TaskCacheService.get_or_load(key, current_user.id, load)
+
+    @staticmethod
+    async def export_tasks(
+        user_id,
+        export_format: str,
+        task_status: str | None = None,
+        created_after=None,
+        created_before=None,
+        include_archived: bool = False,
+    ):
+        """Yield encoded chunks of the user's tasks with constant memory.
+
+        Opens its own session because request-scoped sessions are closed
+        before a StreamingResponse body is sent.
+        """
+        query = select(*TASK_COLUMNS).where(
+            *task_filters(user_id, task_status, created_after, created_before)
         )
-        return result.scalars().all()
+        if include_archived:
+            archived = select(*ARCHIVE_COLUMNS).where(
+                *task_filters(user_id, task_status, created_after, created_before, TaskArchive)
+            )
+            query = union_ordered([query, archived], newest_first)
+        else:
+            query = query.order_by(*newest_first(Task))
+        query = query.execution_options(yield_per=settings.TASK_EXPORT_CHUNK_SIZE)
+        columns = [column.key for column in TASK_COLUMNS]
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            yield buffer.getvalue().encode()
+        async with shard_router.session(user_id) as session:
+            result = await session.stream(query)
+            async for rows in result.partitions():
+                if export_format == "csv":
+                    buffer.seek(0)
+                    buffer.truncate()
+                    writer.writerows(
+                        [
+                            value.value if column == "status" else
+                            value.isoformat() if isinstance(value, datetime) else value
+                            for column, value in zip(columns, row)
+                        ]
+                        for row in rows
+                    )
+                    yield buffer.getvalue().encode()
+                else:
+                    yield b"".join(
+                        task_adapter.dump_json(row._asdict()) + b"\n" for row in rows
+                    )
+
+    @staticmethod
+    async def search_tasks(
+        query_text: str,
+        current_user,
+        db: AsyncSession,
+        limit: int = 50,
+        cursor: str | None = None,
+    ):
+        offset = decode_offset(cursor, SEARCH_MAX_OFFSET) if cursor else 0
+        terms = re.findall(r"\w+", query_text)
+        if not terms:
+            return [], None
+        query = select(*TASK_COLUMNS).where(*live_tasks(current_user.id))
+        dialect = db.get_bind().dialect.name
+        if dialect == "sqlite":
+            # Quote every term so user input cannot inject FTS5 query syntax
+            match = " ".join(f'"{term}"*' for term in terms)
+            query = (
+                query.join(tasks_fts, tasks_fts.c.rowid == Task.id)
+                .where(literal_column("tasks_fts").op("MATCH")(match))
+                .order_by(tasks_fts.c.rank, Task.id.desc())
+            )
+        elif dialect == "postgresql":
+            search_vector = literal_column("tasks.search_vector")
+            ts_query = func.plainto_tsquery("simple", " ".join(terms))
+            query = query.where(search_vector.op("@@")(ts_query)).order_by(
+                func.ts_rank(search_vector, ts_query).desc(), Task.id.desc()
+            )
+        else:
+            # Match the text literally: escape LIKE wildcards in user input
+            escaped = re.sub(r"([\\%_])", r"\\\1", query_text)
+            pattern = f"%{escaped}%"
+            query = query.where(
+                or_(Task.title.ilike(pattern, escape="\\"), Task.description.ilike(pattern, escape="\\"))
+            ).order_by(Task.created_at.desc(), Task.id.desc())
+        result = await db.execute(query.limit(limit + 1).offset(offset))
+        tasks = result.all()
+        next_cursor = None
+        if len(tasks) > limit:
+            tasks = tasks[:limit]
+            if offset + limit <= SEARCH_MAX_OFFSET:
+                next_cursor = encode_offset(offset + limit)
+        return tasks, next_cursor
 
     @staticmethod
     async def get_task(task_id, current_user, db: AsyncSession):
         result = await db.execute(
-            select(Task).where(Task.id == task_id, Task.user_id == current_user.id)
+            select(*TASK_COLUMNS).where(Task.id == task_id, *live_tasks(current_user.id))
         )
-        task = result.scalars().first()
+        task = result.first()
+        if not task:
+            result = await db.execute(
+                select(*ARCHIVE_COLUMNS).where(
+                    TaskArchive.id == task_id, TaskArchive.user_id == current_user.id
+                )
+            )
+            task = result.first()
         if not task:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Task not found"
@@ -45,40 +291,463 @@ class TaskService:
         return task
 
     @staticmethod
-    async def update_task(task_id, task_update, current_user, db: AsyncSession):
-        result = await db.execute(
-            select(Task).where(Task.id == task_id, Task.user_id == current_user.id)
+    async def get_task_json(task_id, current_user, db: AsyncSession, version: int) -> tuple[str, bytes]:
+        """(ETag, serialized task), served from the task cache when present."""
+
+        async def load():
+            task = await TaskService.get_task(task_id, current_user, db)
+            etag = task_etag(task.id, task.version)
+            return etag.encode() + b"\n" + task_adapter.dump_json(task._asdict())
+
+        key = TaskCacheService.task_key(current_user.id, version, task_id)
+        etag, _, body = (await TaskCacheService.get_or_load(key, current_user.id, load)).partition(b"\n")
+        return etag.decode(), body
+
+    @staticmethod
+    async def get_task_version(task_id, current_user, db: AsyncSession):
+        version = await db.scalar(
+            select(Task.version).where(Task.id == task_id, *live_tasks(current_user.id))
         )
-        task = result.scalars().first()
-        if not task:
+        if version is None:
+            version = await db.scalar(
+                select(TaskArchive.version).where(
+                    TaskArchive.id == task_id, TaskArchive.user_id == current_user.id
+                )
+            )
+        if version is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Task not found"
             )
-        if task_update.title is not None:
-            task.title = task_update.title
-        if task_update.description is not None:
-            task.description = task_update.description
-        if task_update.status is not None:
+        return version
+
+    @staticmethod
+    async def update_task(
+        task_id, task_update, current_user, db: AsyncSession, expected_versions=None
+    ):
+        values = task_update.model_dump(exclude_none=True)
+        if "status" in values:
             if task_update.status not in ["pending", "completed"]:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="Status must be 'pending' or 'completed'",
                 )
-            task.status = task_update.status
+            values["status"] = task_update.status.value
+        if not values:
+            task = await TaskService.get_task(task_id, current_user, db)
+            if expected_versions is not None and task.version not in expected_versions:
+                raise HTTPException(
+                    status_code=status.HTTP_412_PRECONDITION_FAILED,
+                    detail="Task has been modified",
+                )
+            return task
+        values["version"] = await TaskCollectionService.bump_version(current_user.id, db)
+        values["updated_at"] = datetime.now(timezone.utc)
+        statement = (
+            update(Task)
+            .where(Task.id == task_id, *live_tasks(current_user.id))
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if expected_versions is not None:
+            statement = statement.where(Task.version.in_(expected_versions))
+        task = await TaskService._apply_update(statement, values, task_id, current_user, db)
+        if task is None and await TaskArchiveService.restore(current_user.id, [task_id], db):
+            # Written tasks are hot again
+            task = await TaskService._apply_update(statement, values, task_id, current_user, db)
+        if not task:
+            if expected_versions is not None:
+                # Distinguish a stale If-Match from a missing task
+                await TaskService.get_task_version(task_id, current_user, db)
+                raise HTTPException(
+                    status_code=status.HTTP_412_PRECONDITION_FAILED,
+                    detail="Task has been modified",
+                )
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Task not found"
+            )
         await db.commit()
-        await db.refresh(task)
+        task_events.publish(current_user.id, values["version"], [upsert_change(task)])
         return task
 
     @staticmethod
-    async def delete_task(task_id, current_user, db: AsyncSession):
+    async def _apply_update(statement, values, task_id, current_user, db: AsyncSession):
+        """Run the UPDATE built by update_task, keeping the status counters in step."""
+        if "status" in values:
+            # There are only two statuses, so matching a row whose status
+            # differs from the new one means the task moved between counters.
+            task = await TaskService._execute_update(
+                statement.where(Task.status != values["status"]), task_id, db
+            )
+            if task is not None:
+                counts = status_counts([values["status"]])
+                await TaskCollectionService.apply_counts(
+                    current_user.id,
+                    db,
+                    pending=counts["pending"] - counts["completed"],
+                    completed=counts["completed"] - counts["pending"],
+                )
+                return task
+        return await TaskService._execute_update(statement, task_id, db)
+
+    @staticmethod
+    async def _execute_update(statement, task_id, db: AsyncSession):
+        """Run an UPDATE on one task and return the updated task, or None."""
+        if db.get_bind().dialect.update_returning:
+            return await db.scalar(statement.returning(Task))
+        result = await db.execute(statement)
+        if not result.rowcount:
+            return None
+        return await db.get(Task, task_id, populate_existing=True)
+
+    @staticmethod
+    async def _delete_returning(conditions, version: int, db: AsyncSession):
+        """Turn matching live tasks into tombstones, returning (id, status, created_at) of each.
+
+        Tombstones keep the deleting version so delta sync can report them;
+        compact_tombstones removes them for good.
+        """
+        statement = (
+            update(Task)
+            .where(*conditions, Task.deleted_at.is_(None))
+            .values(deleted_at=datetime.now(timezone.utc), version=version)
+            .execution_options(synchronize_session=False)
+        )
+        if db.get_bind().dialect.update_returning:
+            result = await db.execute(
+                statement.returning(Task.id, Task.status, Task.created_at)
+            )
+            return result.all()
         result = await db.execute(
-            select(Task).where(Task.id == task_id, Task.user_id == current_user.id)
+            select(Task.id, Task.status, Task.created_at)
+            .where(*conditions, Task.deleted_at.is_(None))
+            .with_for_update()
         )
-        task = result.scalars().first()
-        if not task:
+        deleted = result.all()
+        if deleted:
+            await db.execute(statement)
+        return deleted
+
+    @staticmethod
+    async def _record_deleted(deleted, current_user, db: AsyncSession):
+        counts = status_counts([task.status for task in deleted])
+        await TaskCollectionService.apply_counts(
+            current_user.id, db, pending=-counts["pending"], completed=-counts["completed"]
+        )
+        await TaskCollectionService.record_deleted(
+            current_user.id, db, [task.created_at for task in deleted]
+        )
+
+    @staticmethod
+    async def delete_task(task_id, current_user, db: AsyncSession):
+        version = await TaskCollectionService.bump_version(current_user.id, db)
+        conditions = [Task.id == task_id, Task.user_id == current_user.id]
+        deleted = await TaskService._delete_returning(conditions, version, db)
+        if not deleted and await TaskArchiveService.restore(current_user.id, [task_id], db):
+            deleted = await TaskService._delete_returning(conditions, version, db)
+        if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Task not found"
             )
-        await db.delete(task)
+        await TaskService._record_deleted(deleted, current_user, db)
         await db.commit()
+        task_events.publish(current_user.id, version, [delete_change(task_id)])
         return None
+
+    @staticmethod
+    async def create_tasks(task_creates, current_user, db: AsyncSession):
+        ids = await TaskService.allocate_ids(len(task_creates))
+        version = await TaskCollectionService.bump_version(
+            current_user.id,
+            db,
+            **status_counts([task_create.status.value for task_create in task_creates]),
+        )
+        await TaskCollectionService.record_created(current_user.id, db, len(task_creates))
+        rows = [
+            {
+                "title": task_create.title,
+                "description": task_create.description,
+                "status": task_create.status.value,
+                "user_id": current_user.id,
+                "version": version,
+            }
+            for task_create in task_creates
+        ]
+        tasks = await TaskService.insert_rows(rows, db, ids)
+        await db.commit()
+        task_events.publish(current_user.id, version, [upsert_change(task) for task in tasks])
+        return [
+            {"index": index, "status_code": status.HTTP_201_CREATED, "id": task.id, "task": task}
+            for index, task in enumerate(tasks)
+        ]
+
+    @staticmethod
+    async def allocate_ids(count: int) -> list[int] | None:
+        """Ids for count new tasks when sharded, None when the database assigns them.
+
+        Call before the shard's write transaction starts: the reservation
+        commits on the primary, which can be the same SQLite database as
+        shard 0 and would wait on that transaction's lock.
+        """
+        return await task_ids.allocate(count) if shard_router.sharded else None
+
+    @staticmethod
+    async def insert_rows(rows, db: AsyncSession, ids: list[int] | None = None):
+        """Insert task rows with one multi-row statement; returns Tasks in row order."""
+        if ids is not None:
+            for row, task_id in zip(rows, ids):
+                row["id"] = task_id
+        if db.get_bind().dialect.insert_executemany_returning:
+            result = await db.scalars(
+                insert(Task).returning(Task, sort_by_parameter_order=True), rows
+            )
+            return result.all()
+        tasks = [Task(**row) for row in rows]
+        db.add_all(tasks)
+        await db.flush()
+        # Load server defaults such as created_at for the new rows
+        await db.scalars(
+            select(Task)
+            .where(Task.id.in_([task.id for task in tasks]))
+            .execution_options(populate_existing=True)
+        )
+        return tasks
+
+    @staticmethod
+    async def update_tasks(task_updates, current_user, db: AsyncSession):
+        ids = {task_update.id for task_update in task_updates}
+        # Items carrying a field besides the id
+        writes = {
+            task_update.id
+            for task_update in task_updates
+            if len(task_update.model_dump(exclude_none=True)) > 1
+        }
+        if not writes or not await TaskService._owns_any(writes, current_user, db):
+            # Nothing to write: answer from the current rows without bumping the
+            # version, which would invalidate cached pages and ETags
+            tasks = await TaskService._current_tasks(ids, current_user, db)
+            return TaskService._update_results(task_updates, tasks)
+        version = await TaskCollectionService.bump_version(current_user.id, db)
+        owned_tasks = (
+            select(Task.id, Task.status)
+            .where(*live_tasks(current_user.id), Task.id.in_(ids))
+            .with_for_update()
+        )
+        result = await db.execute(owned_tasks)
+        statuses = {task_id: task_status.value for task_id, task_status in result.all()}
+        if len(statuses) < len(ids) and await TaskArchiveService.restore(
+            current_user.id, ids - statuses.keys(), db
+        ):
+            result = await db.execute(owned_tasks)
+            statuses = {task_id: task_status.value for task_id, task_status in result.all()}
+        owned = set(statuses)
+        old_statuses = list(statuses.values())
+        params = []
+        for task_update in task_updates:
+            values = task_update.model_dump(exclude_none=True)
+            if task_update.id in owned and len(values) > 1:
+                if "status" in values:
+                    values["status"] = values["status"].value
+                    statuses[task_update.id] = values["status"]
+                params.append(values)
+        if params:
+            updated_at = datetime.now(timezone.utc)
+            for values in params:
+                values.update(version=version, updated_at=updated_at)
+            await db.execute(update(Task), params)
+            before = status_counts(old_statuses)
+            after = status_counts(statuses.values())
+            await TaskCollectionService.apply_counts(
+                current_user.id,
+                db,
+                pending=after["pending"] - before["pending"],
+                completed=after["completed"] - before["completed"],
+            )
+        result = await db.scalars(
+            select(Task).where(Task.id.in_(owned)).execution_options(populate_existing=True)
+        )
+        tasks = {task.id: task for task in result}
+        if params:
+            await db.commit()
+            changed = dict.fromkeys(values["id"] for values in params)
+            task_events.publish(current_user.id, version, [upsert_change(tasks[task_id]) for task_id in changed])
+        else:
+            # The tasks went away after _owns_any: give back the version bump
+            # and any restore from the archive
+            for task in tasks.values():
+                db.expunge(task)
+            await db.rollback()
+        return TaskService._update_results(task_updates, tasks)
+
+    @staticmethod
+    async def _owns_any(task_ids, current_user, db: AsyncSession) -> bool:
+        """Whether any of task_ids is a live or archived task of the user."""
+        live = await db.scalar(
+            select(Task.id).where(*live_tasks(current_user.id), Task.id.in_(task_ids)).limit(1)
+        )
+        if live is not None:
+            return True
+        archived = await db.scalar(
+            select(TaskArchive.id)
+            .where(TaskArchive.user_id == current_user.id, TaskArchive.id.in_(task_ids))
+            .limit(1)
+        )
+        return archived is not None
+
+    @staticmethod
+    async def _current_tasks(task_ids, current_user, db: AsyncSession) -> dict:
+        """The user's live and archived tasks among task_ids, by id."""
+        result = await db.execute(
+            union_all(
+                select(*TASK_COLUMNS).where(*live_tasks(current_user.id), Task.id.in_(task_ids)),
+                select(*ARCHIVE_COLUMNS).where(
+                    TaskArchive.user_id == current_user.id, TaskArchive.id.in_(task_ids)
+                ),
+            )
+        )
+        return {task.id: task for task in result.all()}
+
+    @staticmethod
+    def _update_results(task_updates, tasks: dict) -> list[dict]:
+        return [
+            {"index": index, "status_code": status.HTTP_200_OK, "id": task_update.id, "task": tasks[task_update.id]}
+            if task_update.id in tasks
+            else {"index": index, "status_code": status.HTTP_404_NOT_FOUND, "id": task_update.id, "detail": "Task not found"}
+            for index, task_update in enumerate(task_updates)
+        ]
+
+    @staticmethod
+    async def delete_tasks(task_ids, current_user, db: AsyncSession):
+        version = await TaskCollectionService.bump_version(current_user.id, db)
+        rows = await TaskService._delete_returning(
+            [Task.user_id == current_user.id, Task.id.in_(task_ids)], version, db
+        )
+        missing = set(task_ids) - {row.id for row in rows}
+        if missing and await TaskArchiveService.restore(current_user.id, missing, db):
+            rows += await TaskService._delete_returning(
+                [Task.user_id == current_user.id, Task.id.in_(missing)], version, db
+            )
+        deleted = {row.id for row in rows}
+        if rows:
+            await TaskService._record_deleted(rows, current_user, db)
+            await db.commit()
+            task_events.publish(current_user.id, version, [delete_change(row.id) for row in rows])
+        return [
+            {"index": index, "status_code": status.HTTP_204_NO_CONTENT, "id": task_id}
+            if task_id in deleted
+            else {"index": index, "status_code": status.HTTP_404_NOT_FOUND, "id": task_id, "detail": "Task not found"}
+            for index, task_id in enumerate(task_ids)
+        ]
+
+    @staticmethod
+    async def get_changes(
+        current_user,
+        db: AsyncSession,
+        since: int,
+        limit: int = 500,
+        cursor: str | None = None,
+    ):
+        """Tasks written after collection version since, oldest change first.
+
+        Returns (version, changes, next_cursor). The version read at the
+        start of a sync bounds every page of it, so writes committed while a
+        client pages through are left for its next sync. The cost depends on
+        the number of changes, not on the number of tasks. Archived tasks
+        are reported like live ones.
+        """
+        if cursor is not None:
+            until, after_version, after_id = decode_change_cursor(cursor)
+        else:
+            collection = await db.get(TaskCollection, current_user.id)
+            until = collection.version if collection else 0
+            compacted = collection.compacted_version if collection else 0
+            # since=0 has no tasks to delete, so missing tombstones do not matter
+            if since > until or 0 < since < compacted:
+                raise HTTPException(
+                    status_code=status.HTTP_410_GONE,
+                    detail="Changes since this version are no longer available; sync from version 0",
+                )
+
+        def changed(model):
+            conditions = [model.user_id == current_user.id, model.version <= until]
+            if cursor is not None:
+                conditions.append(tuple_(model.version, model.id) > (after_version, after_id))
+            elif since:
+                # A full sync has no lower bound, so tasks still at version 0,
+                # written before collection versions existed, are returned too
+                conditions.append(model.version > since)
+            return conditions
+
+        live = select(*TASK_COLUMNS, Task.deleted_at).where(*changed(Task))
+        if since == 0:
+            live = live.where(Task.deleted_at.is_(None))
+        archived = select(*ARCHIVE_COLUMNS, null().label("deleted_at")).where(*changed(TaskArchive))
+        result = await db.execute(
+            union_ordered(
+                [live.order_by(*oldest_change_first(Task)), archived.order_by(*oldest_change_first(TaskArchive))],
+                oldest_change_first,
+                limit + 1,
+            )
+        )
+        rows = result.all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_change_cursor(until, rows[-1].version, rows[-1].id)
+        changes = []
+        for row in rows:
+            if row.deleted_at is not None:
+                changes.append(delete_change(row.id))
+                continue
+            task = row._asdict()
+            del task["deleted_at"]
+            changes.append({"op": "upsert", "id": row.id, "task": task})
+        return until, changes, next_cursor
+
+    @staticmethod
+    async def compact_tombstones(
+        db: AsyncSession, older_than: datetime, user_id=None, batch_size: int = 1000
+    ) -> int:
+        """Purge tombstones deleted before older_than; returns how many were removed.
+
+        Works in batches of batch_size, one transaction each. Every user's
+        compacted_version is raised to the newest purged tombstone so delta
+        syncs from before it are refused instead of silently missing deletes.
+        """
+        scope = [Task.user_id == user_id] if user_id is not None else []
+        purged = 0
+        while True:
+            result = await db.execute(
+                select(Task.id, Task.user_id, Task.version)
+                .where(
+                    Task.deleted_at.is_not(None),
+                    Task.deleted_at < older_than,
+                    # Kept so SQLite never hands out an id again, see TaskArchiveService.archive
+                    Task.id < select(func.max(Task.id)).correlate(None).scalar_subquery(),
+                    *scope,
+                )
+                .order_by(Task.deleted_at)
+                .limit(batch_size)
+                .with_for_update()
+            )
+            rows = result.all()
+            if not rows:
+                return purged
+            newest = {}
+            for row in rows:
+                newest[row.user_id] = max(newest.get(row.user_id, 0), row.version)
+            for owner_id, version in newest.items():
+                await db.execute(
+                    update(TaskCollection)
+                    .where(
+                        TaskCollection.user_id == owner_id,
+                        TaskCollection.compacted_version < version,
+                    )
+                    .values(compacted_version=version)
+                )
+            await db.execute(
+                delete(Task)
+                .where(Task.id.in_([row.id for row in rows]))
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+            purged += len(rows)
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+from sqlalchemy import delete, insert, select, update
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.shard import UserShard
+from app.models.task import SHARDED_MODELS, Task, TaskArchive
+from app.models.user import User
+from app.sharding import Shard, shard_router
+
+shard_logger = logging.getLogger("app.db.shards")
+COPY_CHUNK_SIZE = 1000
+
+
+async def _copy_user(user_id: int, source: Shard, target: Shard) -> int:
+    """Copy every sharded row of the user from source to target in one target transaction."""
+    copied = 0
+    async with source.sessionmaker() as reader, target.sessionmaker() as writer:
+        for model in SHARDED_MODELS:
+            table = model.__table__
+            # Leftovers of an earlier move that failed part way
+            await writer.execute(delete(table).where(table.c.user_id == user_id))
+            result = await reader.stream(
+                select(table)
+                .where(table.c.user_id == user_id)
+                .execution_options(yield_per=COPY_CHUNK_SIZE)
+            )
+            async for rows in result.partitions():
+                await writer.execute(insert(table), [row._asdict() for row in rows])
+                copied += len(rows)
+        # Each table is read separately; a task archived on the source in
+        # between was copied from both, and its live row wins.
+        result = await writer.execute(
+            delete(TaskArchive).where(
+                TaskArchive.user_id == user_id,
+                TaskArchive.id.in_(select(Task.id).where(Task.user_id == user_id)),
+            )
+        )
+        copied -= result.rowcount
+        await writer.commit()
+    return copied
+
+
+async def _delete_user(user_id: int, shard: Shard):
+    async with shard.sessionmaker() as db:
+        for model in SHARDED_MODELS:
+            await db.execute(delete(model.__table__).where(model.__table__.c.user_id == user_id))
+        await db.commit()
+
+
+async def _set_placement(user_id: int, **values):
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(UserShard).where(UserShard.user_id == user_id).values(**values))
+        await db.commit()
+    shard_router.forget(user_id)
+
+
+class TaskShardService:
+    @staticmethod
+    async def pin_users(shard: int) -> int:
+        """Place every user without a placement on shard; returns how many were placed.
+
+        Run before turning sharding on for a database that already has
+        tasks, with that database as the given shard, so existing users keep
+        reading their tasks from where they are.
+        """
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                insert(UserShard).from_select(
+                    ["user_id", "shard", "moving"],
+                    select(User.id, shard, False).where(
+                        ~select(UserShard.user_id).where(UserShard.user_id == User.id).exists()
+                    ),
+                )
+            )
+            await db.commit()
+        return result.rowcount
+
+    @staticmethod
+    async def move_user(user_id: int, target: int, settle_seconds: float | None = None) -> int:
+        """Move the user's tasks to the target shard while the app keeps serving.
+
+        1. Mark the user as moving and wait out every worker's placement
+           cache: from then on their task writes get 503, reads continue.
+        2. Copy the rows to the target and point the placement at it.
+        3. Wait out the caches again so no reader still uses the source,
+           then delete the rows there.
+
+        Returns the number of rows copied.
+        """
+        if settle_seconds is None:
+            settle_seconds = settings.TASK_SHARD_PLACEMENT_CACHE_SECONDS + 1
+        async with AsyncSessionLocal() as db:
+            placement = await db.get(UserShard, user_id)
+            if placement is None:
+                # No tasks written yet; the first access will read the placement
+                db.add(UserShard(user_id=user_id, shard=target, moving=False))
+                await db.commit()
+                return 0
+            source = placement.shard
+        if source == target:
+            return 0
+
+        await _set_placement(user_id, moving=True)
+        await asyncio.sleep(settle_seconds)
+        try:
+            copied = await _copy_user(user_id, shard_router.shards[source], shard_router.shards[target])
+        except BaseException:
+            await _set_placement(user_id, moving=False)
+            raise
+        await _set_placement(user_id, shard=target, moving=False)
+        shard_logger.info("moved %d rows of user %d from shard %d to %d", copied, user_id, source, target)
+
+        await asyncio.sleep(settle_seconds)
+        await _delete_user(user_id, shard_router.shards[source])
+        return copied
+
+    @staticmethod
+    async def misplaced_users() -> list[tuple[int, int, int]]:
+        """(user_id, current shard, ring shard) of users not on their ring shard."""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(UserShard.user_id, UserShard.shard).order_by(UserShard.user_id))
+            placements = result.all()
+        return [
+            (user_id, shard, shard_router.target(user_id))
+            for user_id, shard in placements
+            if shard != shard_router.target(user_id)
+        ]
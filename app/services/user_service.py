@@ -1,14 +1,18 @@
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
 from fastapi import HTTPException, status
+from app.database import replica_router
 from app.models.user import User
 from app.schemas.user import UserCreate
 from app.utils.auth import (
-    get_password_hash,
-    verify_password,
+    hash_password_async,
+    verify_and_update_password,
+    access_token_claims,
     create_access_token,
     generate_api_key,
+    invalidate_user,
+    token_versions,
 )
 
 
@@ -26,7 +30,7 @@ class UserService:
         if result.scalars().first():
             raise HTTPException(status_code=400, detail="Email already registered")
 
-        hashed_password = get_password_hash(user_create.password)
+        hashed_password = await hash_password_async(user_create.password)
         db_user = User(
             username=user_create.username,
             email=user_create.email,
@@ -37,6 +41,8 @@ class UserService:
         db.add(db_user)
         await db.commit()
         await db.refresh(db_user)
+        # The new account must be visible to its first authenticated requests
+        replica_router.mark_write(db_user.id)
         return db_user
 
     @staticmethod
@@ -48,10 +54,37 @@ class UserService:
             )
         )
         user = result.scalars().first()
-        if not user or not verify_password(form_data.password, user.hashed_password):
+        valid, new_hash = False, None
+        if user:
+            valid, new_hash = await verify_and_update_password(
+                form_data.password, user.hashed_password
+            )
+        if not valid:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect username/email or password",
             )
-        access_token = create_access_token(data={"user_id": user.id})
+        if new_hash:
+            # The configured bcrypt cost changed since this hash was made
+            user.hashed_password = new_hash
+            await db.commit()
+        access_token = create_access_token(data=access_token_claims(user))
         return user, access_token
+
+    @staticmethod
+    async def revoke_tokens(user_id: int, db: AsyncSession) -> int:
+        """Invalidate every access token issued to the user so far."""
+        await db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(token_version=User.token_version + 1)
+        )
+        token_version = await db.scalar(
+            select(User.token_version).where(User.id == user_id)
+        )
+        await db.commit()
+        # Bulk UPDATE skips the ORM after_update hook, so update local state here
+        invalidate_user(user_id)
+        token_versions.update(user_id, token_version)
+        replica_router.mark_write(user_id)
+        return token_version
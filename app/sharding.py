@@ -0,0 +1,208 @@
+import asyncio
+import math
+from contextlib import asynccontextmanager
+from fastapi import HTTPException, status
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from app.config import settings
+from app.database import (
+    AsyncSessionLocal,
+    SQLALCHEMY_DATABASE_URL,
+    build_engine,
+    build_sessionmaker,
+    engine,
+    replica_router,
+)
+from app.models.shard import IdBlock, UserShard
+from app.models.task import Task, TaskArchive
+from app.utils.cache import TTLCache
+from app.utils.hashring import HashRing
+
+
+class Shard:
+    def __init__(self, index: int, database_url: str):
+        self.index = index
+        if database_url == SQLALCHEMY_DATABASE_URL:
+            # The primary can double as a shard; share its pool
+            self.engine = engine
+            self.sessionmaker = AsyncSessionLocal
+        else:
+            self.engine = build_engine(database_url)
+            self.sessionmaker = build_sessionmaker(self.engine)
+        self.sessions = 0
+
+
+class ShardRouter:
+    """Maps each user's tasks to one of several databases.
+
+    A user is placed on a shard by consistent hashing of their id the first
+    time their tasks are touched, and the placement is stored in
+    ``user_shards`` on the primary. Adding a shard therefore only changes
+    where new users go; existing users move when ``shard-rebalance`` copies
+    their rows. Placements are cached for ``cache_seconds``, which bounds
+    how long a worker can keep using a placement that was changed. With no
+    shard URLs configured, every user maps to the primary database.
+    """
+
+    def __init__(self, urls, virtual_nodes: int, cache_seconds: float):
+        self.sharded = bool(urls)
+        self.shards = [Shard(index, url) for index, url in enumerate(urls or [SQLALCHEMY_DATABASE_URL])]
+        self.ring = HashRing(range(len(self.shards)), virtual_nodes)
+        self.cache_seconds = cache_seconds
+        self.refused_writes = 0
+        self._placements = TTLCache(max_entries=100_000, ttl_seconds=cache_seconds)
+
+    def target(self, user_id: int) -> int:
+        """Shard the hash ring assigns to the user."""
+        return self.ring.node_for(user_id)
+
+    async def placement(self, user_id: int) -> tuple[int, bool]:
+        """(shard index, moving) of the user, recording a placement on first use."""
+        if not self.sharded:
+            return 0, False
+        placement = self._placements.get(user_id)
+        if placement is not None:
+            return placement
+        async with AsyncSessionLocal() as db:
+            row = await db.get(UserShard, user_id)
+            if row is None:
+                db.add(UserShard(user_id=user_id, shard=self.target(user_id), moving=False))
+                try:
+                    await db.commit()
+                except IntegrityError:
+                    # Placed concurrently by another request or worker
+                    await db.rollback()
+                row = await db.get(UserShard, user_id, populate_existing=True)
+            placement = (row.shard, row.moving)
+        if placement[0] >= len(self.shards):
+            raise RuntimeError(f"User {user_id} is placed on shard {placement[0]}, which is not configured")
+        self._placements.set(user_id, placement)
+        return placement
+
+    async def shard_for(self, user_id: int, write: bool = False) -> Shard:
+        index, moving = await self.placement(user_id)
+        if write and moving:
+            self.refused_writes += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Tasks are being moved to another shard, retry shortly",
+                headers={"Retry-After": str(math.ceil(self.cache_seconds))},
+            )
+        return self.shards[index]
+
+    @asynccontextmanager
+    async def session(self, user_id: int, write: bool = False):
+        """Session on the shard holding the user's tasks."""
+        shard = await self.shard_for(user_id, write=write)
+        shard.sessions += 1
+        async with shard.sessionmaker() as session:
+            yield session
+
+    def forget(self, user_id: int):
+        """Drop this process's cached placement of the user."""
+        self._placements.delete(user_id)
+
+    async def stop(self):
+        for shard in self.shards:
+            if shard.engine is not engine:
+                await shard.engine.dispose()
+
+    def stats(self):
+        return {
+            "sharded": self.sharded,
+            "placement_cache": self._placements.stats(),
+            "refused_writes": self.refused_writes,
+            "shards": [
+                {
+                    "index": shard.index,
+                    "url": shard.engine.url.render_as_string(hide_password=True),
+                    "sessions": shard.sessions,
+                }
+                for shard in self.shards
+            ],
+        }
+
+
+class IdAllocator:
+    """Globally unique ids for a sharded table, reserved from the primary in blocks.
+
+    Shards cannot use their own autoincrement: ids would collide across
+    shards and rows could not move between them. Each process reserves
+    ``block_size`` ids per round trip to the primary; ids are unique but
+    only roughly ordered across processes.
+    """
+
+    def __init__(self, name: str, models, block_size: int, router: ShardRouter):
+        self.name = name
+        # Every table the ids can live in
+        self.models = models
+        self.block_size = block_size
+        self.router = router
+        self.reservations = 0
+        self._next = 0
+        self._end = 0
+        self._lock = asyncio.Lock()
+
+    async def allocate(self, count: int) -> list[int]:
+        ids = []
+        async with self._lock:
+            while len(ids) < count:
+                if self._next >= self._end:
+                    await self._reserve(max(self.block_size, count - len(ids)))
+                take = min(count - len(ids), self._end - self._next)
+                ids.extend(range(self._next, self._next + take))
+                self._next += take
+        return ids
+
+    async def _reserve(self, size: int):
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(IdBlock).where(IdBlock.name == self.name).values(next_id=IdBlock.next_id + size)
+            )
+            if result.rowcount:
+                end = await db.scalar(select(IdBlock.next_id).where(IdBlock.name == self.name))
+                await db.commit()
+            else:
+                # First reservation: continue after every id already in use
+                start = await self._max_existing_id() + 1
+                end = start + size
+                db.add(IdBlock(name=self.name, next_id=end))
+                try:
+                    await db.commit()
+                except IntegrityError:
+                    await db.rollback()
+                    return await self._reserve(size)
+        self._next, self._end = end - size, end
+        self.reservations += 1
+
+    async def _max_existing_id(self) -> int:
+        highest = 0
+        for shard in self.router.shards:
+            async with shard.sessionmaker() as db:
+                for model in self.models:
+                    highest = max(highest, await db.scalar(select(func.max(model.id))) or 0)
+        return highest
+
+    def stats(self):
+        return {
+            "block_size": self.block_size,
+            "reservations": self.reservations,
+            "remaining": self._end - self._next,
+        }
+
+
+shard_router = ShardRouter(
+    settings.TASK_SHARD_URLS,
+    virtual_nodes=settings.TASK_SHARD_VIRTUAL_NODES,
+    cache_seconds=settings.TASK_SHARD_PLACEMENT_CACHE_SECONDS,
+)
+
+
+def all_engines() -> list:
+    """Every engine the app connects through: primary, read replicas and task shards."""
+    engines = [engine, *(replica.engine for replica in replica_router.replicas)]
+    engines.extend(shard.engine for shard in shard_router.shards if shard.engine is not engine)
+    return engines
+
+
+task_ids = IdAllocator("tasks", (Task, TaskArchive), settings.TASK_ID_BLOCK_SIZE, shard_router)
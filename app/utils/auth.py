@@ -1,26 +1,91 @@
+import hashlib
+import hmac
 import secrets
+import time
 from fastapi import Depends, HTTPException, status, Header
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import event, select, or_
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from datetime import datetime, timedelta, timezone
 from typing import Annotated
 from app.config import settings
-from app.database import get_db
+from app.database import AsyncSessionLocal, get_read_db
 from app.schemas.user import TokenData
 from app.models.user import User
+from app.utils.cache import TTLCache
+from app.utils.hashing import PasswordHashPool
+from app.utils.metrics import request_timings
+from app.utils.revocation import TokenVersionMap
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Pinning min/max rounds to the configured cost makes passlib flag hashes made
+# with any other cost, so they are transparently rehashed on the next login.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
+password_pool = PasswordHashPool(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Resolved users keyed by (JWT user_id, API key hash) so warm requests skip the DB.
+principal_cache = TTLCache(
+    max_entries=settings.AUTH_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.AUTH_CACHE_TTL_SECONDS,
+)
+token_versions = TokenVersionMap(settings.AUTH_REVOCATION_REFRESH_SECONDS)
+
+
+class Principal:
+    """The authenticated user as known from verified token claims alone.
+
+    Returned instead of a User row on the stateless fast path; handlers
+    only rely on ``id``.
+    """
+
+    __slots__ = ("id",)
+
+    def __init__(self, user_id: int):
+        self.id = user_id
+
+    def __repr__(self):
+        return f"Principal(id={self.id})"
+
 
 def generate_api_key():
     """Generate a secure API key."""
     return f"sk_{secrets.token_urlsafe(32)}"
 
 
+def hash_api_key(api_key: str) -> str:
+    """Digest an API key so raw keys are never held as cache keys."""
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+
+def invalidate_user(user_id: int):
+    """Evict cached principals for a user whose row has changed."""
+    principal_cache.delete_where(lambda key: key[0] == user_id)
+
+
+def invalidate_api_key(api_key: str):
+    """Evict cached principals for a rotated or revoked API key."""
+    key_hash = hash_api_key(api_key)
+    principal_cache.delete_where(lambda key: key[1] == key_hash)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target):
+    invalidate_user(target.id)
+    token_versions.update(target.id, target.token_version or 0)
+
+
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
@@ -29,6 +94,27 @@ def get_password_hash(password):
     return pwd_context.hash(password)
 
 
+async def hash_password_async(password):
+    """Hash a password on the password hashing pool."""
+    return await password_pool.run(get_password_hash, password)
+
+
+async def verify_and_update_password(plain_password, hashed_password):
+    """Verify on the hashing pool; returns (valid, new_hash or None)."""
+    return await password_pool.run(
+        pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
+
+def access_token_claims(user: User) -> dict:
+    """Claims that let get_current_user validate a request without the DB."""
+    return {
+        "user_id": user.id,
+        "akh": hash_api_key(user.api_key),
+        "tv": user.token_version or 0,
+    }
+
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(
@@ -49,39 +135,82 @@ def verify_access_token(token: str, credentials_exception):
         user_id: int = payload.get("user_id")
         if user_id is None:
             raise credentials_exception
-        token_data = TokenData(user_id=user_id)
+        token_data = TokenData(
+            user_id=user_id,
+            api_key_hash=payload.get("akh"),
+            token_version=payload.get("tv"),
+        )
     except JWTError:
         raise credentials_exception
     return token_data
 
 
-async def verify_api_key(
-    x_api_key: str = Header(None), db: AsyncSession = Depends(get_db)
-):
-    """Verify the API key belongs to a valid user."""
+def token_vouches_for_api_key(authorization: str, api_key: str) -> bool:
+    """Whether the bearer token in authorization is valid and was issued for api_key.
+
+    Checks the signature, expiry and API key hash claim only, without the
+    DB, so middleware can tell a real API key from an invented one before
+    the route authenticates the request.
+    """
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token or not api_key:
+        return False
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return False
+    key_hash = payload.get("akh")
+    return isinstance(key_hash, str) and hmac.compare_digest(key_hash, hash_api_key(api_key))
+
+
+async def verify_api_key(x_api_key: str = Header(None)):
+    """Require an API key header; ownership is checked in get_current_user."""
     if not x_api_key:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="API Key required"
         )
 
-    # Check if API key exists in database
-    result = await db.execute(select(User).where(User.api_key == x_api_key))
-    user = result.scalars().first()
+    return x_api_key
 
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid API Key"
-        )
 
-    return x_api_key
+async def require_ops_token(x_ops_token: str = Header(None)):
+    """Require the OPS_TOKEN setting in the X-Ops-Token header."""
+    if not x_ops_token or not hmac.compare_digest(x_ops_token.encode(), settings.OPS_TOKEN.encode()):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Ops token required")
 
 
 async def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)],
     api_key: Annotated[str, Depends(verify_api_key)],
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Verify both JWT and API key belong to the same user."""
+    start = time.perf_counter()
+    try:
+        return await _resolve_current_user(token, api_key, db)
+    finally:
+        timings = request_timings.get()
+        if timings is not None:
+            timings.auth_seconds += time.perf_counter() - start
+
+
+async def authenticate(authorization: str, api_key: str):
+    """The user a request's credentials belong to, or None if they are not valid.
+
+    For middleware, which runs before route dependencies; applies the same
+    checks and principal cache as get_current_user.
+    """
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token or not api_key:
+        return None
+    async with AsyncSessionLocal() as db:
+        try:
+            return await _resolve_current_user(token, api_key, db)
+        except HTTPException:
+            return None
+
+
+async def _resolve_current_user(token: str, api_key: str, db: AsyncSession) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -90,19 +219,59 @@ async def get_current_user(
 
     # Verify JWT
     token_data = verify_access_token(token, credentials_exception)
+    key_hash = hash_api_key(api_key)
 
-    # Get user from JWT
-    result = await db.execute(select(User).where(User.id == token_data.user_id))
-    user = result.scalars().first()
+    if settings.AUTH_STATELESS and token_data.api_key_hash is not None:
+        # Signed claims bind the token to the API key; only revocation needs state
+        if not hmac.compare_digest(token_data.api_key_hash, key_hash):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid API Key"
+            )
+        if (token_data.token_version or 0) < await token_versions.min_version(token_data.user_id):
+            raise credentials_exception
+        return Principal(token_data.user_id)
+
+    cache_key = (token_data.user_id, key_hash)
+    user = principal_cache.get(cache_key)
+    if user is not None:
+        # The cached token_version misses revocations made by other workers
+        # since it was cached; the version map picks them up within a refresh
+        if _token_revoked(token_data, user) or (
+            token_data.token_version is not None
+            and token_data.token_version < await token_versions.min_version(user.id)
+        ):
+            raise credentials_exception
+        return user
+
+    # Resolve the JWT user and the API key owner in one round trip
+    result = await db.execute(
+        select(User).where(or_(User.id == token_data.user_id, User.api_key == api_key))
+    )
+    users = result.scalars().all()
+    user = next((u for u in users if u.api_key == api_key), None)
 
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid API Key"
+        )
 
     # Verify API key belongs to the same user
-    if user.api_key != api_key:
+    if user.id != token_data.user_id:
+        if not any(u.id == token_data.user_id for u in users):
+            raise credentials_exception
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="API Key does not match user",
         )
 
+    if _token_revoked(token_data, user):
+        raise credentials_exception
+
+    db.expunge(user)
+    principal_cache.set(cache_key, user)
     return user
+
+
+def _token_revoked(token_data: TokenData, user: User) -> bool:
+    # Tokens issued before token versions existed carry no "tv" claim
+    return token_data.token_version is not None and token_data.token_version < user.token_version
@@ -0,0 +1,225 @@
+import asyncio
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from threading import Lock
+
+
+class TTLCache:
+    """Bounded in-process LRU cache whose entries expire after a fixed TTL."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_where(self, predicate):
+        """Drop every entry whose key matches predicate."""
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class CacheBackend(ABC):
+    """Byte-value store used by the response cache.
+
+    ``namespace`` groups keys (per user) so they can be evicted together.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes | None:
+        """Return the stored value, or None if missing or expired."""
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl_seconds: float, namespace: str | None = None):
+        """Store value under key for ttl_seconds."""
+
+    @abstractmethod
+    async def delete_namespace(self, namespace: str):
+        """Drop every key stored under namespace, where supported."""
+
+    def stats(self) -> dict:
+        return {}
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Per-process LRU capped by the total size of stored values."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._namespaces = {}
+
+    async def get(self, key: str) -> bytes | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value, _ = entry
+        if expires_at < time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl_seconds: float, namespace: str | None = None):
+        if len(value) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + ttl_seconds, value, namespace)
+        self.size += len(value)
+        if namespace is not None:
+            self._namespaces.setdefault(namespace, set()).add(key)
+        while self.size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    async def delete_namespace(self, namespace: str):
+        for key in self._namespaces.pop(namespace, ()):
+            self._remove(key)
+
+    def _remove(self, key: str):
+        _, value, namespace = self._entries.pop(key)
+        self.size -= len(value)
+        if namespace is not None:
+            keys = self._namespaces.get(namespace)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._namespaces[namespace]
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+        }
+
+
+class KeyValueCacheBackend(CacheBackend):
+    """Backend over a shared key-value client shared by all workers.
+
+    The client needs ``get(key)``, ``set(key, value, ex=seconds)`` and
+    ``delete(*keys)`` coroutines, which is the shape of ``redis.asyncio``.
+    Namespaces are not tracked; superseded keys age out through their TTL.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    async def get(self, key: str) -> bytes | None:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl_seconds: float, namespace: str | None = None):
+        await self.client.set(key, value, ex=max(1, math.ceil(ttl_seconds)))
+
+    async def delete_namespace(self, namespace: str):
+        return None
+
+
+class LocalKeyValueStore:
+    """In-process stand-in for a shared key-value server, for development and tests."""
+
+    def __init__(self):
+        self._values = {}
+
+    async def get(self, key: str) -> bytes | None:
+        entry = self._values.get(key)
+        if entry is None:
+            return None
+        if entry[0] is not None and entry[0] < time.monotonic():
+            del self._values[key]
+            return None
+        return entry[1]
+
+    async def set(self, key: str, value: bytes, ex: float | None = None):
+        expires_at = time.monotonic() + ex if ex is not None else None
+        self._values[key] = (expires_at, value)
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        return sum(self._values.pop(key, None) is not None for key in keys)
+
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key into one execution."""
+
+    def __init__(self):
+        self.coalesced = 0
+        self._calls = {}
+
+    async def run(self, key, fn):
+        while (future := self._calls.get(key)) is not None:
+            self.coalesced += 1
+            try:
+                # Shielded so a cancelled follower does not cancel the leader's work
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The leader was cancelled; retry, possibly as the new leader
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Retrieved here so an unawaited failure is not logged as unhandled
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
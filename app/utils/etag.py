@@ -0,0 +1,31 @@
+def task_list_etag(user_id: int, version: int) -> str:
+    """Strong ETag for a user's task listing at a collection version."""
+    return f'"tasks-{user_id}-{version}"'
+
+
+def task_etag(task_id: int, version: int) -> str:
+    """Strong ETag for a single task at its last-written version."""
+    return f'"task-{task_id}-{version}"'
+
+
+def parse_etags(header: str | None) -> list[str]:
+    """Split an If-Match / If-None-Match header into entity tags."""
+    if not header:
+        return []
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def etag_matches(header: str | None, etag: str) -> bool:
+    """True when an If-None-Match header matches etag (weak comparison)."""
+    tags = parse_etags(header)
+    return "*" in tags or etag in [tag.removeprefix("W/") for tag in tags]
+
+
+def task_version_from_etag(etag: str, task_id: int) -> int | None:
+    """Extract the version from a strong task ETag, or None if it is not one."""
+    prefix = f'"task-{task_id}-'
+    if etag.startswith(prefix) and etag.endswith('"'):
+        version = etag[len(prefix):-1]
+        if version.isdigit():
+            return int(version)
+    return None
@@ -0,0 +1,31 @@
+import bisect
+import hashlib
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.sha256(key.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent hashing of keys onto nodes.
+
+    Every node is placed on the ring ``virtual_nodes`` times, so keys spread
+    evenly and adding a node to N existing ones moves only about 1/(N+1) of
+    the keys, all of them onto the new node.
+    """
+
+    def __init__(self, nodes, virtual_nodes: int = 64):
+        points = sorted(
+            (_hash(f"{node}#{replica}"), node)
+            for node in nodes
+            for replica in range(virtual_nodes)
+        )
+        self._hashes = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def node_for(self, key) -> object:
+        """The first node clockwise from the key's hash."""
+        if not self._nodes:
+            raise LookupError("HashRing has no nodes")
+        index = bisect.bisect(self._hashes, _hash(str(key))) % len(self._hashes)
+        return self._nodes[index]
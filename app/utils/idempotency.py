@@ -0,0 +1,213 @@
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from app.database import AsyncSessionLocal
+from app.models.idempotency import IdempotencyRecord
+
+
+@dataclass
+class StoredResponse:
+    """Response recorded for an idempotency key; status_code is None while in progress."""
+
+    fingerprint: str
+    status_code: int | None = None
+    headers: list | None = None
+    body: bytes | None = None
+
+
+class IdempotencyStore(ABC):
+    """Storage for idempotency keys, scoped per user.
+
+    A key is first claimed, which succeeds for exactly one request, then
+    completed with the response or released if no response is kept.
+    """
+
+    @abstractmethod
+    async def get(self, user_id: int, key: str) -> StoredResponse | None:
+        """Return the unexpired record for key, completed or in progress."""
+
+    @abstractmethod
+    async def claim(self, user_id: int, key: str, fingerprint: str, ttl_seconds: float) -> bool:
+        """Mark key as in progress; False if it is already claimed or completed."""
+
+    @abstractmethod
+    async def complete(self, user_id: int, key: str, response: StoredResponse, ttl_seconds: float):
+        """Store the response of the claimed key for ttl_seconds."""
+
+    @abstractmethod
+    async def release(self, user_id: int, key: str):
+        """Drop a claim, letting the next request with the key run."""
+
+    @abstractmethod
+    async def sweep(self) -> int:
+        """Delete expired keys; returns how many were removed."""
+
+    def stats(self) -> dict:
+        return {}
+
+
+class MemoryIdempotencyStore(IdempotencyStore):
+    """Per-process store capped by the total size of stored responses, least recently used out."""
+
+    # Rough size of an entry besides its body, so small responses are bounded too
+    ENTRY_OVERHEAD_BYTES = 256
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    async def get(self, user_id: int, key: str) -> StoredResponse | None:
+        entry = self._entries.get((user_id, key))
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            self._remove((user_id, key))
+            return None
+        self._entries.move_to_end((user_id, key))
+        return entry[1]
+
+    async def claim(self, user_id: int, key: str, fingerprint: str, ttl_seconds: float) -> bool:
+        if await self.get(user_id, key) is not None:
+            return False
+        self._set((user_id, key), StoredResponse(fingerprint), ttl_seconds)
+        return True
+
+    async def complete(self, user_id: int, key: str, response: StoredResponse, ttl_seconds: float):
+        self._set((user_id, key), response, ttl_seconds)
+
+    async def release(self, user_id: int, key: str):
+        if (user_id, key) in self._entries:
+            self._remove((user_id, key))
+
+    async def sweep(self) -> int:
+        now = time.monotonic()
+        expired = [entry_key for entry_key, (expires_at, _) in self._entries.items() if expires_at < now]
+        for entry_key in expired:
+            self._remove(entry_key)
+        return len(expired)
+
+    def _set(self, entry_key, response: StoredResponse, ttl_seconds: float):
+        if entry_key in self._entries:
+            self._remove(entry_key)
+        self._entries[entry_key] = (time.monotonic() + ttl_seconds, response)
+        self.size += self._size(entry_key, response)
+        while self.size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, entry_key):
+        _, response = self._entries.pop(entry_key)
+        self.size -= self._size(entry_key, response)
+
+    def _size(self, entry_key, response: StoredResponse) -> int:
+        return self.ENTRY_OVERHEAD_BYTES + len(entry_key[1]) + len(response.body or b"")
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+        }
+
+
+def _expiry(ttl_seconds: float) -> datetime:
+    return datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds)
+
+
+class DatabaseIdempotencyStore(IdempotencyStore):
+    """Keys in the idempotency_keys table, shared by every worker.
+
+    The primary key makes a claim succeed in one worker only, so duplicates
+    arriving at different workers also wait for the first execution.
+    """
+
+    def __init__(self, sweep_batch_size: int = 1000):
+        self.sweep_batch_size = sweep_batch_size
+
+    async def get(self, user_id: int, key: str) -> StoredResponse | None:
+        async with AsyncSessionLocal() as db:
+            record = await db.scalar(
+                select(IdempotencyRecord).where(
+                    IdempotencyRecord.user_id == user_id,
+                    IdempotencyRecord.key == key,
+                    IdempotencyRecord.expires_at >= datetime.now(timezone.utc),
+                )
+            )
+        if record is None:
+            return None
+        return StoredResponse(
+            fingerprint=record.fingerprint,
+            status_code=record.status_code,
+            headers=json.loads(record.headers) if record.headers is not None else None,
+            body=record.body,
+        )
+
+    async def claim(self, user_id: int, key: str, fingerprint: str, ttl_seconds: float) -> bool:
+        async with AsyncSessionLocal() as db:
+            # An expired key is free again even if the sweeper has not removed it yet
+            await db.execute(
+                delete(IdempotencyRecord).where(
+                    IdempotencyRecord.user_id == user_id,
+                    IdempotencyRecord.key == key,
+                    IdempotencyRecord.expires_at < datetime.now(timezone.utc),
+                )
+            )
+            db.add(
+                IdempotencyRecord(
+                    user_id=user_id, key=key, fingerprint=fingerprint, expires_at=_expiry(ttl_seconds)
+                )
+            )
+            try:
+                await db.commit()
+            except IntegrityError:
+                return False
+        return True
+
+    async def complete(self, user_id: int, key: str, response: StoredResponse, ttl_seconds: float):
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(IdempotencyRecord)
+                .where(IdempotencyRecord.user_id == user_id, IdempotencyRecord.key == key)
+                .values(
+                    status_code=response.status_code,
+                    headers=json.dumps(response.headers),
+                    body=response.body,
+                    expires_at=_expiry(ttl_seconds),
+                )
+            )
+            await db.commit()
+
+    async def release(self, user_id: int, key: str):
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                delete(IdempotencyRecord).where(
+                    IdempotencyRecord.user_id == user_id, IdempotencyRecord.key == key
+                )
+            )
+            await db.commit()
+
+    async def sweep(self) -> int:
+        removed = 0
+        async with AsyncSessionLocal() as db:
+            while True:
+                expired = (
+                    select(IdempotencyRecord.user_id, IdempotencyRecord.key)
+                    .where(IdempotencyRecord.expires_at < datetime.now(timezone.utc))
+                    .limit(self.sweep_batch_size)
+                )
+                result = await db.execute(expired)
+                rows = result.all()
+                if not rows:
+                    return removed
+                keys = tuple_(IdempotencyRecord.user_id, IdempotencyRecord.key)
+                await db.execute(delete(IdempotencyRecord).where(keys.in_([tuple(row) for row in rows])))
+                await db.commit()
+                removed += len(rows)
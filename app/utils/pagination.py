@@ -0,0 +1,59 @@
+import base64
+import json
+from datetime import datetime
+from fastapi import HTTPException, status
+
+
+def encode_cursor(created_at: datetime, task_id: int) -> str:
+    """Encode a (created_at, id) keyset position as an opaque cursor."""
+    raw = json.dumps([created_at.isoformat(), task_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Decode a cursor produced by encode_cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, task_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(task_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+def encode_change_cursor(until: int, version: int, task_id: int) -> str:
+    """Encode a delta sync position: its upper version bound and the last (version, id) returned."""
+    raw = json.dumps([until, version, task_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_change_cursor(cursor: str) -> tuple[int, int, int]:
+    """Decode a cursor produced by encode_change_cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        until, version, task_id = json.loads(base64.urlsafe_b64decode(padded))
+        return int(until), int(version), int(task_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+def encode_offset(offset: int) -> str:
+    """Encode a result offset as an opaque cursor for ranked listings."""
+    return base64.urlsafe_b64encode(str(offset).encode()).decode().rstrip("=")
+
+
+def decode_offset(cursor: str, max_offset: int) -> int:
+    """Decode a cursor produced by encode_offset, rejecting offsets above max_offset."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        offset = int(base64.urlsafe_b64decode(padded))
+    except ValueError:
+        offset = -1
+    if not 0 <= offset <= max_offset:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+    return offset
@@ -0,0 +1,63 @@
+import asyncio
+import time
+from sqlalchemy import select
+from app.database import AsyncSessionLocal
+from app.models.user import User
+
+
+class TokenVersionMap:
+    """Minimum accepted token version per user, refreshed periodically.
+
+    Only users who have revoked tokens at least once (token_version > 0)
+    are held, so the map stays small and a refresh is a single indexed
+    query every ``refresh_seconds`` instead of one user lookup per request.
+    Revocations made in this process apply immediately; revocations made by
+    other workers apply within one refresh interval.
+    """
+
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self.refreshes = 0
+        self._versions = {}
+        self._loaded_at = None
+        self._lock = asyncio.Lock()
+
+    async def min_version(self, user_id: int) -> int:
+        if self._is_stale():
+            async with self._lock:
+                # Single-flight: concurrent callers wait for one refresh
+                if self._is_stale():
+                    await self.refresh()
+        return self._versions.get(user_id, 0)
+
+    async def refresh(self):
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(User.id, User.token_version).where(User.token_version > 0)
+            )
+            self._versions = dict(result.all())
+        self._loaded_at = time.monotonic()
+        self.refreshes += 1
+
+    def update(self, user_id: int, token_version: int):
+        """Apply a revocation made in this process without waiting for a refresh."""
+        if token_version > self._versions.get(user_id, 0):
+            self._versions[user_id] = token_version
+
+    def _is_stale(self) -> bool:
+        return (
+            self._loaded_at is None
+            or time.monotonic() - self._loaded_at >= self.refresh_seconds
+        )
+
+    def stats(self):
+        return {
+            "users": len(self._versions),
+            "refresh_seconds": self.refresh_seconds,
+            "refreshes": self.refreshes,
+            "age_seconds": (
+                round(time.monotonic() - self._loaded_at, 3)
+                if self._loaded_at is not None
+                else None
+            ),
+        }
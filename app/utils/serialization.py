@@ -0,0 +1,19 @@
+from fastapi import Response
+from pydantic import TypeAdapter
+from app.schemas.task import TaskRow, TaskPageRow, TaskChangeEvent, TaskChangesPageRow
+
+# Built once at import; dumping through these skips per-row model validation.
+task_adapter = TypeAdapter(TaskRow)
+task_page_adapter = TypeAdapter(TaskPageRow)
+task_change_event_adapter = TypeAdapter(TaskChangeEvent)
+task_changes_page_adapter = TypeAdapter(TaskChangesPageRow)
+
+
+def json_response(adapter: TypeAdapter, content, status_code: int = 200, headers=None) -> Response:
+    """Encode already-trusted data straight to JSON bytes."""
+    return Response(
+        content=adapter.dump_json(content),
+        status_code=status_code,
+        media_type="application/json",
+        headers=headers,
+    )
@@ -0,0 +1,137 @@
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+
+class _TimedLoader:
+    """Delegates to a module's loader, timing how long executing the module takes."""
+
+    def __init__(self, loader, report: "StartupReport"):
+        self._loader = loader
+        self._report = report
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._report._begin_import()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._report._end_import(module.__name__)
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+class _ImportTimer:
+    """Meta path finder wrapping the loaders of the package's own modules."""
+
+    def __init__(self, package: str, report: "StartupReport"):
+        self.package = package
+        self.report = report
+
+    def find_spec(self, name, path=None, target=None):
+        if not name.startswith(self.package + "."):
+            return None
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader, self.report)
+                return spec
+        return None
+
+
+class StartupReport:
+    """Where a worker's cold start went.
+
+    Records the import time of each of the package's modules, inclusive of
+    everything it imported and exclusive of the package's own modules it
+    imported, so third-party imports are charged to the module that pulled
+    them in. Startup phases such as the schema check and pool warm-up are
+    timed with ``phase``, and the first request is timed by the
+    first-request middleware. Times are measured from when the package
+    was first imported.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.imports = {}
+        # Inclusive time of the package's modules imported from outside it
+        self.import_seconds = 0.0
+        self.phases = {}
+        self.ready_seconds = None
+        self.first_request = None
+        self._import_stack = []
+
+    def track_imports(self, package: str):
+        sys.meta_path.insert(0, _ImportTimer(package, self))
+
+    def _begin_import(self):
+        # [start, time spent in nested imports of the package]
+        self._import_stack.append([time.perf_counter(), 0.0])
+
+    def _end_import(self, name: str):
+        start, nested = self._import_stack.pop()
+        seconds = time.perf_counter() - start
+        self.imports[name] = {"seconds": seconds, "self_seconds": seconds - nested}
+        if self._import_stack:
+            self._import_stack[-1][1] += seconds
+        else:
+            self.import_seconds += seconds
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - start
+
+    def mark_forked(self):
+        """Time the rest of startup from now, in a worker forked after the imports."""
+        self.started = time.perf_counter()
+
+    def mark_ready(self):
+        self.ready_seconds = time.perf_counter() - self.started
+
+    def record_first_request(self, method: str, path: str, status_code: int, seconds: float):
+        if self.first_request is None:
+            self.first_request = {
+                "method": method,
+                "path": path,
+                "status_code": status_code,
+                "seconds": seconds,
+                "at": datetime.now(timezone.utc).isoformat(),
+            }
+
+    def slowest_imports(self, count: int = 10) -> list[dict]:
+        ranked = sorted(self.imports.items(), key=lambda item: item[1]["self_seconds"], reverse=True)
+        return [{"module": name, **timings} for name, timings in ranked[:count]]
+
+    def summary(self) -> str:
+        phases = "".join(f", {name} {seconds * 1000:.1f} ms" for name, seconds in self.phases.items())
+        slowest = ", ".join(
+            f"{entry['module']} {entry['self_seconds'] * 1000:.0f} ms" for entry in self.slowest_imports(3)
+        )
+        return (
+            f"ready {self.ready_seconds * 1000:.0f} ms after import: imports {self.import_seconds * 1000:.0f} ms"
+            f"{phases}; slowest imports: {slowest}"
+        )
+
+    def stats(self):
+        return {
+            "ready_seconds": self.ready_seconds,
+            "import_seconds": self.import_seconds,
+            "phases": self.phases,
+            "first_request": self.first_request,
+            "slowest_imports": self.slowest_imports(),
+            "modules_imported": len(self.imports),
+        }
+
+
+startup_report = StartupReport()
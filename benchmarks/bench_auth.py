@@ -0,0 +1,99 @@
+"""Measure authenticated GET /tasks/{task_id} throughput per auth mode.
+
+``db``        stateful auth with the principal cache disabled: one user lookup
+              per request, the behaviour before any auth caching.
+``cached``    stateful auth with the in-process principal cache.
+``stateless`` AUTH_STATELESS: token claims are verified in memory and only the
+              periodically refreshed token version map touches the database.
+
+Requests go through the full ASGI app in-process (no network), against a
+temporary SQLite database file.
+
+Usage: python -m benchmarks.bench_auth [--requests 2000] [--concurrency 1 10]
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+_tmpdir = tempfile.mkdtemp(prefix="tasky-bench-")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_tmpdir}/bench.db"
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+os.environ["METRICS_ENABLED"] = "false"
+os.environ["DB_MIGRATE_ON_STARTUP"] = "true"
+
+import httpx  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.main import app  # noqa: E402
+from app.utils.auth import principal_cache  # noqa: E402
+
+MODES = ("db", "cached", "stateless")
+
+
+def configure(mode: str):
+    settings.AUTH_STATELESS = mode == "stateless"
+    principal_cache.clear()
+    principal_cache.max_entries = 0 if mode == "db" else settings.AUTH_CACHE_MAX_ENTRIES
+
+
+async def run_mode(client, headers, path, mode, requests, concurrency) -> dict:
+    configure(mode)
+    await client.get(path, headers=headers)
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            response = await client.get(path, headers=headers)
+            assert response.status_code == 200, response.text
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "requests": requests,
+        "requests_per_second": round(requests / elapsed, 1),
+        "mean_ms": round(elapsed / requests * concurrency * 1000, 3),
+    }
+
+
+async def main(requests, concurrencies):
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            credentials = {"username": "bench", "email": "bench@example.com", "password": "Benchmark1"}
+            await client.post("/signup", json=credentials)
+            token = (
+                await client.post("/token", data={"username": "bench", "password": "Benchmark1"})
+            ).json()
+            headers = {
+                "Authorization": f"Bearer {token['access_token']}",
+                "X-API-Key": token["api_key"],
+            }
+            task = (
+                await client.post("/tasks/", json={"title": "Bench", "description": "x"}, headers=headers)
+            ).json()
+            path = f"/tasks/{task['id']}"
+
+            results = []
+            for concurrency in concurrencies:
+                for mode in MODES:
+                    results.append(
+                        await run_mode(client, headers, path, mode, requests, concurrency)
+                    )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10])
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
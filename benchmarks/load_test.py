@@ -0,0 +1,335 @@
+"""Drive a mixed workload against the Tasky API and report latency as JSON.
+
+The app runs either in-process through httpx's ASGI transport (``--target
+inprocess``, no network or server overhead), as a uvicorn subprocess on a
+local port (``--target uvicorn``) or under ``python -m app serve`` (``--target
+serve``), all against a fresh temporary SQLite
+database. Users and tasks are seeded through the API, then ``--concurrency``
+virtual clients issue requests drawn from ``--mix`` until ``--requests``
+have completed or ``--duration`` seconds have passed.
+
+For every operation the report holds throughput, p50/p95/p99 latency, status
+codes and DB queries per request (read from the ``Server-Timing`` header), plus
+the git commit, so runs can be diffed across commits.
+
+Usage:
+    python -m benchmarks.load_test --target inprocess --users 10 --tasks-per-user 500 \\
+        --concurrency 1 10 50 --requests 5000 --mix list=10 get=20 create=5 update=5 delete=2 login=1
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+import httpx
+
+DEFAULT_MIX = {"login": 1, "list": 10, "get": 20, "create": 5, "update": 5, "delete": 2}
+PASSWORD = "LoadTest1"
+SEED_BATCH_SIZE = 1000
+DB_QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+def bench_environment(tmpdir: str, bcrypt_rounds: int, shards: int) -> dict:
+    environment = {
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "load-test-secret"),
+        "DATABASE_URL": f"sqlite+aiosqlite:///{tmpdir}/load.db",
+        "BCRYPT_ROUNDS": str(bcrypt_rounds),
+        "RATE_LIMIT_ENABLED": "false",
+        "METRICS_ENABLED": "true",
+        "DB_MIGRATE_ON_STARTUP": "true",
+    }
+    if shards > 1:
+        environment["TASK_SHARD_URLS"] = json.dumps(
+            [f"sqlite+aiosqlite:///{tmpdir}/shard{index}.db" for index in range(shards)]
+        )
+    return environment
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.queries = defaultdict(list)
+
+    def record(self, operation: str, seconds: float, response: httpx.Response):
+        self.latencies[operation].append(seconds)
+        self.statuses[operation][response.status_code] += 1
+        match = DB_QUERIES.search(response.headers.get("server-timing", ""))
+        if match:
+            self.queries[operation].append(int(match.group(1)))
+
+    def summary(self, elapsed: float) -> dict:
+        operations = {}
+        for operation in sorted(self.latencies):
+            operations[operation] = self._summarize(
+                self.latencies[operation], self.queries[operation], elapsed
+            )
+            operations[operation]["status_codes"] = dict(self.statuses[operation])
+        every_latency = [value for values in self.latencies.values() for value in values]
+        every_query = [value for values in self.queries.values() for value in values]
+        total = self._summarize(every_latency, every_query, elapsed)
+        total["errors"] = sum(
+            count
+            for statuses in self.statuses.values()
+            for code, count in statuses.items()
+            if code >= 500
+        )
+        return {"total": total, "operations": operations}
+
+    @staticmethod
+    def _summarize(latencies, queries, elapsed: float) -> dict:
+        ordered = sorted(latencies)
+        return {
+            "requests": len(ordered),
+            "requests_per_second": round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+            "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+            "mean_ms": round(statistics.fmean(ordered) * 1000, 3) if ordered else 0.0,
+            "db_queries_per_request": round(statistics.fmean(queries), 2) if queries else None,
+        }
+
+
+class VirtualUser:
+    """A seeded account with its credentials and the ids of tasks it owns."""
+
+    def __init__(self, username: str, headers: dict, task_ids: list[int]):
+        self.username = username
+        self.headers = headers
+        self.task_ids = task_ids
+
+
+async def login(client: httpx.AsyncClient, username: str) -> dict:
+    response = await client.post("/token", data={"username": username, "password": PASSWORD})
+    response.raise_for_status()
+    token = response.json()
+    return {"Authorization": f"Bearer {token['access_token']}", "X-API-Key": token["api_key"]}
+
+
+async def seed(client: httpx.AsyncClient, users: int, tasks_per_user: int) -> list[VirtualUser]:
+    seeded = []
+    for index in range(users):
+        username = f"load{index}"
+        response = await client.post(
+            "/signup",
+            json={"username": username, "email": f"{username}@example.com", "password": PASSWORD},
+        )
+        response.raise_for_status()
+        headers = await login(client, username)
+        task_ids = []
+        for start in range(0, tasks_per_user, SEED_BATCH_SIZE):
+            count = min(SEED_BATCH_SIZE, tasks_per_user - start)
+            response = await client.post(
+                "/tasks/batch",
+                json={
+                    "tasks": [
+                        {"title": f"Task {start + i}", "description": "Seeded by load test"}
+                        for i in range(count)
+                    ]
+                },
+                headers=headers,
+            )
+            response.raise_for_status()
+            task_ids.extend(result["id"] for result in response.json()["results"])
+        seeded.append(VirtualUser(username, headers, task_ids))
+    return seeded
+
+
+async def perform(client: httpx.AsyncClient, operation: str, user: VirtualUser, rng: random.Random):
+    if operation == "login":
+        return await client.post("/token", data={"username": user.username, "password": PASSWORD})
+    if operation == "list":
+        return await client.get("/tasks/", params={"limit": 50}, headers=user.headers)
+    if operation == "create":
+        response = await client.post(
+            "/tasks/", json={"title": "Load", "description": "Created by load test"}, headers=user.headers
+        )
+        if response.status_code == 201:
+            user.task_ids.append(response.json()["id"])
+        return response
+    if not user.task_ids:
+        return None
+    if operation == "delete":
+        # Removed up front so concurrent gets and updates stop picking it
+        task_id = user.task_ids.pop(rng.randrange(len(user.task_ids)))
+        return await client.delete(f"/tasks/{task_id}", headers=user.headers)
+    task_id = rng.choice(user.task_ids)
+    if operation == "get":
+        return await client.get(f"/tasks/{task_id}", headers=user.headers)
+    if operation == "update":
+        new_status = rng.choice(("pending", "completed"))
+        return await client.put(f"/tasks/{task_id}", json={"status": new_status}, headers=user.headers)
+    raise ValueError(f"Unknown operation {operation!r}")
+
+
+async def drive(client, users, mix, concurrency, requests, duration, seed_value) -> dict:
+    operations = list(mix)
+    weights = [mix[operation] for operation in operations]
+    recorder = Recorder()
+    remaining = requests
+    deadline = time.perf_counter() + duration if duration else None
+
+    async def client_loop(worker_index: int):
+        nonlocal remaining
+        rng = random.Random(seed_value + worker_index)
+        while remaining > 0 and (deadline is None or time.perf_counter() < deadline):
+            remaining -= 1
+            operation = rng.choices(operations, weights)[0]
+            user = users[rng.randrange(len(users))]
+            start = time.perf_counter()
+            response = await perform(client, operation, user, rng)
+            if response is not None:
+                recorder.record(operation, time.perf_counter() - start, response)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client_loop(index) for index in range(concurrency)))
+    return {"concurrency": concurrency, **recorder.summary(time.perf_counter() - start)}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_until_ready(client: httpx.AsyncClient, process: subprocess.Popen, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with status {process.returncode}")
+        try:
+            if (await client.get("/")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError("uvicorn did not become ready in time")
+
+
+async def run_inprocess(args, environment, run_workload):
+    os.environ.update(environment)
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://load-test") as client:
+            return await run_workload(client)
+
+
+async def run_uvicorn(args, environment, run_workload):
+    port = free_port()
+    if args.target == "serve":
+        command = [
+            sys.executable, "-m", "app", "serve",
+            "--host", "127.0.0.1", "--port", str(port), "--workers", str(args.workers),
+        ]
+    else:
+        command = [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(args.workers), "--log-level", "warning",
+        ]
+    # Create the schema once rather than have every worker wait for the first to do it
+    subprocess.run(
+        [sys.executable, "-m", "app", "migrate"],
+        env={**os.environ, **environment},
+        stdout=subprocess.DEVNULL,
+        check=True,
+    )
+    process = subprocess.Popen(command, env={**os.environ, **environment})
+    try:
+        limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+            await wait_until_ready(client, process)
+            return await run_workload(client)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_mix(entries) -> dict:
+    mix = {}
+    for entry in entries:
+        operation, _, weight = entry.partition("=")
+        if operation not in DEFAULT_MIX or not weight:
+            raise argparse.ArgumentTypeError(f"Invalid mix entry {entry!r}")
+        mix[operation] = float(weight)
+    return mix
+
+
+async def main(args):
+    mix = parse_mix(args.mix) if args.mix else DEFAULT_MIX
+    tmpdir = tempfile.mkdtemp(prefix="tasky-load-")
+    environment = bench_environment(tmpdir, args.bcrypt_rounds, args.shards)
+
+    async def run_workload(client):
+        seed_start = time.perf_counter()
+        users = await seed(client, args.users, args.tasks_per_user)
+        seed_seconds = time.perf_counter() - seed_start
+        runs = [
+            await drive(client, users, mix, concurrency, args.requests, args.duration, args.seed)
+            for concurrency in args.concurrency
+        ]
+        return seed_seconds, runs
+
+    runner = run_inprocess if args.target == "inprocess" else run_uvicorn
+    seed_seconds, runs = await runner(args, environment, run_workload)
+    report = {
+        "commit": git_commit(),
+        "target": args.target,
+        "workers": args.workers if args.target != "inprocess" else None,
+        "users": args.users,
+        "tasks_per_user": args.tasks_per_user,
+        "mix": mix,
+        "bcrypt_rounds": args.bcrypt_rounds,
+        "shards": args.shards,
+        "seed_seconds": round(seed_seconds, 3),
+        "runs": runs,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", choices=("inprocess", "uvicorn", "serve"), default="inprocess")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes (serve: 0 for one per CPU)")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--tasks-per-user", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--requests", type=int, default=2000, help="requests per concurrency level")
+    parser.add_argument("--duration", type=float, default=None, help="stop a level after this many seconds")
+    parser.add_argument("--mix", nargs="+", metavar="OP=WEIGHT", help="operation weights, e.g. get=20 list=10")
+    parser.add_argument("--bcrypt-rounds", type=int, default=4, help="bcrypt cost used for the run")
+    parser.add_argument("--shards", type=int, default=1, help="SQLite task shards (1: unsharded)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    asyncio.run(main(parser.parse_args()))
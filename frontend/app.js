@@ -6,6 +6,10 @@ const API_URL = 'https://tasky-961y.onrender.com';
 let authToken = localStorage.getItem('authToken');
 let apiKey = localStorage.getItem('apiKey');
 let currentUser = localStorage.getItem('username');
+let taskMap = new Map();
+let lastVersion = null;
+let eventsController = null;
+let eventsConnected = false;
 
 // DOM Elements
 const authSection = document.getElementById('authSection');
@@ -49,7 +53,7 @@ function showSection(section) {
         authSection.style.display = 'none';
         tasksSection.style.display = 'block';
         logoutBtn.style.display = 'block';
-        loadTasks();
+        startTaskEvents();
     }
 }
 
@@ -211,6 +215,7 @@ function handleLogout() {
     localStorage.removeItem('authToken');
     localStorage.removeItem('apiKey');
     localStorage.removeItem('username');
+    stopTaskEvents();
     showSection('auth');
     showAlert('Logged out successfully', 'info');
 }
@@ -233,7 +238,7 @@ async function handleCreateTask(e) {
 
         showAlert('Task created successfully!', 'success');
         taskForm.reset();
-        loadTasks();
+        if (!eventsConnected) loadTasks();
     } catch (error) {
         showAlert(error.message);
     }
@@ -243,7 +248,15 @@ async function loadTasks() {
     try {
         tasksList.innerHTML = '<div class="text-center"><div class="spinner-border" role="status"></div></div>';
         
-        const tasks = await apiCall('/tasks');
+        const tasks = [];
+        let cursor = null;
+        do {
+            const query = cursor ? `?limit=500&cursor=${encodeURIComponent(cursor)}` : '?limit=500';
+            const page = await apiCall(`/tasks/${query}`);
+            tasks.push(...page.items);
+            cursor = page.next_cursor;
+        } while (cursor);
+        taskMap = new Map(tasks.map(task => [task.id, task]));
         displayTasks(tasks);
     } catch (error) {
         tasksList.innerHTML = '<p class="text-danger text-center">Failed to load tasks</p>';
@@ -251,6 +264,95 @@ async function loadTasks() {
     }
 }
 
+function renderTaskMap() {
+    displayTasks([...taskMap.values()].sort((a, b) => b.id - a.id));
+}
+
+// Live updates: GET /tasks/events is read with fetch rather than EventSource,
+// which cannot send the Authorization and X-API-Key headers
+function startTaskEvents(retryDelay = 1000) {
+    if (eventsController) return;
+    const controller = new AbortController();
+    eventsController = controller;
+    const resuming = lastVersion !== null;
+    const query = resuming ? `?since=${lastVersion}` : '';
+
+    const reconnect = () => {
+        eventsConnected = false;
+        if (eventsController !== controller) return;
+        eventsController = null;
+        setTimeout(() => {
+            if (authToken) startTaskEvents(Math.min(retryDelay * 2, 30000));
+        }, retryDelay);
+    };
+
+    fetch(`${API_URL}/tasks/events${query}`, {
+        headers: { 'Authorization': `Bearer ${authToken}`, 'X-API-Key': apiKey },
+        signal: controller.signal
+    }).then(async response => {
+        if (!response.ok) throw new Error(`Request failed: ${response.status}`);
+        const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+        let buffer = '';
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += value;
+            let end;
+            while ((end = buffer.indexOf('\n\n')) !== -1) {
+                handleTaskEvent(buffer.slice(0, end), resuming);
+                buffer = buffer.slice(end + 2);
+            }
+        }
+        retryDelay = 1000;
+        reconnect();
+    }).catch(error => {
+        if (controller.signal.aborted) return;
+        console.error('Task events error:', error);
+        // Without live updates the list is only refreshed on demand
+        if (!resuming) loadTasks();
+        reconnect();
+    });
+}
+
+function stopTaskEvents() {
+    if (eventsController) eventsController.abort();
+    eventsController = null;
+    eventsConnected = false;
+    lastVersion = null;
+    taskMap = new Map();
+}
+
+function handleTaskEvent(block, resuming) {
+    let event = 'message';
+    let data = '';
+    for (const line of block.split('\n')) {
+        if (line.startsWith('event: ')) event = line.slice(7);
+        else if (line.startsWith('data: ')) data += line.slice(6);
+    }
+    if (!data) return;  // keepalive comment
+    const payload = JSON.parse(data);
+
+    if (event === 'ready') {
+        eventsConnected = true;
+        if (!resuming) loadTasks();
+    } else if (event === 'resync') {
+        loadTasks();
+    } else if (event === 'changes') {
+        for (const change of payload.changes) {
+            if (change.op === 'delete') {
+                taskMap.delete(change.id);
+            } else {
+                const current = taskMap.get(change.id);
+                if (!current || current.version <= change.task.version) {
+                    taskMap.set(change.id, change.task);
+                }
+            }
+        }
+        renderTaskMap();
+    }
+    lastVersion = payload.version;
+}
+
 function displayTasks(tasks) {
     if (tasks.length === 0) {
         tasksList.innerHTML = `
@@ -382,7 +484,7 @@ async function toggleTask(taskId, currentStatus) {
         });
         
         showAlert(`Task marked as ${newStatus}!`, 'success');
-        loadTasks();
+        if (!eventsConnected) loadTasks();
     } catch (error) {
         showAlert('Failed to update task: ' + error.message);
     }
@@ -397,7 +499,7 @@ async function deleteTask(taskId) {
         });
         
         showAlert('Task deleted successfully!', 'success');
-        loadTasks();
+        if (!eventsConnected) loadTasks();
     } catch (error) {
         showAlert('Failed to delete task: ' + error.message);
     }
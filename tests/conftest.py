@@ -0,0 +1,58 @@
+import asyncio
+import json
+import os
+import tempfile
+import httpx
+import pytest
+
+# Settings are read when the app is imported, so configure it first: the
+# primary database doubles as shard 0, as the README recommends for sharding
+# an existing deployment.
+_tmpdir = tempfile.mkdtemp(prefix="tasky-tests-")
+OPS_TOKEN = "test-ops-token"
+_primary = f"sqlite+aiosqlite:///{_tmpdir}/primary.db"
+os.environ.update(
+    {
+        "SECRET_KEY": "test-secret",
+        "DATABASE_URL": _primary,
+        "TASK_SHARD_URLS": json.dumps([_primary, f"sqlite+aiosqlite:///{_tmpdir}/shard1.db"]),
+        "DB_MIGRATE_ON_STARTUP": "true",
+        "BCRYPT_ROUNDS": "4",
+        "RATE_LIMIT_ENABLED": "false",
+        "OPS_TOKEN": OPS_TOKEN,
+        # Fail fast instead of waiting out the default busy timeout on a lock
+        "SQLITE_BUSY_TIMEOUT_MS": "500",
+    }
+)
+
+from app.main import app  # noqa: E402
+
+
+@pytest.fixture
+def run():
+    """Run a coroutine function taking an API client against the app, startup and shutdown included."""
+
+    def run_with_client(test):
+        async def main():
+            async with app.router.lifespan_context(app):
+                transport = httpx.ASGITransport(app=app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                    return await test(client)
+
+        return asyncio.run(main())
+
+    return run_with_client
+
+
+async def sign_up(client: httpx.AsyncClient, username: str) -> tuple[int, dict]:
+    """Create a user; returns their id and headers authenticating as them."""
+    password = "Correct horse battery"
+    response = await client.post(
+        "/signup", json={"username": username, "email": f"{username}@example.com", "password": password}
+    )
+    response.raise_for_status()
+    user_id = response.json()["id"]
+    response = await client.post("/token", data={"username": username, "password": password})
+    response.raise_for_status()
+    token = response.json()
+    return user_id, {"Authorization": f"Bearer {token['access_token']}", "X-API-Key": token["api_key"]}
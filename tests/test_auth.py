@@ -0,0 +1,61 @@
+from sqlalchemy import update
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.user import User
+from app.utils.auth import principal_cache, token_versions
+from tests.conftest import sign_up
+
+
+def test_cached_principal_honors_revocation_from_another_worker(run):
+    async def test(client):
+        user_id, headers = await sign_up(client, "revoked")
+        # Caches the principal in this process
+        assert (await client.get("/tasks/", headers=headers)).status_code == 200
+        # A revocation on another worker: the database changes, this process's cache does not
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(User).where(User.id == user_id).values(token_version=User.token_version + 1)
+            )
+            await db.commit()
+        await token_versions.refresh()
+        assert (await client.get("/tasks/", headers=headers)).status_code == 401
+
+    run(test)
+
+
+def test_warm_requests_resolve_the_principal_from_the_cache(run):
+    async def test(client):
+        _, headers = await sign_up(client, "cached")
+        assert (await client.get("/tasks/", headers=headers)).status_code == 200
+        hits = principal_cache.stats()["hits"]
+        assert (await client.get("/tasks/", headers=headers)).status_code == 200
+        assert principal_cache.stats()["hits"] == hits + 1
+
+        # The cache is keyed by the API key too, so a warm token does not vouch for another key
+        response = await client.get("/tasks/", headers={**headers, "X-API-Key": "someone-elses-key"})
+        assert response.status_code == 401
+
+        # Revoking on this worker evicts the cached principal
+        assert (await client.post("/token/revoke", headers=headers)).status_code == 204
+        assert (await client.get("/tasks/", headers=headers)).status_code == 401
+
+    run(test)
+
+
+def test_stateless_tokens_skip_the_user_lookup_but_honor_revocation(run, monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_STATELESS", True)
+
+    async def test(client):
+        _, headers = await sign_up(client, "stateless")
+        lookups = principal_cache.stats()
+        response = await client.post("/tasks/", json={"title": "Stateless", "description": "No lookup"}, headers=headers)
+        assert response.status_code == 201
+        assert (await client.get("/tasks/", headers=headers)).json()["items"][0]["title"] == "Stateless"
+        assert principal_cache.stats() == lookups
+
+        response = await client.get("/tasks/", headers={**headers, "X-API-Key": "someone-elses-key"})
+        assert response.status_code == 401
+        assert (await client.post("/token/revoke", headers=headers)).status_code == 204
+        assert (await client.get("/tasks/", headers=headers)).status_code == 401
+
+    run(test)
@@ -0,0 +1,34 @@
+import asyncio
+import tempfile
+from sqlalchemy import text
+from app.config import settings
+from app.database import MonitoredQueuePool, build_engine, engine_options, pool_monitor, prewarm_pool
+
+
+def test_file_databases_get_the_configured_pool():
+    options = engine_options("postgresql+asyncpg://db/tasky")
+    assert options["poolclass"] is MonitoredQueuePool
+    assert (options["pool_size"], options["max_overflow"]) == (settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW)
+    assert options["connect_args"] == {"statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+    # In-memory SQLite keeps its single connection
+    assert "poolclass" not in engine_options("sqlite+aiosqlite://")
+
+
+def test_sqlite_connections_get_the_pragmas_and_prewarm():
+    async def main():
+        engine = build_engine(f"sqlite+aiosqlite:///{tempfile.mkdtemp(prefix='tasky-pool-')}/pool.db")
+        try:
+            waits = pool_monitor.waits
+            assert await prewarm_pool(engine, 2) == 2
+            assert engine.pool.checkedin() == 2
+            assert pool_monitor.waits >= waits + 2
+            async with engine.connect() as conn:
+                journal_mode = await conn.scalar(text("PRAGMA journal_mode"))
+                busy_timeout = await conn.scalar(text("PRAGMA busy_timeout"))
+            return journal_mode, busy_timeout
+        finally:
+            await engine.dispose()
+
+    journal_mode, busy_timeout = asyncio.run(main())
+    assert journal_mode.lower() == settings.SQLITE_JOURNAL_MODE.lower()
+    assert busy_timeout == settings.SQLITE_BUSY_TIMEOUT_MS
@@ -0,0 +1,36 @@
+import tempfile
+from app.database import build_engine
+from app.migrations import databases
+from app.routers import health
+
+
+def test_liveness_and_readiness_of_a_healthy_worker(run):
+    async def test(client):
+        live = await client.get("/health/live")
+        assert live.status_code == 200
+        assert live.json()["status"] == "ok"
+        ready = await client.get("/health/ready")
+        assert ready.status_code == 200
+        assert [check["ok"] for check in ready.json()["databases"]] == [True] * len(databases())
+
+    run(test)
+
+
+def test_readiness_fails_while_a_database_is_unreachable(run, monkeypatch):
+    # Its directory does not exist, so SQLite cannot open it
+    unreachable = build_engine(f"sqlite+aiosqlite:///{tempfile.mkdtemp(prefix='tasky-health-')}/missing/tasks.db")
+    monkeypatch.setattr(health, "databases", lambda: [*databases(), ("shard 9", unreachable, None)])
+
+    async def test(client):
+        try:
+            response = await client.get("/health/ready")
+            assert response.status_code == 503
+            body = response.json()
+            assert body["status"] == "unavailable"
+            assert body["databases"][-1] == {"database": "shard 9", "ok": False, "error": "OperationalError"}
+            # Liveness does not depend on the database
+            assert (await client.get("/health/live")).status_code == 200
+        finally:
+            await unreachable.dispose()
+
+    run(test)
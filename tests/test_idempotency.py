@@ -0,0 +1,29 @@
+from sqlalchemy import func, select
+from app.database import AsyncSessionLocal
+from app.models.idempotency import IdempotencyRecord
+from tests.conftest import sign_up
+
+
+def test_retried_write_is_replayed_from_the_shared_store(run):
+    async def test(client):
+        user_id, headers = await sign_up(client, "retrier")
+        headers = {**headers, "Idempotency-Key": "create-once"}
+        task = {"title": "Once", "description": "Created a single time"}
+
+        first = await client.post("/tasks/", json=task, headers=headers)
+        retry = await client.post("/tasks/", json=task, headers=headers)
+        assert first.status_code == retry.status_code == 201
+        assert retry.headers["idempotent-replayed"] == "true"
+        assert retry.json() == first.json()
+        assert len((await client.get("/tasks/", headers=headers)).json()["items"]) == 1
+
+        # Kept in the database, where every worker sees it
+        async with AsyncSessionLocal() as db:
+            assert await db.scalar(
+                select(func.count()).where(IdempotencyRecord.user_id == user_id)
+            ) == 1
+
+        response = await client.post("/tasks/", json={**task, "title": "Other"}, headers=headers)
+        assert response.status_code == 422
+
+    run(test)
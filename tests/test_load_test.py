@@ -0,0 +1,22 @@
+from benchmarks.load_test import DEFAULT_MIX, drive, parse_mix, percentile, seed
+
+
+def test_percentiles_and_mix_parsing():
+    assert percentile([], 0.5) == 0.0
+    assert percentile([1, 2, 3, 4], 0.5) == 2
+    assert percentile([1, 2, 3, 4], 0.99) == 4
+    assert parse_mix(["get=20", "list=10"]) == {"get": 20, "list": 10}
+
+
+def test_workload_runs_against_the_app_and_reports_every_operation(run):
+    async def test(client):
+        users = await seed(client, users=2, tasks_per_user=5)
+        assert [len(user.task_ids) for user in users] == [5, 5]
+        return await drive(client, users, DEFAULT_MIX, concurrency=3, requests=60, duration=None, seed_value=0)
+
+    report = run(test)
+    assert report["concurrency"] == 3
+    assert report["total"]["requests"] > 0
+    assert report["total"]["errors"] == 0
+    assert set(report["operations"]) <= set(DEFAULT_MIX)
+    assert report["operations"]["get"]["db_queries_per_request"] is not None
@@ -0,0 +1,25 @@
+from tests.conftest import OPS_TOKEN, sign_up
+
+
+def test_responses_break_down_their_time_in_server_timing(run):
+    async def test(client):
+        _, headers = await sign_up(client, "timed")
+        task = (await client.post("/tasks/", json={"title": "Timed", "description": "Measured"}, headers=headers)).json()
+        response = await client.get(f"/tasks/{task['id']}", headers=headers)
+        entries = {entry.split(";")[0]: entry for entry in response.headers["server-timing"].split(", ")}
+        assert {"app", "db", "auth"} <= set(entries)
+        assert 'queries"' in entries["db"]
+
+    run(test)
+
+
+def test_requests_are_labelled_by_route_template(run):
+    async def test(client):
+        _, headers = await sign_up(client, "labelled")
+        task = (await client.post("/tasks/", json={"title": "Labelled", "description": "Measured"}, headers=headers)).json()
+        await client.get(f"/tasks/{task['id']}", headers=headers)
+        text = (await client.get("/metrics", headers={"X-Ops-Token": OPS_TOKEN})).text
+        assert 'http_request_duration_seconds_count{method="GET",route="/tasks/{task_id}",status="200"}' in text
+        assert f"/tasks/{task['id']}\"" not in text
+
+    run(test)
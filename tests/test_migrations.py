@@ -0,0 +1,146 @@
+import asyncio
+import sqlite3
+import tempfile
+from types import SimpleNamespace
+import pytest
+from sqlalchemy import inspect
+from app import migrations
+from app.config import settings
+from app.database import Base, build_engine, build_sessionmaker
+from app.migrations import LATEST_VERSION, MIGRATIONS, check_schema, current_version, migrate_database
+from app.services.task_service import TaskService
+
+# Schema created by create_all at the first release
+BASELINE_SCHEMA = """
+CREATE TABLE users (
+    id INTEGER NOT NULL,
+    email VARCHAR NOT NULL,
+    username VARCHAR NOT NULL,
+    hashed_password VARCHAR NOT NULL,
+    api_key VARCHAR NOT NULL,
+    PRIMARY KEY (id)
+);
+CREATE UNIQUE INDEX ix_users_api_key ON users (api_key);
+CREATE INDEX ix_users_id ON users (id);
+CREATE UNIQUE INDEX ix_users_email ON users (email);
+CREATE UNIQUE INDEX ix_users_username ON users (username);
+CREATE TABLE tasks (
+    id INTEGER NOT NULL,
+    title VARCHAR NOT NULL,
+    description VARCHAR NOT NULL,
+    status VARCHAR(9) NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    user_id INTEGER NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY(user_id) REFERENCES users (id)
+);
+CREATE INDEX ix_tasks_id ON tasks (id);
+"""
+
+
+def _baseline_database() -> str:
+    path = f"{tempfile.mkdtemp(prefix='tasky-baseline-')}/tasks.db"
+    connection = sqlite3.connect(path)
+    connection.executescript(BASELINE_SCHEMA)
+    connection.execute(
+        "INSERT INTO users (id, email, username, hashed_password, api_key)"
+        " VALUES (1, 'old@example.com', 'old', 'x', 'old-api-key')"
+    )
+    connection.executemany(
+        "INSERT INTO tasks (title, description, status, user_id) VALUES (?, ?, ?, 1)",
+        [("Old one", "Before", "pending"), ("Old two", "Before", "completed"), ("Old three", "Before", "pending")],
+    )
+    connection.commit()
+    connection.close()
+    return f"sqlite+aiosqlite:///{path}"
+
+
+def _migrated(test):
+    async def main():
+        engine = build_engine(_baseline_database())
+        try:
+            await migrate_database(engine, Base.metadata)
+            return await test(engine)
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(main())
+
+
+def test_baseline_database_gets_every_column_and_index():
+    async def test(engine):
+        assert await current_version(engine) == LATEST_VERSION
+        async with engine.connect() as conn:
+            tables, schema = await conn.run_sync(
+                lambda sync_connection: (
+                    set(inspect(sync_connection).get_table_names()),
+                    {
+                        table: (
+                            {column["name"] for column in inspect(sync_connection).get_columns(table)},
+                            {index["name"] for index in inspect(sync_connection).get_indexes(table)},
+                        )
+                        for table in ("users", "tasks")
+                    },
+                )
+            )
+        assert {"task_collections", "task_daily_stats", "tasks_archive", "idempotency_keys"} <= tables
+        assert "token_version" in schema["users"][0]
+        assert {"version", "updated_at", "deleted_at"} <= schema["tasks"][0]
+        assert {index.name for index in Base.metadata.tables["tasks"].indexes} <= schema["tasks"][1]
+
+    _migrated(test)
+
+
+def test_full_delta_sync_returns_tasks_written_before_versions_existed():
+    async def test(engine):
+        async with build_sessionmaker(engine)() as db:
+            version, changes, _ = await TaskService.get_changes(SimpleNamespace(id=1), db, since=0)
+        assert {change["task"]["title"] for change in changes} == {"Old one", "Old two", "Old three"}
+        assert version == 0
+
+    _migrated(test)
+
+
+def test_empty_database_is_created_at_the_latest_version_once():
+    async def main():
+        engine = build_engine(f"sqlite+aiosqlite:///{tempfile.mkdtemp(prefix='tasky-fresh-')}/tasks.db")
+        try:
+            assert await current_version(engine) == 0
+            first = await migrate_database(engine, Base.metadata)
+            second = await migrate_database(engine, Base.metadata)
+            return first, second
+        finally:
+            await engine.dispose()
+
+    first, second = asyncio.run(main())
+    assert (first["created"], first["to_version"]) == (True, LATEST_VERSION)
+    assert (second["created"], second["applied"]) == (False, [])
+
+
+def test_unversioned_database_replays_every_migration():
+    async def main():
+        engine = build_engine(_baseline_database())
+        try:
+            return await migrate_database(engine, Base.metadata)
+        finally:
+            await engine.dispose()
+
+    result = asyncio.run(main())
+    assert (result["from_version"], result["to_version"]) == (0, LATEST_VERSION)
+    assert len(result["applied"]) == len(MIGRATIONS)
+
+
+def test_startup_refuses_a_database_behind_the_release(monkeypatch):
+    async def main():
+        engine = build_engine(_baseline_database())
+        monkeypatch.setattr(migrations, "databases", lambda: [("legacy", engine, Base.metadata)])
+        try:
+            with pytest.raises(RuntimeError, match="legacy is at version 0"):
+                await check_schema()
+            monkeypatch.setattr(settings, "DB_MIGRATE_ON_STARTUP", True)
+            return await check_schema()
+        finally:
+            await engine.dispose()
+
+    monkeypatch.setattr(settings, "DB_MIGRATE_ON_STARTUP", False)
+    assert asyncio.run(main()) == [{"database": "legacy", "version": LATEST_VERSION}]
@@ -0,0 +1,22 @@
+from tests.conftest import OPS_TOKEN
+
+
+def test_ops_endpoints_require_the_ops_token(run):
+    async def test(client):
+        assert (await client.get("/ops/db-pool")).status_code == 401
+        assert (await client.get("/ops/db-pool", headers={"X-Ops-Token": "guess"})).status_code == 401
+        response = await client.get("/ops/db-pool", headers={"X-Ops-Token": OPS_TOKEN})
+        assert response.status_code == 200, response.text
+
+    run(test)
+
+
+def test_metrics_require_the_ops_token(run):
+    async def test(client):
+        assert (await client.get("/metrics")).status_code == 401
+        response = await client.get("/metrics", headers={"X-Ops-Token": OPS_TOKEN})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "db_pool_connections" in response.text
+
+    run(test)
@@ -0,0 +1,52 @@
+import asyncio
+import threading
+import pytest
+from fastapi import HTTPException
+from app.utils.hashing import PasswordHashPool
+from tests.conftest import OPS_TOKEN
+
+
+def test_hashing_runs_off_the_event_loop():
+    pool = PasswordHashPool(workers=1, max_queue=0)
+
+    async def main():
+        return await pool.run(lambda: threading.current_thread().name)
+
+    assert asyncio.run(main()).startswith("password-hash")
+    assert pool.stats()["completed"] == 1
+
+
+def test_calls_beyond_the_queue_are_rejected():
+    pool = PasswordHashPool(workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def main():
+        running = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(HTTPException) as rejected:
+            await pool.run(release.wait)
+        release.set()
+        await asyncio.gather(*running)
+        return rejected.value
+
+    rejected = asyncio.run(main())
+    assert rejected.status_code == 429
+    assert rejected.headers["Retry-After"] == "1"
+    assert pool.stats()["rejected"] == 1
+
+
+def test_login_verifies_the_password_on_the_pool(run):
+    async def test(client):
+        password = "Correct horse battery"
+        response = await client.post(
+            "/signup", json={"username": "hasher", "email": "hasher@example.com", "password": password}
+        )
+        assert response.status_code == 201, response.text
+        response = await client.post("/token", data={"username": "hasher", "password": password})
+        assert response.status_code == 200
+        response = await client.post("/token", data={"username": "hasher", "password": "Wrong horse battery"})
+        assert response.status_code == 401
+        response = await client.get("/ops/password-hashing", headers={"X-Ops-Token": OPS_TOKEN})
+        assert response.json()["completed"] >= 3
+
+    run(test)
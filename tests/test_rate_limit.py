@@ -0,0 +1,69 @@
+import asyncio
+import secrets
+from app.config import Settings, settings
+from app.middleware.rate_limit import RateLimitMiddleware
+from app.utils.auth import create_access_token, hash_api_key
+
+
+async def _ok(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def _statuses(middleware, requests: int, headers, path: str = "/tasks/") -> list[int]:
+    async def send_all():
+        statuses = []
+        for _ in range(requests):
+            scope = {
+                "type": "http",
+                "method": "GET",
+                "path": path,
+                "client": ("203.0.113.7", 40000),
+                "headers": headers(),
+            }
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    statuses.append(message["status"])
+
+            await middleware(scope, None, send)
+        return statuses
+
+    return asyncio.run(send_all())
+
+
+def test_invented_api_keys_are_limited_per_ip():
+    middleware = RateLimitMiddleware(_ok)
+    statuses = _statuses(
+        middleware,
+        settings.RATE_LIMIT_IP_BURST + 5,
+        lambda: [(b"x-api-key", secrets.token_urlsafe(32).encode())],
+    )
+    assert statuses.count(429) >= 5
+
+
+def test_api_key_vouched_for_by_its_token_gets_the_key_bucket():
+    api_key = secrets.token_urlsafe(32)
+    token = create_access_token({"user_id": 1, "akh": hash_api_key(api_key), "tv": 0})
+    headers = [(b"authorization", f"Bearer {token}".encode()), (b"x-api-key", api_key.encode())]
+    middleware = RateLimitMiddleware(_ok)
+    statuses = _statuses(middleware, settings.RATE_LIMIT_API_KEY_BURST, lambda: headers)
+    assert statuses == [200] * settings.RATE_LIMIT_API_KEY_BURST
+
+
+def test_sign_in_attempts_use_the_stricter_bucket():
+    middleware = RateLimitMiddleware(_ok)
+    statuses = _statuses(middleware, settings.RATE_LIMIT_AUTH_BURST + 1, lambda: [], path="/token")
+    assert statuses == [200] * settings.RATE_LIMIT_AUTH_BURST + [429]
+
+
+def test_overload_sheds_requests_but_not_health_checks(monkeypatch):
+    monkeypatch.setattr(settings, "LOAD_SHED_MAX_IN_FLIGHT", 0)
+    middleware = RateLimitMiddleware(_ok)
+    assert _statuses(middleware, 1, lambda: []) == [503]
+    assert _statuses(middleware, 1, lambda: [], path="/health/ready") == [200]
+
+
+def test_rate_limiting_is_opt_in():
+    # Per-process buckets keyed by client address need proxy headers set up first
+    assert Settings.model_fields["RATE_LIMIT_ENABLED"].default is False
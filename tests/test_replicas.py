@@ -0,0 +1,53 @@
+import asyncio
+import tempfile
+from app.database import ReplicaRouter
+
+
+def _router(strategy: str = "round_robin") -> ReplicaRouter:
+    directory = tempfile.mkdtemp(prefix="tasky-replicas-")
+    urls = [
+        f"sqlite+aiosqlite:///{directory}/replica0.db",
+        f"sqlite+aiosqlite:///{directory}/missing/replica1.db",
+    ]
+    return ReplicaRouter(urls, strategy=strategy, sticky_seconds=60, check_seconds=1)
+
+
+def test_reads_rotate_over_healthy_replicas_and_recent_writers_stay_on_the_primary():
+    async def main():
+        router = _router()
+        try:
+            assert [router.choose(None).index for _ in range(4)] == [0, 1, 0, 1]
+            router.mark_write(7)
+            assert router.choose(7) is None
+            assert router.choose(8) is not None
+            assert router.sticky_reads == 1
+
+            # The second replica's directory does not exist, so it cannot be opened
+            await router.check_health()
+            assert [replica.healthy for replica in router.replicas] == [True, False]
+            assert {router.choose(None).index for _ in range(4)} == {0}
+            router.replicas[0].healthy = False
+            assert router.choose(None) is None
+        finally:
+            await router.stop()
+
+    asyncio.run(main())
+
+
+def test_least_connections_picks_the_idlest_replica():
+    async def main():
+        router = _router("least_connections")
+        try:
+            router.replicas[0].in_use = 3
+            assert router.choose(None).index == 1
+        finally:
+            await router.stop()
+
+    asyncio.run(main())
+
+
+def test_reads_use_the_primary_without_replicas():
+    router = ReplicaRouter([], strategy="round_robin", sticky_seconds=60, check_seconds=1)
+    router.mark_write(7)
+    assert router.choose(7) is None
+    assert router.choose(None) is None
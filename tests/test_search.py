@@ -0,0 +1,75 @@
+from types import SimpleNamespace
+from sqlalchemy import create_engine, inspect
+from app.database import Base
+from app.services.task_service import TaskService
+from app.sharding import shard_router
+from app.utils.pagination import encode_offset
+from tests.conftest import sign_up
+
+
+def test_search_rejects_an_offset_past_the_deepest_page(run):
+    async def test(client):
+        _, headers = await sign_up(client, "searcher")
+        response = await client.post(
+            "/tasks/", json={"title": "Water plants", "description": "Balcony"}, headers=headers
+        )
+        assert response.status_code == 201, response.text
+        response = await client.get("/tasks/search", params={"q": "water"}, headers=headers)
+        assert [task["title"] for task in response.json()["items"]] == ["Water plants"]
+        response = await client.get(
+            "/tasks/search", params={"q": "water", "cursor": encode_offset(10**30)}, headers=headers
+        )
+        assert response.status_code == 400
+
+    run(test)
+
+
+def test_search_index_is_dropped_with_the_tasks_table():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    Base.metadata.drop_all(engine)
+    assert "tasks_fts" not in inspect(engine).get_table_names()
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+
+def test_substring_fallback_matches_wildcards_literally(run):
+    async def test(client):
+        user_id, headers = await sign_up(client, "wildcards")
+        for title in ("100% done", "1000 done", "snake_case", "snakeXcase"):
+            await client.post("/tasks/", json={"title": title, "description": "Literal"}, headers=headers)
+
+        async with shard_router.session(user_id) as db:
+            # Dialects without a full-text index take the ILIKE fallback
+            db.get_bind = lambda: SimpleNamespace(dialect=SimpleNamespace(name="other"))
+            user = SimpleNamespace(id=user_id)
+            tasks, _ = await TaskService.search_tasks("100%", user, db)
+            assert [task.title for task in tasks] == ["100% done"]
+            tasks, _ = await TaskService.search_tasks("snake_case", user, db)
+            assert [task.title for task in tasks] == ["snake_case"]
+
+    run(test)
+
+
+def test_search_index_follows_writes_and_stays_per_user(run):
+    async def test(client):
+        _, headers = await sign_up(client, "indexed")
+        _, other = await sign_up(client, "indexed-neighbour")
+        await client.post("/tasks/", json={"title": "Groceries", "description": "Buy apples"}, headers=other)
+        task = (
+            await client.post("/tasks/", json={"title": "Groceries", "description": "Buy pears"}, headers=headers)
+        ).json()
+
+        async def descriptions(query):
+            response = await client.get("/tasks/search", params={"q": query}, headers=headers)
+            return [item["description"] for item in response.json()["items"]]
+
+        assert await descriptions("grocer") == ["Buy pears"]
+        assert await descriptions("apples") == []
+        await client.put(f"/tasks/{task['id']}", json={"description": "Buy plums"}, headers=headers)
+        assert await descriptions("pears") == []
+        assert await descriptions("plums") == ["Buy plums"]
+        await client.delete(f"/tasks/{task['id']}", headers=headers)
+        assert await descriptions("plums") == []
+
+    run(test)
@@ -0,0 +1,35 @@
+import json
+from datetime import datetime, timezone
+from app.schemas.task import TaskResponse
+from app.utils.serialization import task_adapter, task_page_adapter
+from tests.conftest import sign_up
+
+ROW = {
+    "title": "Serialized",
+    "description": "Without validation",
+    "status": "completed",
+    "id": 7,
+    "user_id": 3,
+    "created_at": datetime(2024, 1, 15, 10, 30, tzinfo=timezone.utc),
+    "updated_at": None,
+    "version": 4,
+}
+
+
+def test_fast_path_matches_the_response_model():
+    assert task_adapter.dump_json(ROW) == TaskResponse(**ROW).model_dump_json().encode()
+    page = json.loads(task_page_adapter.dump_json({"items": [ROW], "next_cursor": None}))
+    assert page == {"items": [json.loads(TaskResponse(**ROW).model_dump_json())], "next_cursor": None}
+
+
+def test_responses_validate_against_the_documented_schema(run):
+    async def test(client):
+        _, headers = await sign_up(client, "serialized")
+        created = await client.post("/tasks/", json={"title": "Shape", "description": "Checked"}, headers=headers)
+        task = TaskResponse.model_validate(created.json())
+        listed = (await client.get("/tasks/", headers=headers)).json()["items"]
+        fetched = (await client.get(f"/tasks/{task.id}", headers=headers)).json()
+        assert [TaskResponse.model_validate(item) for item in listed] == [task]
+        assert TaskResponse.model_validate(fetched) == task
+
+    run(test)
@@ -0,0 +1,25 @@
+import os
+from app import server
+from app.config import settings
+from app.server import available_cpus, multi_worker_conflicts, serve
+
+
+def test_default_settings_serve_on_every_available_cpu():
+    assert available_cpus() >= 1
+    assert multi_worker_conflicts() == []
+
+
+def test_explicit_workers_are_refused_with_per_process_idempotency(monkeypatch):
+    monkeypatch.setattr(settings, "IDEMPOTENCY_BACKEND", "memory")
+    assert multi_worker_conflicts()
+    assert serve("127.0.0.1", 0, workers=2, forwarded_allow_ips="127.0.0.1") == 2
+
+
+def test_worker_count_honors_affinity_and_the_container_quota(monkeypatch):
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: set(range(8)))
+    monkeypatch.setattr(server, "_cgroup_cpu_quota", lambda: None)
+    assert available_cpus() == 8
+    monkeypatch.setattr(server, "_cgroup_cpu_quota", lambda: 1.5)
+    assert available_cpus() == 2
+    monkeypatch.setattr(server, "_cgroup_cpu_quota", lambda: 0.25)
+    assert available_cpus() == 1
@@ -0,0 +1,64 @@
+import itertools
+from app.services.task_shard_service import TaskShardService
+from app.sharding import shard_router
+from tests.conftest import sign_up
+
+_usernames = (f"shard{index}" for index in itertools.count())
+
+
+def _task(title: str) -> dict:
+    return {"title": title, "description": "Created by the tests"}
+
+
+async def _sign_up_on_shard(client, shard_index: int) -> dict:
+    while True:
+        user_id, headers = await sign_up(client, next(_usernames))
+        if shard_router.target(user_id) == shard_index:
+            return headers
+
+
+def test_create_task_on_shard_sharing_the_primary_database(run):
+    async def test(client):
+        headers = await _sign_up_on_shard(client, 0)
+        response = await client.post("/tasks/", json=_task("First"), headers=headers)
+        assert response.status_code == 201, response.text
+        response = await client.post(
+            "/tasks/batch", json={"tasks": [_task("Second"), _task("Third")]}, headers=headers
+        )
+        assert response.status_code == 200, response.text
+        listed = (await client.get("/tasks/", headers=headers)).json()
+        titles = {task["title"] for task in listed["items"]}
+        assert titles == {"First", "Second", "Third"}
+
+    run(test)
+
+
+def test_task_ids_are_unique_across_shards(run):
+    async def test(client):
+        ids = []
+        for shard_index in (0, 1):
+            headers = await _sign_up_on_shard(client, shard_index)
+            response = await client.post("/tasks/", json=_task("Task"), headers=headers)
+            assert response.status_code == 201, response.text
+            ids.append(response.json()["id"])
+        assert len(set(ids)) == 2
+
+    run(test)
+
+
+def test_moving_a_user_keeps_their_tasks_readable_and_writable(run):
+    async def test(client):
+        headers = await _sign_up_on_shard(client, 0)
+        created = (await client.post("/tasks/", json=_task("Moved"), headers=headers)).json()
+        user_id = created["user_id"]
+
+        copied = await TaskShardService.move_user(user_id, 1, settle_seconds=0)
+        assert copied >= 1
+        assert (await shard_router.placement(user_id))[0] == 1
+        assert (await client.get(f"/tasks/{created['id']}", headers=headers)).json()["title"] == "Moved"
+        assert (await client.post("/tasks/", json=_task("After"), headers=headers)).status_code == 201
+        titles = {task["title"] for task in (await client.get("/tasks/", headers=headers)).json()["items"]}
+        assert titles == {"Moved", "After"}
+        assert (await client.get("/tasks/stats", headers=headers)).json()["total"] == 2
+
+    run(test)
@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta, timezone
+from app.services.task_archive_service import TaskArchiveService
+from app.sharding import shard_router
+from tests.conftest import sign_up
+
+
+def _task(title: str) -> dict:
+    return {"title": title, "description": "Archived by the tests"}
+
+
+def test_archived_tasks_leave_the_list_but_stay_reachable(run):
+    async def test(client):
+        user_id, headers = await sign_up(client, "archivist")
+        done = (await client.post("/tasks/", json=_task("Done"), headers=headers)).json()
+        await client.put(f"/tasks/{done['id']}", json={"status": "completed"}, headers=headers)
+        open_task = (await client.post("/tasks/", json=_task("Open"), headers=headers)).json()
+        # The newest row stays in place, so SQLite never reuses an archived id
+        await client.post("/tasks/", json=_task("Newest"), headers=headers)
+
+        async with shard_router.session(user_id, write=True) as db:
+            moved = await TaskArchiveService.archive(
+                db, datetime.now(timezone.utc) + timedelta(days=1), user_id=user_id
+            )
+        assert moved == 1
+
+        listed = (await client.get("/tasks/", headers=headers)).json()["items"]
+        assert done["id"] not in {task["id"] for task in listed}
+        assert open_task["id"] in {task["id"] for task in listed}
+        everything = (await client.get("/tasks/", params={"include_archived": True}, headers=headers)).json()["items"]
+        assert done["id"] in {task["id"] for task in everything}
+        assert (await client.get(f"/tasks/{done['id']}", headers=headers)).json()["status"] == "completed"
+        assert (await client.get("/tasks/stats", headers=headers)).json()["counts"]["completed"] == 1
+
+        # Writing an archived task moves it back
+        await client.put(f"/tasks/{done['id']}", json={"status": "pending"}, headers=headers)
+        listed = (await client.get("/tasks/", headers=headers)).json()["items"]
+        assert done["id"] in {task["id"] for task in listed}
+
+    run(test)
@@ -0,0 +1,57 @@
+from tests.conftest import sign_up
+
+
+def test_batch_update_that_writes_nothing_keeps_the_collection_version(run):
+    async def test(client):
+        _, headers = await sign_up(client, "batcher")
+        response = await client.post(
+            "/tasks/", json={"title": "Kept", "description": "Unchanged"}, headers=headers
+        )
+        task_id = response.json()["id"]
+        etag = (await client.get("/tasks/", headers=headers)).headers["etag"]
+
+        response = await client.patch(
+            "/tasks/batch",
+            json={"tasks": [{"id": task_id}, {"id": 999999, "status": "completed"}]},
+            headers=headers,
+        )
+        assert [result["status_code"] for result in response.json()["results"]] == [200, 404]
+        assert (await client.get("/tasks/", headers=headers)).headers["etag"] == etag
+
+        response = await client.patch(
+            "/tasks/batch", json={"tasks": [{"id": task_id, "status": "completed"}]}, headers=headers
+        )
+        assert response.json()["results"][0]["task"]["status"] == "completed"
+        assert (await client.get("/tasks/", headers=headers)).headers["etag"] != etag
+
+    run(test)
+
+
+def test_batch_create_and_delete_report_each_task(run):
+    async def test(client):
+        _, headers = await sign_up(client, "bulk")
+        _, other = await sign_up(client, "bulk-neighbour")
+        foreign = (await client.post("/tasks/", json={"title": "Theirs", "description": "Kept"}, headers=other)).json()
+
+        response = await client.post(
+            "/tasks/batch",
+            json={"tasks": [{"title": f"Bulk {index}", "description": "Batched"} for index in range(3)]},
+            headers=headers,
+        )
+        results = response.json()["results"]
+        assert [result["status_code"] for result in results] == [201, 201, 201]
+        ids = [result["task"]["id"] for result in results]
+        assert [result["task"]["title"] for result in results] == ["Bulk 0", "Bulk 1", "Bulk 2"]
+
+        response = await client.request(
+            "DELETE", "/tasks/batch", json={"ids": [ids[0], foreign["id"], ids[2]]}, headers=headers
+        )
+        assert [result["status_code"] for result in response.json()["results"]] == [204, 404, 204]
+        listed = (await client.get("/tasks/", headers=headers)).json()["items"]
+        assert [task["id"] for task in listed] == [ids[1]]
+        assert (await client.get(f"/tasks/{foreign['id']}", headers=other)).status_code == 200
+
+        response = await client.post("/tasks/batch", json={"tasks": []}, headers=headers)
+        assert response.status_code == 422
+
+    run(test)
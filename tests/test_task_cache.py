@@ -0,0 +1,34 @@
+from app.config import settings
+from app.services.task_cache_service import task_cache_requests
+from tests.conftest import sign_up
+
+
+def _lookups() -> tuple[float, float]:
+    return task_cache_requests.value("hit"), task_cache_requests.value("miss")
+
+
+def test_cached_pages_and_tasks_never_outlive_a_write(run, monkeypatch):
+    monkeypatch.setattr(settings, "TASK_CACHE_ENABLED", True)
+
+    async def test(client):
+        _, headers = await sign_up(client, "cached-lists")
+        task = (await client.post("/tasks/", json={"title": "Before", "description": "Cached"}, headers=headers)).json()
+
+        hits, misses = _lookups()
+        first = await client.get("/tasks/", headers=headers)
+        second = await client.get("/tasks/", headers=headers)
+        assert second.content == first.content
+        assert _lookups() == (hits + 1, misses + 1)
+
+        await client.put(f"/tasks/{task['id']}", json={"title": "After"}, headers=headers)
+        listed = (await client.get("/tasks/", headers=headers)).json()["items"]
+        assert [item["title"] for item in listed] == ["After"]
+        fetched = await client.get(f"/tasks/{task['id']}", headers=headers)
+        assert fetched.json()["title"] == "After"
+        assert (await client.get(f"/tasks/{task['id']}", headers=headers)).content == fetched.content
+
+        await client.delete(f"/tasks/{task['id']}", headers=headers)
+        assert (await client.get("/tasks/", headers=headers)).json()["items"] == []
+        assert (await client.get(f"/tasks/{task['id']}", headers=headers)).status_code == 404
+
+    run(test)
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta, timezone
+from app.services.task_service import TaskService
+from app.sharding import shard_router
+from tests.conftest import sign_up
+
+
+def _task(title: str) -> dict:
+    return {"title": title, "description": "Synced"}
+
+
+def test_delta_sync_reports_upserts_and_tombstones_after_a_version(run):
+    async def test(client):
+        _, headers = await sign_up(client, "syncer")
+        kept = (await client.post("/tasks/", json=_task("Kept"), headers=headers)).json()
+        doomed = (await client.post("/tasks/", json=_task("Doomed"), headers=headers)).json()
+        full = (await client.get("/tasks/changes", headers=headers)).json()
+        assert {change["id"] for change in full["changes"]} == {kept["id"], doomed["id"]}
+        assert full["next_cursor"] is None
+
+        await client.put(f"/tasks/{kept['id']}", json={"status": "completed"}, headers=headers)
+        await client.delete(f"/tasks/{doomed['id']}", headers=headers)
+        delta = (await client.get("/tasks/changes", params={"since": full["version"]}, headers=headers)).json()
+        changes = {change["id"]: change for change in delta["changes"]}
+        assert changes[kept["id"]]["op"] == "upsert"
+        assert changes[kept["id"]]["task"]["status"] == "completed"
+        assert changes[doomed["id"]] == {"op": "delete", "id": doomed["id"]}
+
+        again = (await client.get("/tasks/changes", params={"since": delta["version"]}, headers=headers)).json()
+        assert again["changes"] == []
+        # A full sync leaves deleted tasks out
+        full = (await client.get("/tasks/changes", headers=headers)).json()
+        assert [change["id"] for change in full["changes"]] == [kept["id"]]
+
+    run(test)
+
+
+def test_changes_page_through_the_cursor(run):
+    async def test(client):
+        _, headers = await sign_up(client, "paged-syncer")
+        for index in range(5):
+            await client.post("/tasks/", json=_task(f"Task {index}"), headers=headers)
+        seen, params = [], {"limit": 2}
+        while True:
+            page = (await client.get("/tasks/changes", params=params, headers=headers)).json()
+            seen += [change["task"]["title"] for change in page["changes"]]
+            if page["next_cursor"] is None:
+                break
+            params = {"limit": 2, "cursor": page["next_cursor"]}
+        assert seen == [f"Task {index}" for index in range(5)]
+
+    run(test)
+
+
+def test_syncing_from_before_compacted_tombstones_is_gone(run):
+    async def test(client):
+        user_id, headers = await sign_up(client, "stale-syncer")
+        task = (await client.post("/tasks/", json=_task("Short-lived"), headers=headers)).json()
+        # The newest row is never purged, so SQLite cannot reuse its id
+        await client.post("/tasks/", json=_task("Newest"), headers=headers)
+        await client.delete(f"/tasks/{task['id']}", headers=headers)
+        async with shard_router.session(user_id, write=True) as db:
+            purged = await TaskService.compact_tombstones(
+                db, datetime.now(timezone.utc) + timedelta(days=1), user_id=user_id
+            )
+        assert purged == 1
+        response = await client.get("/tasks/changes", params={"since": task["version"]}, headers=headers)
+        assert response.status_code == 410
+        assert (await client.get("/tasks/changes", headers=headers)).status_code == 200
+
+    run(test)
@@ -0,0 +1,71 @@
+from app.utils.etag import task_etag
+from tests.conftest import sign_up
+
+
+def test_unchanged_task_is_not_modified(run):
+    async def test(client):
+        _, headers = await sign_up(client, "revalidator")
+        task = (await client.post("/tasks/", json={"title": "Mine", "description": "Cached"}, headers=headers)).json()
+        etag = (await client.get(f"/tasks/{task['id']}", headers=headers)).headers["etag"]
+
+        response = await client.get(f"/tasks/{task['id']}", headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+
+        await client.put(f"/tasks/{task['id']}", json={"status": "completed"}, headers=headers)
+        response = await client.get(f"/tasks/{task['id']}", headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+
+    run(test)
+
+
+def test_crafted_etag_for_another_users_task_is_not_found(run):
+    async def test(client):
+        _, owner = await sign_up(client, "etag-owner")
+        _, other = await sign_up(client, "etag-prober")
+        task = (await client.post("/tasks/", json={"title": "Private", "description": "Owner only"}, headers=owner)).json()
+        own = (await client.post("/tasks/", json={"title": "Own", "description": "Prober's"}, headers=other)).json()
+        # A tag carrying the prober's own collection version
+        crafted = task_etag(task["id"], own["version"])
+
+        response = await client.get(f"/tasks/{task['id']}", headers={**other, "If-None-Match": crafted})
+        assert response.status_code == 404
+        response = await client.get("/tasks/999999", headers={**other, "If-None-Match": crafted})
+        assert response.status_code == 404
+
+    run(test)
+
+
+def test_update_with_a_stale_if_match_is_rejected(run):
+    async def test(client):
+        _, headers = await sign_up(client, "conditional")
+        task = (await client.post("/tasks/", json={"title": "Shared", "description": "Edited twice"}, headers=headers)).json()
+        etag = (await client.get(f"/tasks/{task['id']}", headers=headers)).headers["etag"]
+
+        response = await client.put(
+            f"/tasks/{task['id']}", json={"title": "First"}, headers={**headers, "If-Match": etag}
+        )
+        assert response.status_code == 200
+        response = await client.put(
+            f"/tasks/{task['id']}", json={"title": "Second"}, headers={**headers, "If-Match": etag}
+        )
+        assert response.status_code == 412
+
+    run(test)
+
+
+def test_task_list_is_not_modified_until_a_write(run):
+    async def test(client):
+        _, headers = await sign_up(client, "list-revalidator")
+        await client.post("/tasks/", json={"title": "Listed", "description": "Once"}, headers=headers)
+        etag = (await client.get("/tasks/", headers=headers)).headers["etag"]
+        response = await client.get("/tasks/", headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 304
+
+        await client.post("/tasks/", json={"title": "Listed", "description": "Twice"}, headers=headers)
+        response = await client.get("/tasks/", headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 200
+        assert len(response.json()["items"]) == 2
+
+    run(test)
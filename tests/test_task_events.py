@@ -0,0 +1,60 @@
+import asyncio
+import json
+from app.services.task_event_service import TaskEventService
+from tests.conftest import sign_up
+
+
+def _parse(chunk: bytes) -> tuple[str, int, dict]:
+    fields = dict(line.split(": ", 1) for line in chunk.decode().strip().splitlines())
+    return fields["event"], int(fields["id"]), json.loads(fields["data"])
+
+
+async def _next(feed) -> tuple[str, int, dict]:
+    return _parse(await asyncio.wait_for(anext(feed), 5))
+
+
+def test_feed_delivers_each_committed_write(run):
+    async def test(client):
+        user_id, headers = await sign_up(client, "subscriber")
+        feed = TaskEventService.stream(user_id, None)
+        try:
+            event, version, _ = await _next(feed)
+            assert event == "ready"
+            task = (await client.post("/tasks/", json={"title": "Live", "description": "Pushed"}, headers=headers)).json()
+            event, pushed, data = await _next(feed)
+            assert (event, pushed) == ("changes", version + 1)
+            assert data["changes"][0]["task"]["title"] == "Live"
+
+            await client.delete(f"/tasks/{task['id']}", headers=headers)
+            event, _, data = await _next(feed)
+            assert event == "changes"
+            assert data["changes"][0]["op"] == "delete"
+        finally:
+            await feed.aclose()
+
+    run(test)
+
+
+def test_reconnecting_replays_buffered_changes_or_asks_for_a_resync(run):
+    async def test(client):
+        user_id, headers = await sign_up(client, "reconnecting")
+        for title in ("One", "Two"):
+            await client.post("/tasks/", json={"title": title, "description": "Missed"}, headers=headers)
+
+        feed = TaskEventService.stream(user_id, 0)
+        try:
+            events = [await _next(feed) for _ in range(3)]
+        finally:
+            await feed.aclose()
+        assert [event for event, _, _ in events] == ["changes", "changes", "ready"]
+        assert [data["changes"][0]["task"]["title"] for _, _, data in events[:2]] == ["One", "Two"]
+
+        # A version the history cannot account for gets a resync to the current one
+        feed = TaskEventService.stream(user_id, events[-1][1] + 5)
+        try:
+            event, version, data = await _next(feed)
+        finally:
+            await feed.aclose()
+        assert (event, version, data["reason"]) == ("resync", events[-1][1], "history")
+
+    run(test)
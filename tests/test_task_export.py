@@ -0,0 +1,41 @@
+import csv
+import io
+import json
+from tests.conftest import sign_up
+
+
+async def _seed(client, username: str) -> dict:
+    _, headers = await sign_up(client, username)
+    for title in ("First, with a comma", "Second"):
+        await client.post("/tasks/", json={"title": title, "description": "Exported"}, headers=headers)
+    return headers
+
+
+def test_ndjson_export_streams_one_task_per_line(run):
+    async def test(client):
+        headers = await _seed(client, "ndjson-exporter")
+        response = await client.get("/tasks/export", headers=headers)
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        assert response.headers["content-disposition"] == 'attachment; filename="tasks.ndjson"'
+        tasks = [json.loads(line) for line in response.text.splitlines()]
+        assert [task["title"] for task in tasks] == ["Second", "First, with a comma"]
+        assert tasks == (await client.get("/tasks/", headers=headers)).json()["items"]
+
+    run(test)
+
+
+def test_csv_export_has_a_header_row_and_applies_filters(run):
+    async def test(client):
+        headers = await _seed(client, "csv-exporter")
+        response = await client.get("/tasks/export", params={"format": "csv"}, headers=headers)
+        assert response.headers["content-type"].startswith("text/csv")
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert [row["title"] for row in rows] == ["Second", "First, with a comma"]
+        assert {row["status"] for row in rows} == {"pending"}
+
+        response = await client.get(
+            "/tasks/export", params={"format": "csv", "status": "completed"}, headers=headers
+        )
+        assert list(csv.DictReader(io.StringIO(response.text))) == []
+
+    run(test)
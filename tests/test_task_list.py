@@ -0,0 +1,47 @@
+from tests.conftest import sign_up
+
+
+def test_pages_follow_the_cursor_newest_first(run):
+    async def test(client):
+        _, headers = await sign_up(client, "pager")
+        created = []
+        for number in range(5):
+            response = await client.post(
+                "/tasks/", json={"title": f"Task {number}", "description": "Paged"}, headers=headers
+            )
+            created.append(response.json()["id"])
+
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 2} if cursor is None else {"limit": 2, "cursor": cursor}
+            page = (await client.get("/tasks/", params=params, headers=headers)).json()
+            assert set(page) == {"items", "next_cursor"}
+            assert len(page["items"]) <= 2
+            seen += [task["id"] for task in page["items"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert seen == created[::-1]
+
+        response = await client.get("/tasks/", params={"cursor": "not-a-cursor"}, headers=headers)
+        assert response.status_code == 400
+
+    run(test)
+
+
+def test_status_filter(run):
+    async def test(client):
+        _, headers = await sign_up(client, "filterer")
+        for title, task_status in (("Open", "pending"), ("Done", "completed")):
+            response = await client.post(
+                "/tasks/", json={"title": title, "description": "Filtered"}, headers=headers
+            )
+            if task_status == "completed":
+                await client.put(f"/tasks/{response.json()['id']}", json={"status": "completed"}, headers=headers)
+
+        page = (await client.get("/tasks/", params={"status": "completed"}, headers=headers)).json()
+        assert [task["title"] for task in page["items"]] == ["Done"]
+        page = (await client.get("/tasks/", params={"status": "pending"}, headers=headers)).json()
+        assert [task["title"] for task in page["items"]] == ["Open"]
+
+    run(test)
@@ -0,0 +1,58 @@
+import asyncio
+from sqlalchemy import update
+from app.models.task import TaskCollection
+from app.services.task_collection_service import TaskCollectionService
+from app.sharding import shard_router
+from tests.conftest import sign_up
+
+
+def _task(title: str, task_status: str = "pending") -> dict:
+    return {"title": title, "description": "Created by the tests", "status": task_status}
+
+
+def test_reconcile_keeps_writes_that_commit_while_it_runs(run):
+    async def test(client):
+        user_id, headers = await sign_up(client, "reconciled")
+        await client.post("/tasks/", json=_task("One"), headers=headers)
+        async with shard_router.session(user_id, write=True) as db:
+            # Counters that drifted, as reconcile is there to fix
+            await db.execute(
+                update(TaskCollection).where(TaskCollection.user_id == user_id).values(pending_count=7)
+            )
+            await db.commit()
+
+        async def reconcile():
+            async with shard_router.session(user_id, write=True) as db:
+                await TaskCollectionService.reconcile(db, user_id=user_id)
+
+        writes = [
+            client.post("/tasks/", json=_task(f"Task {index}", "completed"), headers=headers)
+            for index in range(5)
+        ]
+        await asyncio.gather(reconcile(), *writes)
+        stats = (await client.get("/tasks/stats", headers=headers)).json()
+        assert stats["counts"] == {"pending": 1, "completed": 5}
+        assert sum(day["count"] for day in stats["created_per_day"]) == 6
+
+    run(test)
+
+
+def test_counters_follow_creates_updates_and_deletes(run):
+    async def test(client):
+        _, headers = await sign_up(client, "counted")
+        assert (await client.get("/tasks/stats", headers=headers)).json()["total"] == 0
+        ids = []
+        for index in range(4):
+            response = await client.post("/tasks/", json=_task(f"Task {index}"), headers=headers)
+            ids.append(response.json()["id"])
+        await client.put(f"/tasks/{ids[0]}", json={"status": "completed"}, headers=headers)
+        await client.put(f"/tasks/{ids[1]}", json={"status": "completed"}, headers=headers)
+        await client.delete(f"/tasks/{ids[2]}", headers=headers)
+
+        stats = (await client.get("/tasks/stats", headers=headers)).json()
+        assert stats["counts"] == {"pending": 1, "completed": 2}
+        assert stats["total"] == 3
+        assert stats["completion_rate"] == 2 / 3
+        assert sum(day["count"] for day in stats["created_per_day"]) == 3
+
+    run(test)
@@ -0,0 +1,30 @@
+import asyncio
+from app.config import settings
+from app.services.task_write_queue import task_create_batcher
+from tests.conftest import sign_up
+
+
+def test_concurrent_creates_are_group_committed(run, monkeypatch):
+    monkeypatch.setattr(settings, "TASK_CREATE_BATCHING", True)
+
+    async def test(client):
+        _, first = await sign_up(client, "burst-one")
+        _, second = await sign_up(client, "burst-two")
+        batches = task_create_batcher.batches
+        responses = await asyncio.gather(
+            *(
+                client.post("/tasks/", json={"title": f"Burst {index}", "description": "Queued"}, headers=headers)
+                for index in range(6)
+                for headers in (first, second)
+            )
+        )
+        assert [response.status_code for response in responses] == [201] * 12
+        assert len({response.json()["id"] for response in responses}) == 12
+        assert task_create_batcher.batches - batches < 12
+
+        for headers in (first, second):
+            listed = (await client.get("/tasks/", headers=headers)).json()["items"]
+            assert len(listed) == 6
+            assert (await client.get("/tasks/stats", headers=headers)).json()["total"] == 6
+
+    run(test)
@@ -0,0 +1,42 @@
+from tests.conftest import sign_up
+
+
+def _task(title: str) -> dict:
+    return {"title": title, "description": "Created by the tests"}
+
+
+def test_update_returns_the_written_task_and_only_touches_the_owners(run):
+    async def test(client):
+        _, headers = await sign_up(client, "updater")
+        _, other = await sign_up(client, "update-intruder")
+        task = (await client.post("/tasks/", json=_task("Draft"), headers=headers)).json()
+
+        response = await client.put(f"/tasks/{task['id']}", json={"status": "completed"}, headers=headers)
+        assert response.status_code == 200
+        updated = response.json()
+        assert (updated["title"], updated["status"]) == ("Draft", "completed")
+        assert updated["version"] > task["version"]
+        assert updated["updated_at"] is not None
+
+        response = await client.put(f"/tasks/{task['id']}", json={"title": "Hijacked"}, headers=other)
+        assert response.status_code == 404
+        assert (await client.put("/tasks/999999", json={"title": "Nothing"}, headers=headers)).status_code == 404
+        assert (await client.get(f"/tasks/{task['id']}", headers=headers)).json()["title"] == "Draft"
+
+    run(test)
+
+
+def test_delete_only_removes_the_owners_task(run):
+    async def test(client):
+        _, headers = await sign_up(client, "deleter")
+        _, other = await sign_up(client, "delete-intruder")
+        task = (await client.post("/tasks/", json=_task("Doomed"), headers=headers)).json()
+
+        assert (await client.delete(f"/tasks/{task['id']}", headers=other)).status_code == 404
+        assert (await client.get(f"/tasks/{task['id']}", headers=headers)).status_code == 200
+        assert (await client.delete(f"/tasks/{task['id']}", headers=headers)).status_code == 204
+        assert (await client.get(f"/tasks/{task['id']}", headers=headers)).status_code == 404
+        assert (await client.delete(f"/tasks/{task['id']}", headers=headers)).status_code == 404
+
+    run(test)
+